@@ -1,565 +1,1026 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, g, flash, send_from_directory
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify, session, redirect, url_for, g, flash, Response, stream_with_context, has_app_context
+from flask.sessions import SecureCookieSessionInterface
 from pathlib import Path
+import click
 import sqlite3
 import json
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
 import random
 from functools import wraps
+from markupsafe import Markup
 from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import get_input_stream
 import logging
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
+import threading
+import time
+import weakref
+from asgi import AsgiAdapter
+from assets import (BUNDLES as ASSET_BUNDLES, IMAGE_DENSITIES, VENDOR_FILES, AssetError,
+                    build as build_assets, variant_name)
+from batch_scoring import iter_json_array, iter_ndjson, score_rows
+from catalog import (CatalogError, CatalogWatcher, PersonalityTypeRegistry, bulk_upsert_majors,
+                     get_catalog_version, get_personality_types_version, get_question_bank_version)
+from catalog_api import (MAJOR_FIELDS, PERSONALITY_TYPE_FIELDS, ApiQueryError, CatalogPageCache,
+                         fetch_item, fetch_page, parse_fields, parse_page_args)
+from compression import DEFAULT_RULES as DEFAULT_COMPRESSION_RULES, CompressionMiddleware
+from db_diagnostics import login_diagnostics
+from db_pool import DEFAULT_PRAGMAS, ConnectionPool, PoolTimeout
+from logging_config import configure_logging, discard_logging, logging_configured
+from match_engine import SCORE_SCALE, MatchEngine, user_vector
+from migrations import get_schema_version, migrate
+from password_hashing import DEFAULT_METHOD, PasswordHasher, PasswordHasherBusy
+from question_bank import DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS, QuestionBank
+from recommendation_cache import RecommendationCache, grid_inputs, quantize
+from repositories import BACKENDS as STORAGE_BACKENDS, PyodbcBackend, Repositories, SQLiteBackend
+from response_cache import ResponseCache, page_from_response, page_response
+from server_sessions import ServerSessionInterface, make_session_store
+from static_files import StaticFiles
+from template_cache import FragmentCache, FragmentCacheExtension, bytecode_cache
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger('app.requests')  # Per-request debug events
+
+def default_config(app):
+    """Every setting's default; create_app() applies overrides on top"""
+    app.config['SECRET_KEY'] = 'dev'  # Change this to a secure key in production
+    app.config['DATABASE'] = 'recruitmentbuddy.db'
+    app.config['STORAGE_BACKEND'] = 'sqlite'  # 'sqlite' (the DATABASE file) or 'pyodbc' (DATABASE_URL)
+    app.config['DATABASE_URL'] = os.environ.get('DATABASE_URL')  # ODBC connection string for 'pyodbc'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size, except /api/match/batch
+    app.config['DB_POOL_SIZE'] = 10  # Max open SQLite connections per process
+    app.config['DB_POOL_TIMEOUT'] = 5.0  # Seconds to wait for a free connection before a 503
+    app.config['DB_PRAGMAS'] = dict(DEFAULT_PRAGMAS)
+    app.config['DB_STATEMENT_CACHE_SIZE'] = 256  # Prepared statements cached per connection
+    app.config['DB_AUTO_MIGRATE'] = True  # Apply pending schema migrations when the pool opens
+    app.config['MATCH_INDEX_MIN_MAJORS'] = 10000  # Use the KD-tree index from this catalog size up
+    app.config['BATCH_MATCH_CHUNK_SIZE'] = 1000  # Rows scored together by /api/match/batch
+    app.config['BATCH_MATCH_MAX_K'] = 50
+    app.config['BATCH_MATCH_MAX_BODY_SIZE'] = None  # Batch bodies are streamed, so any size by default
+    app.config['RECOMMENDATION_CACHE_SIZE'] = 20000  # Cached ranked lists (LRU)
+    app.config['RECOMMENDATION_CACHE_PRECOMPUTE'] = False  # Fill the cache for every input at startup
+    app.config['RECOMMENDATIONS_PERSIST_TOP_K'] = 10  # Saved per submission; 0 or None saves every major
+    app.config['PASSWORD_HASH_METHOD'] = DEFAULT_METHOD  # Stored hashes using other parameters are upgraded on login
+    app.config['PASSWORD_HASH_WORKERS'] = 2  # Hashing processes; 0 hashes on the request thread
+    app.config['PASSWORD_HASH_MAX_PENDING'] = 32  # Queued hashing jobs before requests are shed
+    app.config['LOGIN_DIAGNOSTICS_SAMPLE_RATE'] = 0.0  # Fraction of logins that log schema and user-count stats
+    app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+    app.config['LOG_LEVELS'] = {}  # Per-logger overrides, e.g. {'app.requests': 'DEBUG'}
+    app.config['LOG_FILE'] = os.environ.get('LOG_FILE', 'app.log')  # None or '' logs to stderr only
+    app.config['LOG_JSON'] = False  # One JSON object per line instead of plain text
+    app.config['LOG_DEBUG_RATE_LIMIT'] = 10.0  # DEBUG records per second per call site
+    app.config['STATIC_MAX_AGE'] = 0  # Unversioned static URLs are revalidated with their ETag
+    app.config['STATIC_IMMUTABLE_MAX_AGE'] = 365 * 24 * 60 * 60  # Fingerprinted URLs (?v=<hash>)
+    app.config['USE_X_SENDFILE'] = False  # Let a front-end server that supports X-Sendfile send files
+    app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = os.path.join(app.instance_path, 'jinja_cache')  # None disables
+    app.config['FRAGMENT_CACHE_SIZE'] = 1000  # Rendered {% cache %} fragments kept; 0 disables
+    app.config['RESPONSE_CACHE_SIZE'] = 256  # Whole pages cached by @cached_page; 0 disables
+    app.config['API_PAGE_SIZE'] = 100  # Default items per /api/majors and /api/personality-types page
+    app.config['API_MAX_PAGE_SIZE'] = 500  # Largest ?limit= accepted
+    app.config['API_PAGE_CACHE_SIZE'] = 512  # Serialized catalog API pages kept; 0 disables
+    app.config['COMPRESSION_ENABLED'] = True  # gzip/brotli responses negotiated from Accept-Encoding
+    app.config['COMPRESSION_RULES'] = dict(DEFAULT_COMPRESSION_RULES)  # Per content type: min_size, gzip_level, br_quality
+    app.config['QUESTIONNAIRE_SINGLE_PAGE'] = True  # /questionnaire sends every step at once; ?step=N still works
+    app.config['SESSION_BACKEND'] = 'sqlite'  # 'sqlite', 'memory' (single process) or 'cookie' (Flask's signed cookie)
+    app.config['SESSION_SQLITE_PATH'] = os.path.join(app.instance_path, 'sessions.db')
+    app.config['SESSION_SWEEP_INTERVAL'] = 300  # Seconds between purges of expired server-side sessions
+    app.config['ADMIN_API_TOKEN'] = os.environ.get('ADMIN_API_TOKEN')  # Admin endpoints are disabled when unset
+    app.config['ASGI_WORKERS'] = 32  # Requests inside the app at once under asgi_app; slow clients wait on the event loop
+    app.config['ASGI_SEND_BUFFER'] = 16  # Response chunks queued for a slow client before its worker waits
+    app.config['ASGI_BODY_BUFFER'] = 64 * 1024  # Request body bytes read ahead on the event loop; the app streams the rest
+    app.config['WARM_UP'] = True  # create_app() loads the catalog, engine and templates before serving
+    app.config['WARM_UP_PATHS'] = ('/', '/login', '/signup')  # Public pages rendered (and cached) by warm-up
+    app.config['WARM_UP_RETRY_INTERVAL'] = 5.0  # Seconds between background retries of a failed warm-up
+
+def setup_logging(app):
+    """(Re)configure logging, which is process-wide, from an app's config"""
+    configure_logging(level=app.config['LOG_LEVEL'], levels=app.config['LOG_LEVELS'],
+                      log_file=app.config['LOG_FILE'], structured=app.config['LOG_JSON'],
+                      debug_per_second=app.config['LOG_DEBUG_RATE_LIMIT'])
+
+def setup_sessions(app):
+    """Configure where session data lives; server-side stores keep only an id in the cookie"""
+    store = make_session_store(app.config['SESSION_BACKEND'], app.config['SESSION_SQLITE_PATH'])
+    if store is None:
+        app.session_interface = SecureCookieSessionInterface()
+    else:
+        app.session_interface = ServerSessionInterface(
+            store, sweep_interval=app.config['SESSION_SWEEP_INTERVAL'])
+
+def setup_template_caches(app):
+    """Configure the Jinja bytecode cache and the {% cache %} fragment cache"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.bytecode_cache = bytecode_cache(app.config['TEMPLATE_BYTECODE_CACHE_DIR'])
+    size = app.config['FRAGMENT_CACHE_SIZE']
+    app.jinja_env.fragment_cache = FragmentCache(size) if size else None
+    app.jinja_env.fragment_cache_version = lambda: fragment_cache_version()  # Defined below
+
+# Every route, hook and CLI command; create_app() registers them on each app it builds
+views = Blueprint('main', __name__, cli_group=None)
+
+RECOMMENDATIONS_LIMIT = 3  # Majors shown on the recommendations page
+PROFILE_RECOMMENDATIONS_LIMIT = 5  # Saved majors shown on the profile page
+
+def get_static_files():
+    """Get the static file server for the app's static folder"""
+    static_files = current_app.extensions.get('static_files')
+    if static_files is None:
+        static_files = StaticFiles(current_app.static_folder,
+                                   max_age=current_app.config['STATIC_MAX_AGE'],
+                                   immutable_max_age=current_app.config['STATIC_IMMUTABLE_MAX_AGE'])
+        current_app.extensions['static_files'] = static_files
+    return static_files
+
+def static(filename):
+    return get_static_files().send(filename, request.args.get('v'), request.accept_encodings)
+
+@views.app_url_defaults
+def add_static_fingerprint(endpoint, values):
+    """Version static URLs by content so browsers and proxies can cache them for good"""
+    if endpoint == 'static' and 'v' not in values:
+        static_files = get_static_files()
+        built = static_files.resolve(values.get('filename', ''))
+        if built:
+            values['filename'] = built  # Hashed name; no query string needed
+            return
+        fingerprint = static_files.fingerprint(values.get('filename', ''))
+        if fingerprint:
+            values['v'] = fingerprint
+
+@views.app_template_global()
+def asset_urls(bundle):
+    """URLs that load an asset bundle: the built file, or its sources before a build"""
+    if get_static_files().resolve(bundle):
+        return [url_for('static', filename=bundle)]
+    urls = []
+    for source in ASSET_BUNDLES[bundle]:
+        if os.path.exists(os.path.join(current_app.static_folder, source)):
+            urls.append(url_for('static', filename=source))
+        elif source in VENDOR_FILES:
+            urls.append(VENDOR_FILES[source])  # Not vendored yet: python assets.py --fetch
+    return urls
+
+@views.app_template_global()
+def asset_version():
+    """Changes with every asset build; key fragments that embed built asset URLs on it"""
+    return get_static_files().manifest_version
+
+@views.app_template_global()
+def responsive_image(filename, width, alt='', **attrs):
+    """An <img> for a static image shown `width` CSS pixels wide, offering its built
+    1x/2x variants through srcset (WebP first, via <picture>) when there are any"""
+    static_files = get_static_files()
+
+    def candidates(ext):
+        return [(url_for('static', filename=name), density)
+                for density in IMAGE_DENSITIES
+                for name in [variant_name(filename, width * density, ext)]
+                if static_files.resolve(name)]
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'dev'  # Change this to a secure key in production
-app.config['DATABASE'] = 'recruitmentbuddy.db'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
+    def srcset(urls):
+        return ', '.join(f'{url} {density}x' for url, density in urls)
 
-# Add debug logging for static files
-@app.route('/static/<path:filename>')
-def serve_static(filename):
-    print(f"Serving static file: {filename}")
-    return send_from_directory('static', filename)
+    attributes = Markup('').join(Markup(' {}="{}"').format(name, value)
+                                 for name, value in attrs.items())
+    fallback = candidates(None)
+    if not fallback:
+        return Markup('<img src="{}" alt="{}"{}>').format(
+            url_for('static', filename=filename), alt, attributes)
+    img = Markup('<img src="{}" srcset="{}" alt="{}"{}>').format(
+        fallback[0][0], srcset(fallback), alt, attributes)
+    webp = candidates('.webp')
+    if not webp:
+        return img
+    return Markup('<picture><source type="image/webp" srcset="{}">{}</picture>').format(
+        srcset(webp), img)
+
+def get_db_pool():
+    """Get the connection pool for the configured database"""
+    if current_app.config['STORAGE_BACKEND'] != 'sqlite':
+        return get_repositories().backend.pool
+    pool = current_app.extensions.get('db_pool')
+    if pool is None or pool.path != current_app.config['DATABASE']:
+        if pool is not None:
+            pool.close()
+        pool = ConnectionPool(current_app.config['DATABASE'],
+                              size=current_app.config['DB_POOL_SIZE'],
+                              timeout=current_app.config['DB_POOL_TIMEOUT'],
+                              pragmas=current_app.config['DB_PRAGMAS'],
+                              cached_statements=current_app.config['DB_STATEMENT_CACHE_SIZE'])
+        if current_app.config['DB_AUTO_MIGRATE']:
+            conn = pool.acquire()
+            try:
+                migrate(conn)
+            finally:
+                pool.release(conn)
+        current_app.extensions['db_pool'] = pool
+    return pool
 
 def get_db():
-    """Get database connection, storing it in g object"""
+    """Get a pooled database connection, storing it in g object"""
     if 'db' not in g:
-        try:
-            db_path = Path(app.config['DATABASE']).resolve()
-            print(f"Connecting to database at: {db_path}")
-            g.db = sqlite3.connect(str(db_path))
-            g.db.row_factory = sqlite3.Row
-            print("Database connection successful")
-        except Exception as e:
-            print(f"Database connection error: {e}")
-            raise
+        g.db_pool = get_db_pool()
+        g.db = g.db_pool.acquire()
     return g.db
 
-@app.teardown_appcontext
-def close_db(error):
-    """Close database connection at the end of request"""
+def get_repositories():
+    """Repositories for the STORAGE_BACKEND database; pass them the connection from get_db()"""
+    kind = current_app.config['STORAGE_BACKEND']
+    repositories = current_app.extensions.get('repositories')
+    if kind == 'sqlite':
+        pool = get_db_pool()
+        if repositories is None or repositories.backend.pool is not pool:
+            repositories = Repositories(SQLiteBackend(pool))
+    elif kind == 'pyodbc':
+        url = current_app.config['DATABASE_URL']
+        if repositories is None or repositories.backend.pool.path != url:
+            if repositories is not None and isinstance(repositories.backend, PyodbcBackend):
+                repositories.backend.close()
+            repositories = Repositories(PyodbcBackend(url, size=current_app.config['DB_POOL_SIZE'],
+                                                      timeout=current_app.config['DB_POOL_TIMEOUT']))
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND {kind!r}; choose from {', '.join(STORAGE_BACKENDS)}")
+    current_app.extensions['repositories'] = repositories
+    return repositories
+
+def release_db():
+    """Return the request's connection to the pool early; get_db() checks out another if needed"""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        g.pop('db_pool').release(db)
 
-def init_db():
-    """Initialize database with schema"""
+def close_db(error):
+    """Return the database connection to the pool at the end of request"""
+    release_db()
+
+@views.app_errorhandler(PoolTimeout)
+def handle_pool_timeout(error):
+    logger.error("Database pool exhausted: %s", get_db_pool().stats())
+    return jsonify({'status': 'error', 'message': 'Server busy, please retry'}), 503
+
+def init_db(app):
+    """Initialize the app's database with schema"""
     if not Path(app.config['DATABASE']).exists():
         with app.app_context():
             db = get_db()
             with app.open_resource('schema.sql', mode='r') as f:
                 db.cursor().executescript(f.read())
             db.commit()
+            migrate(db)
 
-def login_required(f):
+def get_password_hasher():
+    """Get the shared password hasher, rebuilt if its configuration changed"""
+    settings = (current_app.config['PASSWORD_HASH_METHOD'], current_app.config['PASSWORD_HASH_WORKERS'],
+                current_app.config['PASSWORD_HASH_MAX_PENDING'])
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None or (hasher.method, hasher.workers, hasher.max_pending) != settings:
+        if hasher is not None:
+            hasher.shutdown()
+        hasher = PasswordHasher(method=settings[0], workers=settings[1], max_pending=settings[2])
+        current_app.extensions['password_hasher'] = hasher
+    return hasher
+
+@views.app_errorhandler(PasswordHasherBusy)
+def handle_password_hasher_busy(error):
+    logger.warning("Shedding request to %s: %s", request.path, error)
+    flash('We are experiencing heavy traffic. Please try again in a moment.', 'error')
+    if request.endpoint == 'main.update_profile':
+        return redirect(url_for('main.profile'))
+    return redirect(request.path)
+
+def admin_required(f):
+    """Require the ADMIN_API_TOKEN as a bearer token"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Please log in to access this page.', 'error')
-            return redirect(url_for('login'))
+        token = current_app.config['ADMIN_API_TOKEN']
+        if not token:
+            return jsonify({'status': 'error', 'message': 'Admin API is disabled'}), 404
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
         return f(*args, **kwargs)
     return decorated_function
 
-def validate_questionnaire_input(data):
-    """Validate questionnaire input data"""
+def login_redirect():
+    """Redirect to the login page when nobody is logged in, else None"""
+    if 'user_id' not in session:
+        flash('Please log in to access this page.', 'error')
+        return redirect(url_for('main.login'))
+    return None
+
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        return login_redirect() or f(*args, **kwargs)
+    return decorated_function
+
+def get_response_cache():
+    """Get the shared page cache, or None when RESPONSE_CACHE_SIZE is 0"""
+    if not current_app.config['RESPONSE_CACHE_SIZE']:
+        return None
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        cache = ResponseCache(current_app.config['RESPONSE_CACHE_SIZE'])
+        current_app.extensions['response_cache'] = cache
+    return cache
+
+def cached_page(*arg_names, version=None):
+    """Cache a GET view's HTML per endpoint, the named query args and login state.
+
+    `version`, if given, is called for a value that changes whenever the page
+    content does. Skipped while flash messages are pending (they are rendered
+    into the page) and while templates auto-reload in development.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache = get_response_cache()
+            if (cache is None or request.method != 'GET' or '_flashes' in session
+                    or current_app.jinja_env.auto_reload):
+                return f(*args, **kwargs)
+            key = (request.endpoint, tuple(request.args.get(name) for name in arg_names),
+                   'user_id' in session, get_static_files().manifest_version,
+                   version() if version is not None else None)
+            page = cache.get(key)
+            if page is None:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or '_flashes' in session:
+                    return response
+                page = page_from_response(response)
+                cache.put(key, page)
+            return page_response(page, request)
+        return decorated_function
+    return decorator
+
+def get_catalog_page_cache():
+    """Get the shared catalog API page cache, or None when API_PAGE_CACHE_SIZE is 0"""
+    if not current_app.config['API_PAGE_CACHE_SIZE']:
+        return None
+    cache = current_app.extensions.get('catalog_page_cache')
+    if cache is None:
+        cache = CatalogPageCache(current_app.config['API_PAGE_CACHE_SIZE'])
+        current_app.extensions['catalog_page_cache'] = cache
+    return cache
+
+@views.app_errorhandler(ApiQueryError)
+def handle_api_query_error(error):
+    return jsonify({'status': 'error', 'message': str(error)}), 400
+
+def catalog_etag(name, version):
+    """ETag of catalog data at `version`; an untracked (None) version has none"""
+    return None if version is None else f'{name}-{version}'
+
+def cached_catalog_page(name, version, key):
+    """(cache or None, cache key, cached CatalogPage or None) for catalog data"""
+    cache = get_catalog_page_cache() if version is not None else None
+    key = (name, version) + key
+    return cache, key, cache.get(key) if cache is not None else None
+
+def catalog_json_response(page, etag):
+    """The JSON response for a CatalogPage, or an empty 304 when `page` is None"""
+    if page is None:
+        response = Response(status=304)
+    else:
+        response = Response(page.body, mimetype='application/json')
+        if page.next_cursor is not None:
+            args = dict(request.args.items(), after=page.next_cursor)
+            next_url = url_for(request.endpoint, **request.view_args, **args)
+            response.headers['Link'] = f'<{next_url}>; rel="next"'
+    if etag is not None:
+        response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def catalog_response(name, version, key, build, optional=False):
+    """Conditional JSON response for catalog data, cached as bytes per `version`.
+
+    `build` returns a CatalogPage, or None when there is nothing to serve (then
+    so does this), and only runs on a cache miss. While the version is
+    unchanged, a client sending the ETag back gets an empty 304: before any
+    lookup for pages, which always exist, but only once an `optional` item is
+    known to exist, so a missing one is still reported as missing.
+    An untracked (None) version is neither cached nor tagged.
+    """
+    etag = catalog_etag(name, version)
+    not_modified = etag is not None and request.if_none_match.contains(etag)
+    if not_modified and not optional:
+        return catalog_json_response(None, etag)
+    cache, key, page = cached_catalog_page(name, version, key)
+    if page is None:
+        page = build()
+        if page is None:
+            return None
+        if cache is not None:
+            cache.put(key, page)
+    return catalog_json_response(None if not_modified else page, etag)
+
+def catalog_page_args(columns):
+    """(fields, after, limit) from the request's fields, after and limit parameters"""
+    fields = parse_fields(request.args.get('fields'), columns)
+    after, limit = parse_page_args(request.args, current_app.config['API_PAGE_SIZE'],
+                                   current_app.config['API_MAX_PAGE_SIZE'])
+    return fields, after, limit
+
+def catalog_page_response(table, version, columns):
+    """A page of `table` for the request's after, limit and fields parameters"""
+    fields, after, limit = catalog_page_args(columns)
+    return catalog_response(table, version, ('page', fields, after, limit),
+                            lambda: fetch_page(get_db(), table, fields, columns, after, limit,
+                                               get_repositories().catalog))
+
+def get_question_bank():
+    """Get the question bank, reloading it when the questions or dimensions change"""
+    if 'question_bank' in g:
+        return g.question_bank
+    db = get_db()
+    version = get_question_bank_version(db)
+    bank = current_app.extensions.get('question_bank')
+    if bank is None or bank.source != current_app.config['DATABASE'] or bank.version != version:
+        bank = QuestionBank.from_db(db, source=current_app.config['DATABASE'], version=version)
+        current_app.extensions['question_bank'] = bank
+    g.question_bank = bank
+    return bank
+
+def validate_questionnaire_input(data, bank=None):
+    """Validate questionnaire input data against `bank` (the app's question bank by default)"""
+    if bank is None:
+        # Outside a request there is no database to read the bank from
+        bank = (get_question_bank() if has_app_context()
+                else QuestionBank(DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS))
     try:
-        required_fields = ['analytical', 'creative', 'social', 'practical']
-        for field in required_fields:
-            if field not in data:
-                logger.error(f"Missing required field: {field}")
-                return False
-            value = float(data[field])
-            if value < 1 or value > 10:
-                logger.error(f"Invalid value for {field}: {value}")
-                return False
+        bank.answers(data)
         return True
-    except (TypeError, ValueError) as e:
-        logger.error(f"Error validating questionnaire input: {str(e)}")
-        logger.error(f"Received data: {data}")
+    except (AttributeError, ValueError) as e:
+        logger.error("Error validating questionnaire input: %s", e)
+        logger.error("Received data: %s", data)
         return False
 
+def get_dimension_scores(answers):
+    """{dimension: 1-10 score} for a complete set of questionnaire answers"""
+    bank = get_question_bank()
+    return bank.score_dict(bank.answers(answers))
+
 def get_personality_type(scores):
-    """Calculate personality type based on scores"""
+    """Personality type of the strongest dimension for a set of questionnaire answers"""
     try:
-        # Simple mapping based on highest score
-        max_score = max(scores.items(), key=lambda x: x[1])
-        
-        # Map dimension to personality type
-        type_mapping = {
-            'analytical': 'INTJ',  # Architect
-            'creative': 'ENFP',    # Innovator
-            'social': 'ESFJ',      # Counselor
-            'practical': 'ISTJ'    # Craftsman
-        }
-        
-        return type_mapping[max_score[0]]
+        bank = get_question_bank()
+        return bank.personality_code(bank.scores(bank.answers(scores)))
     except Exception as e:
-        logger.error(f"Error calculating personality type: {str(e)}")
-        logger.error(f"Scores: {scores}")
+        logger.error("Error calculating personality type: %s", e)
+        logger.error("Scores: %s", scores)
         return 'INTJ'  # Default to INTJ if there's an error
 
+def get_personality_type_registry():
+    """Get the in-memory personality type registry for the current database"""
+    registry = current_app.extensions.get('personality_types')
+    if registry is None or registry.source != current_app.config['DATABASE']:
+        registry = PersonalityTypeRegistry(source=current_app.config['DATABASE'],
+                                           catalog=get_repositories().catalog)
+        registry.load(get_db())
+        current_app.extensions['personality_types'] = registry
+    return registry
+
 def get_personality_type_id(type_code):
     """Get or create a personality type record."""
     try:
-        db = get_db()
-        cursor = db.cursor()
-        
-        # Try to get existing type
-        cursor.execute('SELECT id FROM personality_types WHERE code = ?', (type_code,))
-        result = cursor.fetchone()
-        
-        if result:
-            return result['id']
-        else:
-            # Create new type with basic info
-            cursor.execute('''
-                INSERT INTO personality_types (code, name, description)
-                VALUES (?, ?, ?)
-            ''', (type_code, f"Type {type_code}", "Personality type description"))
-            db.commit()
-            return cursor.lastrowid
+        return get_personality_type_registry().get_or_create(
+            get_db(), type_code, f"Type {type_code}", "Personality type description")
     except Exception as e:
-        logger.error(f"Error getting/creating personality type: {str(e)}")
+        logger.error("Error getting/creating personality type: %s", e)
         raise
 
-def calculate_major_matches(scores, personality_type_id=None):
-    """Calculate match scores for all majors based on questionnaire scores and personality."""
+def observe_catalog_version(version):
+    g.catalog_version = version
+    current_app.extensions['catalog_watcher'].observe(current_app.config['DATABASE'], version)
+
+def current_catalog_version():
+    """Catalog version for this request, notifying subscribers when it has changed"""
+    if 'catalog_version' not in g:
+        observe_catalog_version(get_catalog_version(get_db()))
+    return g.catalog_version
+
+def fragment_cache_version():
+    """Catalog version for fragment cache keys without a query on every render.
+
+    Uses the version this request already read, else the last one any
+    request observed; only before the first of those is the database read.
+    """
+    if 'catalog_version' in g:
+        return g.catalog_version
+    version = current_app.extensions['catalog_watcher'].last_seen(current_app.config['DATABASE'])
+    return version if version is not None else current_catalog_version()
+
+def drop_match_engine(source, version):
+    current_app.extensions.pop('match_engine', None)
+
+def clear_catalog_page_cache(source, version):
+    cache = current_app.extensions.get('catalog_page_cache')
+    if cache is not None:
+        cache.clear()
+
+def clear_recommendation_cache(source, version):
+    cache = current_app.extensions.get('recommendation_cache')
+    if cache is not None:
+        cache.clear()
+
+def clear_fragment_cache(source, version):
+    cache = current_app.jinja_env.fragment_cache
+    if cache is not None:
+        cache.clear()
+
+# Subscribed to each app's CatalogWatcher; called while that app is current
+CATALOG_SUBSCRIBERS = (drop_match_engine, clear_catalog_page_cache, clear_recommendation_cache,
+                       clear_fragment_cache)
+
+def get_match_engine():
+    """Get the shared match engine, reloading the majors matrix when the catalog changes"""
+    if 'match_engine' in g:
+        return g.match_engine
     db = get_db()
-    majors = db.execute('SELECT * FROM majors').fetchall()
-    
-    # Convert scores to 0-1 scale
-    scaler = MinMaxScaler()
-    score_values = np.array([[
-        scores['analytical_score'],
-        scores['creative_score'],
-        scores['social_score'],
-        scores['technical_score']
-    ]])
-    normalized_scores = scaler.fit_transform(score_values)[0]
-    
-    matches = []
-    for major in majors:
-        # Calculate match percentage for each dimension
-        analytical_match = 1 - abs(normalized_scores[0] - major['analytical_weight'])
-        creative_match = 1 - abs(normalized_scores[1] - major['creative_weight'])
-        social_match = 1 - abs(normalized_scores[2] - major['social_weight'])
-        technical_match = 1 - abs(normalized_scores[3] - major['technical_weight'])
-        
-        # Get personality match if available
-        personality_match = 0.5  # Default to neutral
-        if personality_type_id:
-            personality_match_data = db.execute('''
-                SELECT match_strength 
-                FROM major_personality_matches 
-                WHERE major_id = ? AND personality_type_id = ?
-            ''', (major['id'], personality_type_id)).fetchone()
-            
-            if personality_match_data:
-                personality_match = personality_match_data['match_strength']
-        
-        # Calculate overall match score (weighted average)
-        match_score = (
-            (analytical_match + creative_match + social_match + technical_match) / 4 * 0.7 +  # Skills weight
-            personality_match * 0.3  # Personality weight
-        )
-        
-        matches.append({
-            'major_id': major['id'],
-            'name': major['name'],
-            'description': major['description'],
-            'career_opportunities': major['career_opportunities'],
-            'required_skills': major['required_skills'],
-            'match_score': match_score,
-            'analytical_match': analytical_match,
-            'creative_match': creative_match,
-            'social_match': social_match,
-            'technical_match': technical_match,
-            'personality_match': personality_match
-        })
-    
-    # Sort matches by score in descending order
-    matches.sort(key=lambda x: x['match_score'], reverse=True)
+    version = current_catalog_version()
+    dimensions = get_question_bank().dimensions
+    engine = current_app.extensions.get('match_engine')
+    if (engine is None or engine.source != current_app.config['DATABASE']
+            or version is None or engine.version != version or engine.dimensions != dimensions):
+        engine = MatchEngine.from_db(db, source=current_app.config['DATABASE'], version=version,
+                                     dimensions=dimensions, catalog=get_repositories().catalog,
+                                     index_min_majors=current_app.config['MATCH_INDEX_MIN_MAJORS'])
+        current_app.extensions['match_engine'] = engine
+    g.match_engine = engine
+    return engine
+
+def calculate_major_matches(scores, personality_type_id=None, limit=None):
+    """Calculate match scores for all majors based on dimension scores and personality.
+
+    Returns the best `limit` matches (all majors if None), sorted by score.
+    """
+    engine = get_match_engine()
+    personality = engine.personality_vector(personality_type_id)
+    return engine.top_k(user_vector(scores, engine.dimensions), k=limit, personality=personality,
+                        personality_key=personality_type_id)
+
+def get_recommendation_cache():
+    """Get the shared recommendation cache"""
+    cache = current_app.extensions.get('recommendation_cache')
+    if cache is None:
+        cache = RecommendationCache(current_app.config['RECOMMENDATION_CACHE_SIZE'])
+        current_app.extensions['recommendation_cache'] = cache
+    return cache
+
+def cached_major_matches(scores, personality_type_id=None, limit=None):
+    """calculate_major_matches, memoized for answers on the 1-10 slider grid.
+
+    The returned list may be shared with other requests; do not modify it.
+    """
+    engine = get_match_engine()
+    quantized = quantize(scores, engine.dimensions)
+    if quantized is None or engine.version is None:
+        return calculate_major_matches(scores, personality_type_id, limit)
+    key = (engine.source, engine.version, personality_type_id, quantized, limit)
+    cache = get_recommendation_cache()
+    matches = cache.get(key)
+    if matches is None:
+        matches = calculate_major_matches(scores, personality_type_id, limit)
+        cache.put(key, matches)
     return matches
 
-@app.route('/')
+def persisted_recommendations_limit():
+    """How many recommendations to save per submission (None saves every major)"""
+    return current_app.config['RECOMMENDATIONS_PERSIST_TOP_K'] or None
+
+def warm_recommendation_cache():
+    """Precompute recommendations for every possible set of questionnaire answers"""
+    bank = get_question_bank()
+    inputs = 10 ** len(bank)
+    if 2 * inputs > current_app.config['RECOMMENDATION_CACHE_SIZE']:
+        logger.warning("Not warming the recommendation cache: %s possible answer sets "
+                       "for %s questions would not fit", inputs, len(bank))
+        return
+    for values in grid_inputs(len(bank)):
+        answers = dict(zip(bank.fields, values))
+        scores = get_dimension_scores(answers)
+        personality_type_id = get_personality_type_id(get_personality_type(answers))
+        cached_major_matches(scores, personality_type_id, persisted_recommendations_limit())
+        cached_major_matches(scores, limit=RECOMMENDATIONS_LIMIT)
+    logger.info("Recommendation cache warmed: %s", get_recommendation_cache().stats())
+
+@views.route('/')
+@cached_page()
 def index():
     return render_template('index.html')
 
-@app.route('/questionnaire', methods=['GET'])
+@views.route('/questionnaire', methods=['GET'])
 @login_required
+@cached_page('step', version=lambda: get_question_bank().version)
 def questionnaire():
-    step = request.args.get('step', 1, type=int)
-    total_steps = 4  # Total number of questions
-    
-    # Define questions for each step
-    questions = {
-        1: {
-            'text': 'How much do you enjoy solving complex problems and analyzing data?',
-            'field': 'analytical',
-            'progress': 25
-        },
-        2: {
-            'text': 'How much do you enjoy expressing yourself creatively and thinking outside the box?',
-            'field': 'creative',
-            'progress': 50
-        },
-        3: {
-            'text': 'How much do you enjoy working with and helping others?',
-            'field': 'social',
-            'progress': 75
-        },
-        4: {
-            'text': 'How much do you enjoy hands-on work and practical problem-solving?',
-            'field': 'practical',
-            'progress': 100
-        }
-    }
-    
+    questions = get_question_bank().questions
+    total_steps = len(questions)
+    step = request.args.get('step', type=int)
+
+    # Every step in one response; the browser moves between them and submits once
+    if step is None and current_app.config['QUESTIONNAIRE_SINGLE_PAGE']:
+        return render_template('questionnaire.html',
+                             step=1,
+                             total_steps=total_steps,
+                             steps=list(enumerate(questions, 1)),
+                             fields=get_question_bank().fields,
+                             single_page=True)
+
     # Validate step number
+    step = step or 1
     if step < 1 or step > total_steps:
-        return redirect(url_for('questionnaire', step=1))
-    
-    return render_template('questionnaire.html', 
+        return redirect(url_for('main.questionnaire', step=1))
+
+    return render_template('questionnaire.html',
                          step=step,
                          total_steps=total_steps,
-                         question=questions[step])
+                         steps=[(step, questions[step - 1])],
+                         fields=get_question_bank().fields,
+                         single_page=False)
 
 # Store questionnaire responses in session
-@app.route('/questionnaire/next', methods=['POST'])
+@views.route('/questionnaire/next', methods=['POST'])
 @login_required
 def questionnaire_next():
     if not session.get('user_id'):
-        return jsonify({'redirect': url_for('login')})
-    
+        return jsonify({'redirect': url_for('main.login')})
+
     data = request.get_json()
     step = data.get('step')
-    
-    if not session.get('questionnaire_responses'):
-        session['questionnaire_responses'] = {}
-    
-    # Store the response for the current step
-    if step == 1:
-        session['questionnaire_responses']['analytical'] = data.get('analytical')
-        return jsonify({'redirect': url_for('questionnaire', step=2)})
-    elif step == 2:
-        session['questionnaire_responses']['creative'] = data.get('creative')
-        return jsonify({'redirect': url_for('questionnaire', step=3)})
-    elif step == 3:
-        session['questionnaire_responses']['social'] = data.get('social')
-        return jsonify({'redirect': url_for('questionnaire', step=4)})
-    elif step == 4:
-        session['questionnaire_responses']['technical'] = data.get('technical')
+    questions = get_question_bank().questions
+    if not isinstance(step, int) or step < 1 or step > len(questions):
+        return jsonify({'status': 'error', 'message': 'Invalid step'}), 400
+
+    # Store the answer for the current step, reassigning rather than mutating
+    # in place so every session backend sees the change
+    field = questions[step - 1]['field']
+    responses = dict(session.get('questionnaire_responses') or {})
+    responses[field] = data.get(field)
+    session['questionnaire_responses'] = responses
+
+    if step == len(questions):
         # Process final results
-        return jsonify({'redirect': url_for('recommendations')})
+        return jsonify({'redirect': url_for('main.recommendations')})
+    return jsonify({'redirect': url_for('main.questionnaire', step=step + 1)})
 
-@app.route('/submit_questionnaire', methods=['POST'])
+@views.route('/submit_questionnaire', methods=['POST'])
 @login_required
 def submit_questionnaire():
     try:
         data = request.get_json()
-        logger.info(f"Received questionnaire data: {data}")
+        logger.info("Received questionnaire data: %s", data)
         
         # Validate input data
         if not validate_questionnaire_input(data):
             logger.error("Invalid questionnaire data")
             return jsonify({'status': 'error', 'message': 'Invalid input data'}), 400
         
-        # Calculate personality type
+        # Dimension scores and the personality type of the strongest dimension
+        scores = get_dimension_scores(data)
         personality_type = get_personality_type(data)
-        logger.info(f"Calculated personality type: {personality_type}")
+        logger.info("Calculated personality type: %s", personality_type)
         
         # Get or create personality type record
-        db = get_db()
-        cursor = db.cursor()
-        
-        # Ensure personality type exists
-        cursor.execute('SELECT id FROM personality_types WHERE code = ?', (personality_type,))
-        type_record = cursor.fetchone()
-        if not type_record:
-            cursor.execute('''
-                INSERT INTO personality_types (code, name, description)
-                VALUES (?, ?, ?)
-            ''', (personality_type, f"{personality_type} Type", "A detailed description will be added."))
-            db.commit()
-            personality_type_id = cursor.lastrowid
-        else:
-            personality_type_id = type_record['id']
-        
-        logger.info(f"Using personality type ID: {personality_type_id}")
+        personality_type_id = get_personality_type_id(personality_type)
+        logger.info("Using personality type ID: %s", personality_type_id)
         
         # Save questionnaire response
-        cursor.execute('''
-            INSERT INTO questionnaire_responses 
-            (user_id, analytical_score, creative_score, social_score, practical_score, 
-             personality_type_id, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (
-            session['user_id'],
-            data['analytical'],
-            data['creative'],
-            data['social'],
-            data['practical'],
-            personality_type_id
-        ))
-        
-        response_id = cursor.lastrowid
-        logger.info(f"Created questionnaire response with ID: {response_id}")
-        
-        # Calculate and save major recommendations
-        scores = {
-            'analytical': data['analytical'] / 10.0,  # Convert to 0-1 scale
-            'creative': data['creative'] / 10.0,
-            'social': data['social'] / 10.0,
-            'practical': data['practical'] / 10.0
-        }
-        
-        # Get all majors
-        cursor.execute('SELECT * FROM majors')
-        majors = cursor.fetchall()
-        
-        # Calculate match scores
-        for major in majors:
-            match_score = (
-                scores['analytical'] * major['analytical_weight'] +
-                scores['creative'] * major['creative_weight'] +
-                scores['social'] * major['social_weight'] +
-                scores['practical'] * major['technical_weight']
-            ) / 4.0  # Average of all dimensions
-            
-            cursor.execute('''
-                INSERT INTO major_recommendations 
-                (response_id, major_id, match_score)
-                VALUES (?, ?, ?)
-            ''', (response_id, major['id'], match_score * 100))  # Convert to percentage
+        db = get_db()
+        repositories = get_repositories()
+        response_id = repositories.responses.create(
+            db, session['user_id'], scores, personality_type_id,
+            json.dumps({field: data[field] for field in get_question_bank().fields}))
+        logger.info("Created questionnaire response with ID: %s", response_id)
+
+        # Every dimension's score, including those without a column on the response
+        repositories.responses.save_dimension_scores(db, response_id, scores)
+
+        # Calculate and save the top major recommendations in one batch
+        matches = cached_major_matches(scores, personality_type_id, persisted_recommendations_limit())
+        repositories.recommendations.save(db, response_id, matches)
         
         db.commit()
         logger.info("Successfully saved major recommendations")
         
+        # The recommendations page reads the answers from the session
+        session['questionnaire_responses'] = {field: float(data[field])
+                                              for field in get_question_bank().fields}
+        
         # Return success with redirect to profile page
         return jsonify({
             'status': 'success',
             'message': 'Questionnaire submitted successfully!',
-            'redirect': url_for('profile')
+            'redirect': url_for('main.profile')
         })
         
     except Exception as e:
-        logger.error(f"Error submitting questionnaire: {str(e)}")
+        logger.error("Error submitting questionnaire: %s", e)
         logger.error("Traceback:", exc_info=True)
         if 'db' in locals():
             db.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/recommendations')
+@views.route('/recommendations')
 @login_required
 def recommendations():
     if not session.get('user_id'):
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     if not session.get('questionnaire_responses'):
-        return redirect(url_for('questionnaire'))
-    
-    # Get user's questionnaire responses
-    user_scores = session.get('questionnaire_responses')
-    
-    # Get all majors from the database
-    db = get_db()
-    majors_data = db.execute('''
-        SELECT m.id, m.name, m.description, m.careers, m.skills,
-               m.analytical_weight, m.creative_weight, m.social_weight, m.technical_weight
-        FROM majors m
-    ''').fetchall()
-    
-    # Calculate match percentages and prepare major data
-    majors = []
-    for major in majors_data:
-        # Calculate match percentage based on weights
-        analytical_match = 100 - abs(float(user_scores['analytical']) - (float(major['analytical_weight']) * 10))
-        creative_match = 100 - abs(float(user_scores['creative']) - (float(major['creative_weight']) * 10))
-        social_match = 100 - abs(float(user_scores['social']) - (float(major['social_weight']) * 10))
-        technical_match = 100 - abs(float(user_scores['technical']) - (float(major['technical_weight']) * 10))
-        
-        match_percentage = (analytical_match + creative_match + social_match + technical_match) / 4
-        
-        majors.append({
-            'name': major['name'],
-            'description': major['description'],
-            'careers': major['careers'].split(','),
-            'skills': major['skills'].split(','),
-            'match_percentage': round(match_percentage),
-            'weights': {
-                'analytical': float(major['analytical_weight']),
-                'creative': float(major['creative_weight']),
-                'social': float(major['social_weight']),
-                'technical': float(major['technical_weight'])
-            }
-        })
-    
-    # Sort majors by match percentage (highest first)
-    majors.sort(key=lambda x: x['match_percentage'], reverse=True)
+        return redirect(url_for('main.questionnaire'))
+
+    # Get user's dimension scores from their questionnaire answers
+    bank = get_question_bank()
+    responses = session['questionnaire_responses']
+    try:
+        user_scores = get_dimension_scores(responses)
+    except ValueError:
+        # Sessions from before the question bank hold dimension scores
+        try:
+            vector = user_vector(responses, bank.dimensions) * SCORE_SCALE
+        except (KeyError, TypeError, ValueError):
+            return redirect(url_for('main.questionnaire'))
+        user_scores = dict(zip(bank.dimensions, vector.tolist()))
     
-    # Take top 3 matches
-    top_majors = majors[:3]
+    # Score every major in one pass (or hit the cache) and keep the top matches
+    top_majors = [
+        {
+            'id': match['major_id'],
+            'name': match['name'],
+            'description': match['description'],
+            'careers': match['careers'].split(','),
+            'skills': match['skills'].split(','),
+            'match_percentage': round(match['match_score'] * 100),
+            # On the 1-10 answer scale, in dimension order, for the radar chart
+            'chart_scores': [round(match[f'{dimension}_weight'] * SCORE_SCALE, 2)
+                             for dimension in bank.dimensions]
+        }
+        for match in cached_major_matches(user_scores, limit=RECOMMENDATIONS_LIMIT)
+    ]
     
     return render_template('recommendations.html',
                          majors=top_majors,
-                         user_scores=user_scores)
+                         user_scores=[round(user_scores[dimension], 2) for dimension in bank.dimensions],
+                         dimension_labels=bank.labels)
 
-@app.route('/api/majors', methods=['GET'])
+@views.route('/api/majors', methods=['GET'])
 @login_required
 def get_majors():
     """
-    Get all majors
+    Get majors, a page at a time
     ---
+    parameters:
+      - name: after
+        in: query
+        description: Only majors with a higher id (the cursor in the previous page's Link header)
+      - name: limit
+        in: query
+        description: Page size (default API_PAGE_SIZE)
+      - name: fields
+        in: query
+        description: Comma-separated fields to return, e.g. id,name (default all)
     responses:
       200:
-        description: List of all majors
+        description: Majors ordered by id; a Link header with rel="next" points at the next page
+      304:
+        description: The catalog has not changed since the ETag in If-None-Match
+      400:
+        description: Invalid pagination or field parameters
       500:
         description: Server error
     """
     try:
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute('''
-            SELECT id, name, description, career_opportunities, 
-                   required_skills, analytical_weight, creative_weight,
-                   social_weight, technical_weight
-            FROM majors
-        ''')
-        majors = [dict(row) for row in cursor.fetchall()]
-        return jsonify(majors)
+        return catalog_page_response('majors', current_catalog_version(), MAJOR_FIELDS)
+    except ApiQueryError:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching majors: {str(e)}")
+        logger.error("Error fetching majors: %s", e)
         raise
 
-@app.route('/api/personality-types', methods=['GET'])
+@views.route('/api/majors/<int:major_id>', methods=['GET'])
+@login_required
+def get_major(major_id):
+    """
+    Get one major
+    ---
+    parameters:
+      - name: fields
+        in: query
+        description: Comma-separated fields to return (default all)
+    responses:
+      200:
+        description: The major
+      304:
+        description: The catalog has not changed since the ETag in If-None-Match
+      404:
+        description: No major with this id
+    """
+    fields = parse_fields(request.args.get('fields'), MAJOR_FIELDS)
+    response = catalog_response(
+        'majors', current_catalog_version(), ('item', fields, major_id),
+        lambda: fetch_item(get_db(), 'majors', fields, MAJOR_FIELDS, major_id,
+                           get_repositories().catalog),
+        optional=True)
+    if response is None:
+        return jsonify({'status': 'error', 'message': 'Major not found'}), 404
+    return response
+
+@views.route('/admin/catalog/majors', methods=['POST'])
+@admin_required
+def upsert_majors():
+    """
+    Insert or update majors in bulk
+    ---
+    parameters:
+      - name: majors
+        in: body
+        description: List of majors, or an object with a "majors" list
+    responses:
+      200:
+        description: Counts of inserted and updated majors and the new catalog version
+      400:
+        description: Invalid catalog data
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('majors')
+    try:
+        result = bulk_upsert_majors(get_db(), data)
+    except CatalogError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    current_app.extensions['catalog_watcher'].observe(current_app.config['DATABASE'],
+                                                      result['version'])
+    logger.info("Catalog upserted: %s", result)
+    return jsonify({'status': 'success', **result})
+
+@views.route('/admin/db-pool', methods=['GET'])
+@admin_required
+def db_pool_stats():
+    """
+    Database connection pool statistics for this worker
+    ---
+    responses:
+      200:
+        description: Pool size, open/idle/in-use connections, waits and timeouts
+    """
+    return jsonify(get_db_pool().stats())
+
+@views.cli.command('db-migrate')
+def db_migrate_command():
+    """Apply pending schema migrations to the configured database."""
+    db = get_db()
+    applied = migrate(db)
+    click.echo(f"Applied migrations: {applied or 'none'}; schema version {get_schema_version(db)}")
+
+@views.cli.command('build-assets')
+@click.option('--fetch', is_flag=True, help='Download missing vendored files first.')
+def build_assets_command(fetch):
+    """Bundle, minify, fingerprint and precompress static assets."""
+    try:
+        manifest = build_assets(current_app.static_folder, fetch=fetch)
+    except AssetError as e:
+        raise click.ClickException(str(e))
+    for name, target in sorted(manifest.items()):
+        click.echo(f"{name} -> {target}")
+
+@views.cli.command('upsert-majors')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def upsert_majors_command(path):
+    """Insert or update majors from a JSON file (a list of majors)."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    try:
+        result = bulk_upsert_majors(get_db(), data)
+    except CatalogError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Inserted {result['inserted']}, updated {result['updated']} majors; "
+               f"catalog version {result['version']}")
+
+@views.route('/api/personality-types', methods=['GET'])
 @login_required
 def get_personality_types():
     """
-    Get all personality types
+    Get personality types, a page at a time
     ---
+    parameters:
+      - name: after
+        in: query
+        description: Only types with a higher id (the cursor in the previous page's Link header)
+      - name: limit
+        in: query
+        description: Page size (default API_PAGE_SIZE)
+      - name: fields
+        in: query
+        description: Comma-separated fields to return, e.g. id,code (default all)
     responses:
       200:
-        description: List of all personality types
+        description: Personality types ordered by id; a Link header with rel="next" points at the next page
+      304:
+        description: The catalog has not changed since the ETag in If-None-Match
+      400:
+        description: Invalid pagination or field parameters
       500:
         description: Server error
     """
     try:
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute('SELECT * FROM personality_types')
-        types = [dict(row) for row in cursor.fetchall()]
-        return jsonify(types)
+        return catalog_page_response('personality_types', get_personality_types_version(get_db()),
+                                     PERSONALITY_TYPE_FIELDS)
+    except ApiQueryError:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching personality types: {str(e)}")
+        logger.error("Error fetching personality types: %s", e)
         raise
 
-@app.route('/login', methods=['GET', 'POST'])
+@views.route('/api/match/batch', methods=['POST'])
+@login_required
+def match_batch():
+    """
+    Score many students' questionnaire scores without saving anything
+    ---
+    parameters:
+      - name: k
+        in: query
+        description: Number of majors to return per student (default 5)
+    consumes:
+      - application/json
+      - application/x-ndjson
+    produces:
+      - application/x-ndjson
+    responses:
+      200:
+        description: One line per input row with its top-k majors, or an error
+      400:
+        description: Invalid k
+      413:
+        description: Body larger than BATCH_MATCH_MAX_BODY_SIZE
+    """
+    k = request.args.get('k', 5, type=int)
+    if k < 1 or k > current_app.config['BATCH_MATCH_MAX_K']:
+        return jsonify({'status': 'error', 'message': 'Invalid k'}), 400
+
+    engine = get_match_engine()
+    release_db()  # Scoring only needs the engine; don't hold a connection for the whole stream
+    # Rows are parsed as they arrive, so the body gets its own limit instead of MAX_CONTENT_LENGTH
+    stream = get_input_stream(request.environ,
+                              max_content_length=current_app.config['BATCH_MATCH_MAX_BODY_SIZE'])
+    if request.mimetype == 'application/x-ndjson':
+        rows = iter_ndjson(stream)
+    else:
+        rows = iter_json_array(stream)
+    lines = score_rows(engine, rows, k, chunk_size=current_app.config['BATCH_MATCH_CHUNK_SIZE'])
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+# users.email is UNIQUE, so this is one index seek however many accounts exist
+@views.route('/login', methods=['GET', 'POST'])
+@cached_page()
 def login():
-    # Check if user is already logged in
     if 'user_id' in session:
-        print("\n=== Already Logged In ===")
-        print(f"User ID in session: {session['user_id']}")
-        return redirect(url_for('questionnaire'))
-        
+        return redirect(url_for('main.questionnaire'))
+
     if request.method == 'POST':
-        print("\n=== Login Form Data ===")
-        print("Form data received:", dict(request.form))
-        print("Raw form data:", request.get_data(as_text=True))
-        
         email = request.form['email'].strip()
         password = request.form['password']
-        error = None
-        
-        print(f"\n=== Login Attempt ===")
-        print(f"Email provided: '{email}'")
-        print(f"Email length: {len(email)}")
-        print(f"Email characters (ASCII): {[ord(c) for c in email]}")
-        
+
         try:
-            # Direct database connection for debugging
-            print("\nTrying direct database connection...")
-            import sqlite3
-            db_path = 'recruitmentbuddy.db'
-            print(f"Database path: {db_path}")
-            print(f"Database exists: {os.path.exists(db_path)}")
-            
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Check if database has the users table
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            print("\nAll database tables:")
-            for table in tables:
-                print(f"- {table['name']}")
-                # Show schema for each table
-                cursor.execute(f"PRAGMA table_info({table['name']})")
-                columns = cursor.fetchall()
-                for col in columns:
-                    print(f"  * {col['name']} ({col['type']})")
-            
-            # Get all users
-            cursor.execute('SELECT * FROM users')
-            all_users = cursor.fetchall()
-            print("\nAll users in database:")
-            for u in all_users:
-                print(f"- ID: {u['id']}, Email: '{u['email']}', Name: {u['first_name']} {u['last_name']}")
-            
-            # Try to find our user
-            cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-            user = cursor.fetchone()
-            
-            if user:
-                print(f"\nUser found:")
-                print(f"- ID: {user['id']}")
-                print(f"- Email: '{user['email']}'")
-                print(f"- Name: {user['first_name']} {user['last_name']}")
-                
-                if check_password_hash(user['password'], password):
-                    print("\n=== Login Successful ===")
-                    session.clear()
-                    session['user_id'] = user['id']
-                    print(f"Set user_id in session to: {session['user_id']}")
-                    flash('Successfully logged in!', 'success')
-                    conn.close()
-                    print("Redirecting to questionnaire...")
-                    return redirect(url_for('questionnaire'))
-                else:
-                    error = 'Incorrect password.'
-                    print(f"\nLogin failed: {error}")
-            else:
+            db = get_db()
+            if random.random() < current_app.config['LOGIN_DIAGNOSTICS_SAMPLE_RATE']:
+                logger.info("Login diagnostics: %s", login_diagnostics(db))
+
+            # Single lookup on the unique email index
+            users = get_repositories().users
+            user = users.credentials(db, email)
+            # Hashing runs in a worker process, but this thread waits for it
+            hasher = get_password_hasher()
+            if user is None:
                 error = 'Invalid email address.'
-                print(f"\nLogin failed: {error}")
-            
-            conn.close()
+            elif not hasher.verify(user['password'], password):
+                error = 'Incorrect password.'
+            else:
+                if hasher.needs_rehash(user['password']):
+                    # Upgrade hashes made with outdated parameters while we know the password
+                    users.set_password(db, user['id'], hasher.hash(password))
+                    db.commit()
+                session.clear()
+                session['user_id'] = user['id']
+                flash('Successfully logged in!', 'success')
+                return redirect(url_for('main.questionnaire'))
+
+            logger.info("Login failed: %s", error)
             flash(error, 'error')
             return render_template('login.html', error=error)
-            
+
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
-            print(f"\nLogin error: {str(e)}")
-            print("Exception type:", type(e))
-            import traceback
-            print("Traceback:", traceback.format_exc())
+            logger.exception("Login error: %s", e)
             flash('An error occurred during login.', 'error')
             return render_template('login.html', error='Server error')
 
     return render_template('login.html')
 
-@app.route('/signup', methods=['GET', 'POST'])
+@views.route('/signup', methods=['GET', 'POST'])
+@cached_page()
 def signup():
     if request.method == 'POST':
         first_name = request.form['first_name']
@@ -569,6 +1030,7 @@ def signup():
         confirm_password = request.form['confirm_password']
         error = None
         db = get_db()
+        users = get_repositories().users
 
         if not first_name:
             error = 'First name is required.'
@@ -580,80 +1042,57 @@ def signup():
             error = 'Password is required.'
         elif password != confirm_password:
             error = 'Passwords do not match.'
-        elif db.execute(
-            'SELECT id FROM users WHERE email = ?', (email,)
-        ).fetchone() is not None:
+        elif users.email_exists(db, email):
             error = f'Email {email} is already registered.'
 
         if error is None:
-            db.execute(
-                'INSERT INTO users (first_name, last_name, email, password) VALUES (?, ?, ?, ?)',
-                (first_name, last_name, email, generate_password_hash(password))
-            )
+            user_id = users.create(db, first_name, last_name, email,
+                                   get_password_hasher().hash(password))
             db.commit()
             # Log the user in automatically after signup
-            user = db.execute(
-                'SELECT * FROM users WHERE email = ?', (email,)
-            ).fetchone()
             session.clear()
-            session['user_id'] = user['id']
+            session['user_id'] = user_id
             flash('Account created successfully! Welcome to RecruitmentBuddy!', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
         flash(error, 'error')
         return render_template('signup.html', error=error)
 
     return render_template('signup.html')
 
-@app.route('/logout')
+@views.route('/logout')
 def logout():
     session.clear()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/forgot-password')
+@views.route('/forgot-password')
 def forgot_password():
     # TODO: Implement password reset functionality
     return "Password reset functionality coming soon!"
 
-@app.route('/profile')
+@views.route('/profile')
 @login_required
 def profile():
     # Get user data
     db = get_db()
-    cursor = db.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],))
-    user = cursor.fetchone()
+    repositories = get_repositories()
+    user = repositories.users.get(db, session['user_id'])
 
     # Get user's questionnaire responses
-    cursor.execute('''
-        SELECT q.*, p.code as personality_type, p.name as personality_name, p.description as personality_description
-        FROM questionnaire_responses q
-        LEFT JOIN personality_types p ON q.personality_type_id = p.id
-        WHERE q.user_id = ?
-        ORDER BY q.timestamp DESC
-        LIMIT 1
-    ''', (session['user_id'],))
-    latest_response = cursor.fetchone()
+    latest_response = repositories.responses.latest(db, session['user_id'])
 
     # Get recommended majors if they exist
     recommended_majors = []
     if latest_response:
-        cursor.execute('''
-            SELECT m.*, mr.match_score
-            FROM major_recommendations mr
-            JOIN majors m ON mr.major_id = m.id
-            WHERE mr.response_id = ?
-            ORDER BY mr.match_score DESC
-            LIMIT 5
-        ''', (latest_response['id'],))
-        recommended_majors = cursor.fetchall()
+        recommended_majors = repositories.recommendations.top(db, latest_response['id'],
+                                                              PROFILE_RECOMMENDATIONS_LIMIT)
 
     return render_template('profile.html', 
                          user=user, 
                          latest_response=latest_response,
                          recommended_majors=recommended_majors)
 
-@app.route('/profile/update', methods=['POST'])
+@views.route('/profile/update', methods=['POST'])
 @login_required
 def update_profile():
     try:
@@ -664,51 +1103,215 @@ def update_profile():
         new_password = request.form.get('new_password')
         
         db = get_db()
-        cursor = db.cursor()
+        users = get_repositories().users
         
         # Verify current password if provided
         if current_password:
-            cursor.execute('SELECT password FROM users WHERE id = ?', (session['user_id'],))
-            stored_password = cursor.fetchone()['password']
-            if not check_password_hash(stored_password, current_password):
+            stored_password = users.password(db, session['user_id'])
+            if not get_password_hasher().verify(stored_password, current_password):
                 flash('Current password is incorrect', 'error')
-                return redirect(url_for('profile'))
+                return redirect(url_for('main.profile'))
         
         # Update user information
-        if new_password:
-            cursor.execute('''
-                UPDATE users 
-                SET first_name = ?, last_name = ?, email = ?, password = ?
-                WHERE id = ?
-            ''', (first_name, last_name, email, 
-                 generate_password_hash(new_password), session['user_id']))
-        else:
-            cursor.execute('''
-                UPDATE users 
-                SET first_name = ?, last_name = ?, email = ?
-                WHERE id = ?
-            ''', (first_name, last_name, email, session['user_id']))
+        users.update(db, session['user_id'], first_name, last_name, email,
+                     get_password_hasher().hash(new_password) if new_password else None)
         
         db.commit()
         flash('Profile updated successfully', 'success')
         
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         db.rollback()
         flash('Error updating profile', 'error')
-        print(f"Error updating profile: {str(e)}")
+        logger.error("Error updating profile: %s", e)
     
-    return redirect(url_for('profile'))
-
-# Add session debugging
-@app.before_request
-def debug_session():
-    print("\n=== Session Debug ===")
-    print("Session data:", dict(session))
-    print("Request path:", request.path)
-    print("Request method:", request.method)
-    if request.method == 'POST':
-        print("Form data:", dict(request.form))
+    return redirect(url_for('main.profile'))
+
+@views.before_app_request
+def log_request():
+    # Skip building the dicts entirely unless request debugging is switched on
+    if request_logger.isEnabledFor(logging.DEBUG):
+        request_logger.debug("%s %s session=%s form=%s", request.method, request.path,
+                             dict(session), dict(request.form) if request.method == 'POST' else {})
+
+def warm_up(app):
+    """Load what the first requests would otherwise load lazily.
+
+    Opens (and migrates) the database pool, loads the question bank, catalog,
+    match engine and personality types, compiles every template and renders
+    the WARM_UP_PATHS pages into the page cache. Returns False if another
+    thread is already warming the app up or loading failed; /readyz reports
+    ready once it has returned True.
+    """
+    lock = app.extensions['warm_up_lock']
+    if not lock.acquire(blocking=False):
+        return False
+    try:
+        start = time.perf_counter()
+        with app.app_context():
+            current_catalog_version()
+            get_question_bank()
+            get_match_engine()
+            get_personality_type_registry()
+            get_static_files().manifest  # Reads the build manifest once
+            get_catalog_page_cache()
+            if app.config['RECOMMENDATION_CACHE_PRECOMPUTE']:
+                warm_recommendation_cache()
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+        client = app.test_client()
+        for path in app.config['WARM_UP_PATHS']:
+            client.get(path)
+        app.extensions['warmed_up'] = True
+        logger.info("Warm-up finished in %.2fs", time.perf_counter() - start)
+        return True
+    except Exception as e:
+        logger.error("Warm-up failed: %s", e, exc_info=True)
+        return False
+    finally:
+        lock.release()
+
+def retry_warm_up(app):
+    """Retry warm_up() on a background thread until it succeeds (or WARM_UP is switched off)"""
+    thread = app.extensions.get('warm_up_thread')
+    if thread is not None and thread.is_alive():
+        return thread
+
+    def retry():
+        while app.config['WARM_UP'] and not app.extensions.get('warmed_up'):
+            time.sleep(app.config['WARM_UP_RETRY_INTERVAL'])
+            warm_up(app)
+
+    thread = threading.Thread(target=retry, name='warm-up', daemon=True)
+    app.extensions['warm_up_thread'] = thread
+    thread.start()
+    return thread
+
+_apps = weakref.WeakSet()  # Every app create_app() has built in this process
+_after_fork = {'registered': False, 'pending': False, 'lock': threading.Lock()}
+_inherited_from_parent = []  # Objects from before fork(); kept referenced so the child never closes them
+
+def after_fork_in_child():
+    """Drop what a forked child cannot share with its parent, opening nothing.
+
+    SQLite connections must not cross fork() and threads do not survive it,
+    so pools and executors are recreated on first use. The log listener and
+    a warm-up that had not finished are restarted by the child's first
+    request (see reopen_after_fork), so a child that never serves one, e.g. a
+    multiprocessing worker, starts no threads and opens no files. Everything
+    loaded by warm_up() stays shared.
+    """
+    for app in list(_apps):
+        for name in ('db_pool', 'repositories', 'password_hasher'):
+            inherited = app.extensions.pop(name, None)
+            if inherited is not None:
+                _inherited_from_parent.append(inherited)
+        if isinstance(app.session_interface, ServerSessionInterface):
+            _inherited_from_parent.append(app.session_interface.store.after_fork())
+        app.extensions.pop('warm_up_thread', None)
+        app.extensions['warm_up_lock'] = threading.Lock()  # The parent's may have been held
+    _after_fork.update(pending=True, lock=threading.Lock())
+
+@views.before_app_request
+def reopen_after_fork():
+    """Restart what after_fork_in_child() left stopped, once per forked worker"""
+    if not _after_fork['pending']:
+        return
+    with _after_fork['lock']:
+        if not _after_fork['pending']:
+            return
+        if logging_configured():
+            discard_logging()
+            setup_logging(current_app)
+        for app in list(_apps):
+            if app.config['WARM_UP'] and not app.extensions.get('warmed_up'):
+                retry_warm_up(app)
+        _after_fork['pending'] = False
+
+def create_app(config=None):
+    """Build an app from the default settings plus `config`, and warm it up unless WARM_UP is off.
+
+    All setup happens here, none at import: logging, the session store, the
+    template caches and the fork hook. If warm-up fails it is retried in the
+    background while /readyz reports 503.
+
+    Pre-fork servers that build the app in the master (e.g. gunicorn
+    --preload 'app:create_app()') share everything warm-up loaded with their
+    workers copy-on-write; each worker reopens its own connections.
+    """
+    app = Flask(__name__)
+    default_config(app)
+    app.config.update(config or {})
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, app.config)
+    app.view_functions['static'] = static
+    app.teardown_appcontext(close_db)
+    app.register_blueprint(views)
+    catalog_watcher = CatalogWatcher()
+    for callback in CATALOG_SUBSCRIBERS:
+        catalog_watcher.subscribe(callback)
+    app.extensions['catalog_watcher'] = catalog_watcher
+    app.extensions['warm_up_lock'] = threading.Lock()
+    setup_logging(app)
+    setup_sessions(app)
+    setup_template_caches(app)
+
+    _apps.add(app)
+    if not _after_fork['registered']:
+        os.register_at_fork(after_in_child=after_fork_in_child)
+        _after_fork['registered'] = True
+
+    app.extensions['warmed_up'] = False
+    if app.config['WARM_UP'] and not warm_up(app):
+        retry_warm_up(app)
+    return app
+
+def asgi_adapter(app):
+    """`app` behind the ASGI adapter, sized from its config.
+
+    No adapter-wide body limit: the app applies MAX_CONTENT_LENGTH, or the
+    batch route's own limit, as each body is read.
+    """
+    return AsgiAdapter(app, workers=app.config['ASGI_WORKERS'],
+                       send_buffer=app.config['ASGI_SEND_BUFFER'],
+                       body_buffer=app.config['ASGI_BODY_BUFFER'])
+
+def create_asgi_app(config=None):
+    """create_app() behind the ASGI adapter, e.g. uvicorn --factory app:create_asgi_app"""
+    return asgi_adapter(create_app(config))
+
+_default_app_lock = threading.Lock()
+
+def __getattr__(name):
+    """`app` and `asgi_app` for entry points that look up a module attribute
+    (flask run, gunicorn app:app, uvicorn app:asgi_app and the scripts).
+
+    The factory builds them on first use, with warm-up off, and they are then
+    kept; importing this module sets nothing up.
+    """
+    if name not in ('app', 'asgi_app'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _default_app_lock:
+        if name not in globals():
+            if 'app' not in globals():
+                globals()['app'] = create_app({'WARM_UP': False})
+            if name == 'asgi_app':
+                globals()['asgi_app'] = asgi_adapter(globals()['app'])
+        return globals()[name]
+
+@views.route('/healthz')
+def healthz():
+    """Liveness: the process is serving requests"""
+    return jsonify({'status': 'ok'})
+
+@views.route('/readyz')
+def readyz():
+    """Readiness: warm-up has finished, or is switched off"""
+    if current_app.extensions.get('warmed_up', True) or not current_app.config['WARM_UP']:
+        return jsonify({'status': 'ready'})
+    return jsonify({'status': 'warming up'}), 503
 
 if __name__ == '__main__':
-    init_db()
+    app = create_app({'WARM_UP': False})  # The database may not exist yet
+    init_db(app)
     app.run(debug=True)
@@ -0,0 +1,286 @@
+"""Serve the WSGI app from an ASGI server.
+
+The adapter reads the start of each request body and writes responses on
+the event loop, so a slow client uploading a form or downloading a page
+costs a coroutine rather than a thread. A body larger than `body_buffer` is
+not held in memory: the app pulls the rest from `receive()` as it reads
+wsgi.input. That is the only gain: the views themselves are ordinary
+synchronous Flask views, each running on one of the bounded worker threads
+for its whole duration, database calls included. Run it with any ASGI
+server, e.g.
+
+    uvicorn app:asgi_app
+"""
+import asyncio
+import collections
+import io
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+
+logger = logging.getLogger(__name__)
+
+
+def build_environ(scope, stream, length=None):
+    """WSGI environ for an ASGI http scope and its body stream.
+
+    `length` is the size of a body that has been read completely; without it
+    the app reads the stream to EOF.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': stream,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    if length is not None:
+        environ['CONTENT_LENGTH'] = str(length)  # The body is complete, even if it came chunked
+    else:
+        environ['wsgi.input_terminated'] = True
+    return environ
+
+
+class _ClientGone(Exception):
+    pass
+
+
+class RequestBody(io.RawIOBase):
+    """The raw wsgi.input of a request whose body may still be arriving.
+
+    Serves the chunks already read on the event loop, then waits on the
+    worker thread for each further `receive()` message as the app reads.
+    More than `limit` bytes in total raise RequestEntityTooLarge.
+    """
+
+    def __init__(self, chunks, more, receive, loop, limit=None):
+        self._chunks = collections.deque(chunk for chunk in chunks if chunk)
+        self._more = more
+        self._receive = receive
+        self._loop = loop
+        self._limit = limit
+        self._size = sum(len(chunk) for chunk in self._chunks)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunks:
+            if not self._more:
+                return 0
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._more = False
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            self._more = message.get('more_body', False)
+            self._size += len(chunk)
+            if self._limit is not None and self._size > self._limit:
+                self._more = False
+                raise RequestEntityTooLarge()
+            if chunk:
+                self._chunks.append(chunk)
+        chunk = self._chunks.popleft()
+        size = min(len(buffer), len(chunk))
+        buffer[:size] = chunk[:size]
+        if size < len(chunk):
+            self._chunks.appendleft(chunk[size:])
+        return size
+
+
+class AsgiAdapter:
+    """ASGI application wrapping a WSGI app.
+
+    At most `workers` requests run inside the app at once; any number may be
+    uploading or downloading. Up to `body_buffer` bytes of each request body
+    are read before the app is called, so small uploads never hold a worker;
+    the app streams the rest of a larger body as it reads. Up to
+    `send_buffer` response chunks queue ahead of a slow client before the
+    worker waits for it. A body declared or buffered over `max_body_size`
+    bytes is refused with a 413 before reaching a worker; one that grows past
+    it while streaming raises RequestEntityTooLarge in the app.
+    """
+
+    def __init__(self, wsgi_app, workers=32, max_body_size=None, send_buffer=16,
+                 body_buffer=64 * 1024):
+        self.wsgi_app = wsgi_app
+        self.workers = workers
+        self.max_body_size = max_body_size
+        self.send_buffer = send_buffer
+        self.body_buffer = body_buffer
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='asgi')
+        return self._executor
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.close)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, scope, receive):
+        """(wsgi.input, length) with up to body_buffer bytes read ahead, or None
+        once the body exceeds max_body_size. length is None while the body is
+        still arriving."""
+        limit = self.max_body_size
+        for name, value in scope.get('headers', []):
+            if name.lower() == b'content-length' and limit is not None:
+                try:
+                    if int(value) > limit:
+                        return None
+                except ValueError:
+                    pass
+        chunks = []
+        size = 0
+        more = True
+        while more and size < self.body_buffer:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise _ClientGone()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit is not None and size > limit:
+                return None
+            chunks.append(chunk)
+            more = message.get('more_body', False)
+        raw = RequestBody(chunks, more, receive, asyncio.get_running_loop(), limit)
+        return io.BufferedReader(raw), None if more else size
+
+    async def handle_http(self, scope, receive, send):
+        try:
+            body = await self.read_body(scope, receive)
+        except _ClientGone:
+            return
+        if body is None:
+            await send({'type': 'http.response.start', 'status': 413,
+                        'headers': [(b'content-type', b'text/plain'), (b'connection', b'close')]})
+            await send({'type': 'http.response.body', 'body': b'Request body too large'})
+            return
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.send_buffer)
+        gone = threading.Event()
+        worker = loop.run_in_executor(self.executor, self._run_app, scope, *body, loop, queue, gone)
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == 'start':
+                    await send(payload)
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+                elif kind == 'end':
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                else:  # 'error' before anything was sent
+                    await send({'type': 'http.response.start', 'status': 500,
+                                'headers': [(b'content-type', b'text/plain')]})
+                    await send({'type': 'http.response.body', 'body': b'Internal Server Error'})
+                    break
+        except OSError:
+            logger.debug('Client disconnected during the response')
+        finally:
+            gone.set()  # Stops the app's iteration if the response was cut short
+        await worker
+
+    def _run_app(self, scope, stream, length, loop, queue, gone):
+        """Call the WSGI app on a worker thread, queueing the response for the loop"""
+        def put(item):
+            if gone.is_set():
+                return
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while not gone.is_set():
+                try:
+                    return future.result(timeout=1.0)
+                except FutureTimeout:
+                    continue
+            future.cancel()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return write
+
+        def write(data):
+            """The legacy write() callable: data goes out ahead of the returned iterable"""
+            if data:
+                send_start()
+                put(('body', data))
+
+        def send_start():
+            if not response.get('sent'):
+                response['sent'] = True
+                put(('start', {'type': 'http.response.start', 'status': response['status'],
+                               'headers': response['headers']}))
+
+        try:
+            result = self.wsgi_app(build_environ(scope, stream, length), start_response)
+            try:
+                for chunk in result:
+                    if gone.is_set():
+                        break
+                    if chunk:
+                        send_start()
+                        put(('body', chunk))
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            send_start()
+            put(('end', None))
+        except Exception:
+            logger.exception('Unhandled error in the WSGI app')
+            put(('end', None) if response.get('sent') else ('error', None))
@@ -0,0 +1,330 @@
+"""Front-end asset build: vendored libraries, bundles, image variants, content hashes, precompression.
+
+Each bundle concatenates vendored third-party files and our own sources from
+static/src into static/dist/<name>.<hash>.<ext>, with .gz (and .br when the
+brotli package is installed) siblings. static/dist/manifest.json maps bundle
+names to the built files; static_files.StaticFiles reads it to resolve
+url_for('static', ...) and to serve the precompressed variants.
+
+Images listed in IMAGES get resized 1x/2x variants in WebP and their original
+format (named like images/mascot-160w.webp in the manifest) when Pillow is
+installed; templates pick them up through the responsive_image helper.
+
+Usage: python assets.py [--fetch]   (--fetch downloads missing vendor files)
+"""
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import posixpath
+import re
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:  # .br files are skipped without it
+    brotli = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Image variants are skipped without it
+    Image = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# Vendored files (relative to static/) and the pinned upstream they are fetched from
+VENDOR_FILES = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+    'vendor/chart.js/chart.umd.js':
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+}
+
+# Bundle name -> source files (relative to static/), in load order
+BUNDLES = {
+    'css/site.css': [
+        'vendor/bootstrap/bootstrap.min.css',
+        'vendor/bootstrap-icons/bootstrap-icons.css',
+        'src/css/site.css',
+    ],
+    'js/site.js': [
+        'vendor/bootstrap/bootstrap.bundle.min.js',
+        'src/js/site.js',
+    ],
+    'js/recommendations.js': [
+        'vendor/chart.js/chart.umd.js',
+        'src/js/recommendations.js',
+    ],
+}
+
+# Source image (relative to static/) -> CSS pixel widths it is displayed at.
+# Each width gets a 1x and a 2x variant, up to the source's own width.
+IMAGES = {
+    'images/mascot.jpg': (50, 80, 200),
+}
+IMAGE_DENSITIES = (1, 2)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+# Text formats worth precompressing (fonts and images are compressed already)
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html')
+
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+class AssetError(Exception):
+    """Raised when a bundle or image variant cannot be built"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, data):
+    """'css/site.css' -> 'css/site.<hash>.css'"""
+    root, ext = posixpath.splitext(path)
+    return f'{root}.{content_hash(data)}{ext}'
+
+
+def variant_name(filename, pixel_width, ext=None):
+    """'images/mascot.jpg', 160, '.webp' -> 'images/mascot-160w.webp'"""
+    root, original_ext = posixpath.splitext(filename)
+    return f'{root}-{pixel_width}w{ext or original_ext}'
+
+
+def fetch_vendor_files(static_dir=STATIC_DIR, force=False):
+    """Download vendored files that are missing. Returns the paths fetched."""
+    fetched = []
+    for path, url in VENDOR_FILES.items():
+        target = os.path.join(static_dir, path)
+        if os.path.exists(target) and not force:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        write_atomic(target, data)
+        logger.info("Fetched %s -> %s", url, path)
+        fetched.append(path)
+    return fetched
+
+
+def minify_css(text):
+    """Strip comments and insignificant whitespace"""
+    if rcssmin is not None:
+        return rcssmin.cssmin(text)
+    text = _CSS_COMMENT.sub('', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """Strip comments and indentation, keeping line breaks so semicolon insertion is unchanged.
+
+    The built-in fallback understands strings and template literals but not
+    regex literals containing '//' or '/*'; install rjsmin for anything fancier.
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(text)
+    out = []
+    i, length = 0, len(text)
+    while i < length:
+        char = text[i]
+        if char in '\'"`':
+            end = i + 1
+            while end < length and text[end] != char:
+                end += 2 if text[end] == '\\' else 1
+            out.append(text[i:end + 1])
+            i = end + 1
+        elif text.startswith('//', i):
+            i = text.find('\n', i)
+            i = length if i == -1 else i
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+        elif char.isspace():
+            end = i
+            while end < length and text[end].isspace():
+                end += 1
+            out.append('\n' if '\n' in text[i:end] else ' ')
+            i = end
+        else:
+            out.append(char)
+            i += 1
+    lines = (line.strip() for line in ''.join(out).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def _rewrite_css_urls(text, source, static_dir, outputs):
+    """Point relative url()s at hashed copies in dist/media, relative to dist/css"""
+    def replace(match):
+        url = match.group(2).strip()
+        if re.match(r'^(?:[a-z][a-z0-9+.-]*:|/|#)', url, re.IGNORECASE):
+            return match.group(0)  # data:, absolute and fragment URLs are left alone
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source),
+                                                 re.split(r'[?#]', url, 1)[0]))
+        suffix = url[len(re.split(r'[?#]', url, 1)[0]):]
+        try:
+            with open(os.path.join(static_dir, path), 'rb') as f:
+                data = f.read()
+        except OSError:
+            raise AssetError(f'{source} references missing file {path}')
+        target = posixpath.join(DIST_DIR, 'media', hashed_name(posixpath.basename(path), data))
+        outputs[target] = data
+        # Drop the upstream cache-busting query; the hash is in the name now
+        suffix = suffix if suffix.startswith('#') else ''
+        return f'url("{posixpath.relpath(target, posixpath.join(DIST_DIR, "css"))}{suffix}")'
+    return _CSS_URL.sub(replace, text)
+
+
+def build_bundle(name, static_dir, outputs):
+    """Concatenate and minify one bundle. Returns its content."""
+    parts = []
+    for source in BUNDLES[name]:
+        try:
+            with open(os.path.join(static_dir, source), encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            hint = ' (run with --fetch)' if source in VENDOR_FILES else ''
+            raise AssetError(f'Bundle {name}: missing source {source}{hint}')
+        if name.endswith('.css'):
+            text = _rewrite_css_urls(text, source, static_dir, outputs)
+            parts.append(text if '.min.' in source else minify_css(text))
+        else:
+            parts.append(text if source in VENDOR_FILES else minify_js(text))
+    # ';' guards against a source that ends without a semicolon
+    return ('\n' if name.endswith('.css') else ';\n').join(parts).encode('utf-8')
+
+
+def _encode_image(image, ext):
+    buffer = io.BytesIO()
+    if ext == '.webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    elif ext in ('.jpg', '.jpeg'):
+        image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True,
+                                  progressive=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def build_images(static_dir, outputs, manifest):
+    """Add resized WebP and original-format variants of each image in IMAGES"""
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping responsive image variants")
+        return
+    for source, widths in IMAGES.items():
+        try:
+            with Image.open(os.path.join(static_dir, source)) as original:
+                original = ImageOps.exif_transpose(original)
+                original.load()
+        except OSError as e:
+            raise AssetError(f'Cannot read image {source}: {e}')
+        pixel_widths = sorted({width * density for width in widths
+                               for density in IMAGE_DENSITIES})
+        for pixel_width in pixel_widths:
+            if pixel_width > original.width:
+                continue  # Never upscale; the helper leaves out densities we lack
+            height = max(1, round(original.height * pixel_width / original.width))
+            resized = original.resize((pixel_width, height), Image.LANCZOS)
+            for ext in ('.webp', posixpath.splitext(source)[1].lower()):
+                name = variant_name(source, pixel_width, ext)
+                data = _encode_image(resized, ext)
+                target = posixpath.join(DIST_DIR, hashed_name(name, data))
+                outputs[target] = data
+                manifest[name] = target
+
+
+def precompress(path, data):
+    """Write .gz (and .br) siblings when they are smaller than the original"""
+    written = []
+    encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            write_atomic(path + suffix, compressed)
+            written.append(path + suffix)
+    return written
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def build(static_dir=STATIC_DIR, fetch=False):
+    """Build every bundle into static/dist and write the manifest. Returns the manifest."""
+    if fetch:
+        fetch_vendor_files(static_dir)
+    outputs = {}
+    manifest = {}
+    for name in BUNDLES:
+        data = build_bundle(name, static_dir, outputs)
+        target = posixpath.join(DIST_DIR, hashed_name(name, data))
+        outputs[target] = data
+        manifest[name] = target
+    build_images(static_dir, outputs, manifest)
+
+    # Earlier builds' files are kept so pages rendered before a deploy still load
+    for target, data in outputs.items():
+        path = os.path.join(static_dir, target)
+        if not os.path.exists(path):
+            write_atomic(path, data)
+        if target.endswith(COMPRESSIBLE_EXTENSIONS):
+            precompress(path, data)
+    write_atomic(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME),
+                 json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    logger.info("Built %s bundles: %s", len(manifest), manifest)
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """The last build's manifest, or {} when assets have not been built"""
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        manifest = build(fetch='--fetch' in sys.argv[1:])
+    except AssetError as e:
+        sys.exit(str(e))
+    for name, target in sorted(manifest.items()):
+        print(f"{name} -> {target}")
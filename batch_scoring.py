@@ -0,0 +1,187 @@
+"""Streaming batch scoring of many score vectors at once.
+
+Input rows are parsed incrementally from the request stream (a JSON array or
+NDJSON) and scored in fixed-size chunks, so memory use does not grow with the
+number of rows sent.
+"""
+import codecs
+import json
+
+import numpy as np
+
+from match_engine import DIMENSIONS, user_vector
+
+READ_SIZE = 64 * 1024
+MAX_ELEMENT_SIZE = 1024 * 1024  # Characters one JSON array element may span
+_WHITESPACE = ' \t\r\n'
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+# A decode error this close to the end of the buffer may just be a token cut
+# off by the read size; further from it, the element is malformed
+_TRUNCATION_WINDOW = len('-Infinity')
+
+
+class BatchInputError(ValueError):
+    """Raised when the request body is not a JSON array or NDJSON"""
+
+
+def iter_ndjson(stream, read_size=READ_SIZE):
+    """Yield one decoded object per non-blank line of a binary stream"""
+    buffer = b''
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield _decode(line)
+    if buffer.strip():
+        yield _decode(buffer)
+
+
+def iter_json_array(stream, read_size=READ_SIZE, max_element_size=MAX_ELEMENT_SIZE):
+    """Yield the elements of a top-level JSON array without loading it whole.
+
+    Syntax errors are raised as soon as the offending element or separator
+    is read, so a malformed body is not buffered to the end.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    expect = 'open'  # then 'first', 'element' or 'separator'
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise BatchInputError('Unexpected end of JSON array')
+            fill()
+            continue
+        char = buffer[pos]
+        if expect == 'open':
+            if char != '[':
+                raise BatchInputError('Expected a JSON array')
+            expect = 'first'
+            pos += 1
+            continue
+        if expect == 'separator':
+            if char == ']':
+                return
+            if char != ',':
+                raise BatchInputError("Expected ',' or ']' after an array element")
+            expect = 'element'
+            pos += 1
+            continue
+        if char == ']' and expect == 'first':
+            return
+        if char in ',]':
+            raise BatchInputError('Expected an array element')
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            truncated = (e.msg.startswith('Unterminated string')
+                         or len(buffer) - e.pos <= _TRUNCATION_WINDOW)
+            if eof or not truncated:
+                raise BatchInputError('Invalid JSON array element')
+            if len(buffer) - pos > max_element_size:
+                raise BatchInputError('JSON array element too large')
+            fill()
+            continue
+        if not eof and _may_continue(value, buffer, end):
+            fill()
+            continue
+        pos = end
+        expect = 'separator'
+        yield value
+
+
+def _may_continue(value, buffer, end):
+    """Whether a decoded value could be the start of a longer one, e.g. a
+    number cut off by the read size"""
+    if end == len(buffer):
+        return True
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return all(char in _NUMBER_CHARS for char in buffer[end:])
+    return False
+
+
+def _decode(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        raise BatchInputError('Invalid NDJSON line')
+
+
+def parse_row(row, dimensions=DIMENSIONS):
+    """Convert one input row to a 0-1 score vector.
+
+    Rows are either objects keyed by dimension or lists of 1-10 scores, one
+    per dimension in order.
+    """
+    if isinstance(row, list):
+        if len(row) != len(dimensions):
+            raise ValueError(f"Expected {len(dimensions)} scores")
+        row = dict(zip(dimensions, row))
+    elif not isinstance(row, dict):
+        raise ValueError('Expected an object or a list of scores')
+    vector = user_vector(row, dimensions)
+    if not np.all(np.isfinite(vector)) or np.any(vector < 0.1) or np.any(vector > 1.0):
+        raise ValueError('Scores must be between 1 and 10')
+    return vector
+
+
+def score_rows(engine, rows, k, chunk_size=1000):
+    """Yield one NDJSON line per input row with its top-k majors.
+
+    Invalid rows produce an error line instead of aborting the stream; a
+    malformed body ends the stream with a line holding only an error.
+    """
+    def flush(pending):
+        valid = [entry for entry in pending if 'vector' in entry]
+        if valid:
+            positions, match_scores = engine.top_k_batch(
+                np.vstack([entry['vector'] for entry in valid]), k)
+            for entry, row_positions, row_scores in zip(valid, positions, match_scores):
+                entry['matches'] = [
+                    {
+                        'major_id': engine.majors[position]['major_id'],
+                        'name': engine.majors[position]['name'],
+                        'match_score': round(float(score), 6)
+                    }
+                    for position, score in zip(row_positions, row_scores)
+                ]
+        for entry in pending:
+            entry.pop('vector', None)
+            yield json.dumps(entry) + '\n'
+
+    pending = []
+    try:
+        for index, row in enumerate(rows):
+            entry = {'index': index}
+            if isinstance(row, dict) and 'id' in row:
+                entry['id'] = row['id']
+            try:
+                entry['vector'] = parse_row(row, engine.dimensions)
+            except (KeyError, TypeError, ValueError) as e:
+                entry['error'] = str(e).strip('"\'')
+            pending.append(entry)
+            if len(pending) >= chunk_size:
+                yield from flush(pending)
+                pending = []
+    except BatchInputError as e:
+        yield from flush(pending)
+        yield json.dumps({'error': str(e)}) + '\n'
+        return
+    yield from flush(pending)
@@ -0,0 +1,80 @@
+"""Benchmark the KD-tree major index against the brute-force vectorized scan.
+
+Usage: python benchmark_match_index.py [--sizes 1000 100000 1000000] [--queries 200] [--k 10]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from match_engine import MatchEngine
+
+def build_catalog(db_path, size, rng):
+    """Create a database holding `size` random majors"""
+    conn = sqlite3.connect(db_path)
+    with open(Path(__file__).parent / 'schema.sql', 'r') as f:
+        conn.executescript(f.read())
+    conn.execute('DELETE FROM majors')
+    weights = rng.random((size, 4))
+    conn.executemany('''
+        INSERT INTO majors (name, description, careers, skills,
+                            analytical_weight, creative_weight, social_weight, technical_weight)
+        VALUES (?, '', '', '', ?, ?, ?, ?)
+    ''', ((f'Major {i}', *map(float, w)) for i, w in enumerate(weights)))
+    conn.commit()
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def time_queries(engine, vectors, k, personality=None, personality_key=None):
+    """Run every query and return (seconds per query, result major ids)"""
+    results = []
+    start = time.perf_counter()
+    for vector in vectors:
+        matches = engine.top_k(vector, k=k, personality=personality,
+                               personality_key=personality_key)
+        results.append([match['major_id'] for match in matches])
+    return (time.perf_counter() - start) / len(vectors), results
+
+def run(size, queries, k, rng):
+    db_fd, db_path = tempfile.mkstemp()
+    try:
+        conn = build_catalog(db_path, size, rng)
+        brute = MatchEngine.from_db(conn, index_min_majors=size + 1)
+        indexed = MatchEngine.from_db(conn, index_min_majors=0)
+        conn.close()
+
+        start = time.perf_counter()
+        indexed.index
+        build_seconds = time.perf_counter() - start
+
+        vectors = rng.integers(1, 11, size=(queries, 4)) / 10.0
+        personality = rng.random(size)
+        brute_time, brute_ids = time_queries(brute, vectors, k)
+        index_time, index_ids = time_queries(indexed, vectors, k)
+        brute_p_time, brute_p_ids = time_queries(brute, vectors, k, personality)
+        index_p_time, index_p_ids = time_queries(indexed, vectors, k, personality, 'bench')
+
+        print(f"{size:>9,}  build {build_seconds * 1000:8.1f} ms  "
+              f"brute {brute_time * 1000:8.3f} ms  index {index_time * 1000:8.3f} ms  "
+              f"speedup {brute_time / index_time:6.1f}x  "
+              f"(personality: {brute_p_time * 1000:8.3f} vs {index_p_time * 1000:8.3f} ms)  "
+              f"identical: {brute_ids == index_ids and brute_p_ids == index_p_ids}")
+    finally:
+        os.close(db_fd)
+        os.unlink(db_path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"top-{args.k} over {args.queries} queries per catalog size (time per query)")
+    for size in args.sizes:
+        run(size, args.queries, args.k, rng)
@@ -0,0 +1,238 @@
+"""Catalog (majors and personality matches) versioning and bulk updates"""
+import math
+import sqlite3
+import threading
+
+from match_engine import WEIGHT_COLUMNS
+from repositories import SQLITE_CATALOG
+
+MAJOR_TEXT_COLUMNS = ('name', 'description', 'careers', 'skills')
+MAJOR_COLUMNS = MAJOR_TEXT_COLUMNS + WEIGHT_COLUMNS
+
+
+class CatalogError(ValueError):
+    """Raised when a bulk catalog update is invalid"""
+
+
+def get_catalog_version(db):
+    """Current catalog version, bumped by triggers whenever the catalog changes.
+
+    Returns None for databases created before the catalog_version table existed.
+    """
+    return _read_version(db, 'catalog_version')
+
+
+def get_personality_types_version(db):
+    """Current personality types version, bumped by triggers on any change (None if untracked)"""
+    return _read_version(db, 'personality_types_version')
+
+
+def get_question_bank_version(db):
+    """Current question bank version, bumped by triggers on any change (None if untracked)"""
+    return _read_version(db, 'question_bank_version')
+
+
+def _read_version(db, table):
+    try:
+        row = db.execute(f'SELECT version FROM {table} WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+class CatalogWatcher:
+    """Remembers the last catalog version seen and notifies subscribers on change.
+
+    Subscribers are called with (source, version) and should drop anything
+    derived from the catalog. An unknown (None) version is reported every
+    time, since nothing can safely be cached against it.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.version = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Register a callback; usable as a decorator"""
+        self._subscribers.append(callback)
+        return callback
+
+    def last_seen(self, source):
+        """The version last observed for `source`, or None; reads no database"""
+        with self._lock:
+            return self.version if self.source == source else None
+
+    def observe(self, source, version):
+        """Record the version seen by a request, notifying subscribers if it changed"""
+        with self._lock:
+            if version is not None and (source, version) == (self.source, self.version):
+                return False
+            self.source, self.version = source, version
+        for callback in self._subscribers:
+            callback(source, version)
+        return True
+
+
+class PersonalityTypeRegistry:
+    """In-memory personality type code -> id map with race-free get-or-create"""
+
+    def __init__(self, source=None, catalog=SQLITE_CATALOG):
+        self.source = source
+        self.catalog = catalog
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def load(self, db):
+        """Load every existing personality type (the oldest row wins for duplicate codes)"""
+        with self._lock:
+            self._ids = self.catalog.personality_type_ids(db)
+
+    def get_or_create(self, db, code, name, description):
+        """Id of the personality type `code`, inserting it if it does not exist yet"""
+        type_id = self._ids.get(code)
+        if type_id is not None:
+            return type_id
+        with self._lock:
+            type_id = self._ids.get(code)
+            if type_id is None:
+                type_id = get_or_create_personality_type(db, code, name, description,
+                                                         self.catalog)
+                self._ids[code] = type_id
+        return type_id
+
+
+def get_or_create_personality_type(db, code, name, description, catalog=SQLITE_CATALOG):
+    """Select or insert a personality type under SQLite's write lock.
+
+    Outside a transaction, BEGIN IMMEDIATE takes the lock before the lookup,
+    so concurrent requests (even from other processes) cannot both insert the
+    same code, and the insert is committed. Inside the caller's transaction
+    the work goes in a savepoint instead and committing is left to the
+    caller. If the insert still hits the UNIQUE code, the row that won is
+    selected.
+    """
+    own_transaction = not db.in_transaction
+    db.execute('BEGIN IMMEDIATE' if own_transaction else 'SAVEPOINT personality_type')
+    try:
+        type_id = catalog.personality_type_id(db, code)
+        if type_id is None:
+            try:
+                type_id = catalog.create_personality_type(db, code, name, description)
+            except sqlite3.IntegrityError:
+                type_id = catalog.personality_type_id(db, code)
+                if type_id is None:
+                    raise
+        if own_transaction:
+            db.commit()
+        else:
+            db.execute('RELEASE SAVEPOINT personality_type')
+    except Exception:
+        if own_transaction:
+            db.rollback()
+        else:
+            db.execute('ROLLBACK TO SAVEPOINT personality_type')
+            db.execute('RELEASE SAVEPOINT personality_type')
+        raise
+    return type_id
+
+
+def _validate_major(major, index, type_codes):
+    if not isinstance(major, dict):
+        raise CatalogError(f"Major {index}: expected an object")
+    for column in MAJOR_TEXT_COLUMNS:
+        if not isinstance(major.get(column), str) or not major[column].strip():
+            raise CatalogError(f"Major {index}: '{column}' is required")
+    for column in WEIGHT_COLUMNS:
+        try:
+            weight = float(major[column])
+        except (KeyError, TypeError, ValueError):
+            raise CatalogError(f"Major {index}: '{column}' must be a number")
+        if weight < 0 or weight > 1:
+            raise CatalogError(f"Major {index}: '{column}' must be between 0 and 1")
+    if 'id' in major and (not isinstance(major['id'], int) or isinstance(major['id'], bool)):
+        raise CatalogError(f"Major {index}: 'id' must be an integer")
+    matches = major.get('personality_matches')
+    if matches is not None and not isinstance(matches, list):
+        raise CatalogError(f"Major {index}: 'personality_matches' must be a list")
+    for match in matches or []:
+        if not isinstance(match, dict):
+            raise CatalogError(f"Major {index}: personality matches must be objects")
+        if match.get('personality_type') not in type_codes:
+            raise CatalogError(f"Major {index}: unknown personality type: "
+                               f"{match.get('personality_type')}")
+        strength = match.get('match_strength')
+        if (not isinstance(strength, (int, float)) or isinstance(strength, bool)
+                or not math.isfinite(strength)):
+            raise CatalogError(f"Major {index}: 'match_strength' must be a number")
+        if strength < 0 or strength > 1:
+            raise CatalogError(f"Major {index}: 'match_strength' must be between 0 and 1")
+        if not isinstance(match.get('explanation', ''), (str, type(None))):
+            raise CatalogError(f"Major {index}: 'explanation' must be a string")
+
+
+def bulk_upsert_majors(db, majors):
+    """Insert or update many majors (and their personality matches) in one transaction.
+
+    Majors are matched on `id` when given, otherwise on `name`. A major's
+    optional `personality_matches` list of {personality_type, match_strength,
+    explanation} replaces all of its existing matches. Returns counts and the
+    new catalog version. Invalid input, including a write the database
+    rejects, raises CatalogError with nothing changed.
+    """
+    if not isinstance(majors, list):
+        raise CatalogError('Expected a list of majors')
+    type_ids = {row[1]: row[0] for row in db.execute('SELECT id, code FROM personality_types')}
+    for index, major in enumerate(majors):
+        _validate_major(major, index, type_ids)
+
+    existing_by_name = {row[1]: row[0] for row in db.execute('SELECT id, name FROM majors')}
+    existing_ids = set(existing_by_name.values())
+
+    inserted = updated = 0
+    try:
+        cursor = db.cursor()
+        major_ids = []
+        for major in majors:
+            values = tuple(major[column] for column in MAJOR_COLUMNS)
+            major_id = major.get('id', existing_by_name.get(major['name']))
+            if major_id in existing_ids:
+                cursor.execute(f'''
+                    UPDATE majors SET {', '.join(f'{column} = ?' for column in MAJOR_COLUMNS)}
+                    WHERE id = ?
+                ''', values + (major_id,))
+                updated += 1
+            else:
+                cursor.execute(f'''
+                    INSERT INTO majors ({', '.join(('id',) + MAJOR_COLUMNS)})
+                    VALUES ({', '.join('?' * (len(MAJOR_COLUMNS) + 1))})
+                ''', (major_id,) + values)
+                major_id = cursor.lastrowid
+                existing_ids.add(major_id)
+                inserted += 1
+            existing_by_name[major['name']] = major_id
+            major_ids.append(major_id)
+
+        replaced = [(major_id,) for major, major_id in zip(majors, major_ids)
+                    if 'personality_matches' in major]
+        matches = []
+        for major, major_id in zip(majors, major_ids):
+            for match in major.get('personality_matches') or []:
+                matches.append((major_id, type_ids[match['personality_type']],
+                                float(match['match_strength']), match.get('explanation')))
+        cursor.executemany('DELETE FROM major_personality_matches WHERE major_id = ?', replaced)
+        cursor.executemany('''
+            INSERT INTO major_personality_matches
+            (major_id, personality_type_id, match_strength, explanation)
+            VALUES (?, ?, ?, ?)
+        ''', matches)
+        db.commit()
+    except sqlite3.IntegrityError as e:
+        db.rollback()
+        raise CatalogError(f"Catalog update rejected: {e}")
+    except Exception:
+        db.rollback()
+        raise
+
+    return {'inserted': inserted, 'updated': updated, 'version': get_catalog_version(db)}
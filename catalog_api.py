@@ -0,0 +1,87 @@
+"""Keyset-paginated, field-selectable JSON for the catalog API.
+
+Pages are serialized once per catalog version and kept as bytes, so a repeat
+request skips both SQL and JSON encoding. Cursors are the last id on a page
+(`?after=<id>`), which stays cheap however deep the client pages, and every
+page of a version shares one ETag, so unchanged catalogs revalidate to a 304.
+"""
+import json
+from typing import NamedTuple, Optional
+
+from lru import LRUCache
+from match_engine import WEIGHT_COLUMNS
+from repositories import SQLITE_CATALOG
+
+# public field -> column, per collection
+MAJOR_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'career_opportunities': 'careers',
+    'required_skills': 'skills',
+    **{column: column for column in WEIGHT_COLUMNS},
+}
+PERSONALITY_TYPE_FIELDS = {
+    column: column
+    for column in ('id', 'code', 'name', 'description', 'strengths', 'weaknesses')
+}
+
+
+class ApiQueryError(ValueError):
+    """Raised for invalid pagination or field selection parameters"""
+
+
+class CatalogPage(NamedTuple):
+    body: bytes
+    next_cursor: Optional[int]
+
+
+class CatalogPageCache(LRUCache):
+    """Bounded LRU of serialized catalog pages and items"""
+
+
+def parse_fields(value, allowed):
+    """Requested fields from a comma-separated `?fields=` value, in request order"""
+    if value is None:
+        return tuple(allowed)
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if not fields or unknown:
+        raise ApiQueryError(f"Unknown fields: {', '.join(unknown) or value!r}; "
+                            f"choose from {', '.join(allowed)}")
+    return fields
+
+
+def parse_page_args(args, default_limit, max_limit):
+    """(after, limit) from `?after=` and `?limit=`"""
+    try:
+        after = int(args.get('after', 0))
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        raise ApiQueryError('after and limit must be integers')
+    if after < 0:
+        raise ApiQueryError('after must not be negative')
+    if not 1 <= limit <= max_limit:
+        raise ApiQueryError(f'limit must be between 1 and {max_limit}')
+    return after, limit
+
+
+def _selected(fields, columns):
+    # Field names come from the whitelists above, never from the client
+    return {name: columns[name] for name in fields}
+
+
+def fetch_page(db, table, fields, columns, after, limit, catalog=SQLITE_CATALOG):
+    """CatalogPage of up to `limit` rows with id > `after`, ordered by id"""
+    rows = catalog.rows(db, table, _selected(fields, columns), after, limit + 1)
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    body = json.dumps([{name: row[name] for name in fields} for row in rows[:limit]])
+    return CatalogPage(body.encode('utf-8'), next_cursor)
+
+
+def fetch_item(db, table, fields, columns, item_id, catalog=SQLITE_CATALOG):
+    """CatalogPage holding just the row with this id, or None"""
+    row = catalog.row(db, table, item_id, _selected(fields, columns))
+    if row is None:
+        return None
+    return CatalogPage(json.dumps({name: row[name] for name in fields}).encode('utf-8'), None)
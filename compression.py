@@ -0,0 +1,186 @@
+"""WSGI middleware that gzip/brotli-compresses responses by content type.
+
+Rules per content type set the minimum body size and the compression level.
+Responses that already carry a Content-Encoding (the precompressed static
+variants) pass through untouched, and bodies without a Content-Length are
+compressed as they stream, flushing after every chunk the app yields.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Only gzip is offered without it
+    brotli = None
+
+# content type -> min_size (bytes), gzip_level (1-9), br_quality (0-11)
+DEFAULT_RULES = {
+    'text/html': {'min_size': 512, 'gzip_level': 6, 'br_quality': 5},
+    'application/json': {'min_size': 1024, 'gzip_level': 6, 'br_quality': 5},
+    'application/x-ndjson': {'min_size': 1024, 'gzip_level': 4, 'br_quality': 4},
+    'text/css': {'min_size': 512, 'gzip_level': 9, 'br_quality': 9},
+    'text/javascript': {'min_size': 512, 'gzip_level': 9, 'br_quality': 9},
+    'application/javascript': {'min_size': 512, 'gzip_level': 9, 'br_quality': 9},
+    'image/svg+xml': {'min_size': 512, 'gzip_level': 9, 'br_quality': 9},
+    'text/plain': {'min_size': 512, 'gzip_level': 6, 'br_quality': 5},
+}
+
+ENCODING_SUFFIXES = ('-br', '-gzip')
+
+
+def parse_accept_encoding(header):
+    """{coding: quality} from an Accept-Encoding header"""
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+
+def choose_encoding(header):
+    """'br', 'gzip' or None for the client's Accept-Encoding"""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if codings.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, flush):
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, flush):
+        out = self._compressor.process(data)
+        return out + self._compressor.flush() if flush else out
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compresses responses from `wsgi_app` according to `config`.
+
+    `config` is read on every request, so COMPRESSION_ENABLED and
+    COMPRESSION_RULES can be changed at runtime.
+    """
+
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.config = config
+
+    def __call__(self, environ, start_response):
+        if not self.config.get('COMPRESSION_ENABLED', True):
+            return self.wsgi_app(environ, start_response)
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+        # Compressed responses get suffixed ETags; undo that so the app's own
+        # conditional handling still recognizes them, and redo it on a 304
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        revalidating = bool(encoding and if_none_match and f'-{encoding}"' in if_none_match)
+        if if_none_match:
+            environ['HTTP_IF_NONE_MATCH'] = _strip_etag_suffixes(if_none_match)
+        state = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            # Apps that start the response lazily, from inside their iterable,
+            # are passed through: the body iterator is already handed back
+            stream = None if 'returned' in state else self._plan(environ, status, headers,
+                                                                   encoding)
+            if stream is not None:
+                state['streaming'] = _header(headers, 'content-length') is None
+                headers = [(name, value) for name, value in headers
+                           if name.lower() != 'content-length']
+                headers.append(('Content-Encoding', encoding))
+                state['stream'] = stream
+            if stream is not None or (revalidating and status.startswith('304')):
+                headers = [(name, _suffix_etag(value, encoding) if name.lower() == 'etag'
+                            else value) for name, value in headers]
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        state['returned'] = True
+        if 'stream' not in state:
+            return app_iter
+        return self._compress(app_iter, state['stream'], flush=state['streaming'])
+
+    def _plan(self, environ, status, headers, encoding):
+        """Adds Vary for compressible types; returns a compressor when this body should be compressed"""
+        content_type = (_header(headers, 'content-type') or '').split(';')[0].strip().lower()
+        rule = self.config.get('COMPRESSION_RULES', DEFAULT_RULES).get(content_type)
+        if rule is None or _header(headers, 'content-encoding'):
+            return None
+        _add_vary(headers, 'Accept-Encoding')
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        if int(status.split(' ', 1)[0]) in (204, 206, 304) or _header(headers, 'content-range'):
+            return None
+        if 'no-transform' in (_header(headers, 'cache-control') or ''):
+            return None
+        length = _header(headers, 'content-length')
+        if length is not None and int(length) < rule.get('min_size', 0):
+            return None
+        if encoding == 'br':
+            return _BrotliStream(rule.get('br_quality', 5))
+        return _GzipStream(rule.get('gzip_level', 6))
+
+    def _compress(self, app_iter, stream, flush):
+        try:
+            for chunk in app_iter:
+                if chunk:
+                    data = stream.compress(chunk, flush)
+                    if data:
+                        yield data
+            yield stream.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+
+def _header(headers, name):
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _add_vary(headers, field):
+    for i, (key, value) in enumerate(headers):
+        if key.lower() == 'vary':
+            if field.lower() not in [v.strip().lower() for v in value.split(',')]:
+                headers[i] = (key, f'{value}, {field}')
+            return
+    headers.append(('Vary', field))
+
+
+def _suffix_etag(etag, encoding):
+    """'"abc"' -> '"abc-gzip"' (weak tags keep their W/ prefix)"""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def _strip_etag_suffixes(header):
+    for suffix in ENCODING_SUFFIXES:
+        header = header.replace(f'{suffix}"', '"')
+    return header
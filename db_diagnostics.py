@@ -0,0 +1,41 @@
+"""Cheap database diagnostics for sampled request logging.
+
+Everything here reads catalog metadata or a single index probe, never whole
+tables, so it is safe to run on a fraction of production requests.
+"""
+import sqlite3
+
+
+def schema_summary(conn):
+    """Map each user table to its column names, from the schema catalog"""
+    tables = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY name"
+    ).fetchall()
+    return {
+        table[0]: [column[1] for column in conn.execute(f'PRAGMA table_info("{table[0]}")')]
+        for table in tables
+    }
+
+
+def estimate_row_count(conn, table):
+    """Approximate row count: ANALYZE statistics when present, else the highest rowid"""
+    try:
+        stat = conn.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1',
+                            (table,)).fetchone()
+    except sqlite3.OperationalError:  # ANALYZE has never run
+        stat = None
+    if stat is not None and stat[0]:
+        return int(stat[0].split()[0])
+    # MAX(rowid) is a single b-tree seek; gaps from deletes make it an upper bound
+    return conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"').fetchone()[0]
+
+
+def login_diagnostics(conn, table='users'):
+    """Schema and user-count stats reported by the login diagnostics mode"""
+    schema = schema_summary(conn)
+    return {
+        'tables': {name: len(columns) for name, columns in schema.items()},
+        'user_columns': schema.get(table, []),
+        'approx_users': estimate_row_count(conn, table),
+    }
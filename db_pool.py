@@ -0,0 +1,177 @@
+"""Bounded pool of tuned SQLite connections shared across requests"""
+import queue
+import sqlite3
+import threading
+import time
+
+# Applied once to every new connection
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # Negative values are KiB: 64 MiB per connection
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Hands out at most `size` connections, reusing idle ones (most recent first).
+
+    Connections are tuned SQLite connections to `path` unless `connect` is
+    given, a callable opening any DB-API connection (pragmas are then unused).
+    `validate(conn)` is called on an idle connection before it is handed out;
+    if it raises or returns false the connection is closed and replaced, so a
+    server-side disconnect does not fail the next request.
+    """
+
+    def __init__(self, path, size=10, timeout=5.0, pragmas=None, cached_statements=256,
+                 connect=None, validate=None):
+        self.path = path
+        self.connect = connect
+        self.validate = validate
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._created = 0
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._replaced = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def _connect(self):
+        if self.connect is not None:
+            return self.connect()
+        conn = sqlite3.connect(self.path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _alive(self, conn):
+        try:
+            if self.validate(conn):
+                return True
+        except Exception:
+            pass
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._replaced += 1
+        return False
+
+    def acquire(self):
+        """Take an idle connection, open a new one, or wait for one to be released"""
+        start = time.perf_counter()
+        waited = False
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout('Connection pool is closed')
+                if self._created < self.size:
+                    self._created += 1
+                    conn = None
+                    break
+            remaining = self.timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeout(f'No database connection free after {self.timeout}s')
+            waited = True
+            try:
+                conn = self._idle.get(timeout=remaining)
+                break
+            except queue.Empty:
+                continue
+
+        if conn is not None and self.validate is not None and not self._alive(conn):
+            conn = None  # Reopened in the dead connection's slot
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        wait_time = time.perf_counter() - start
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+                self._wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+        return conn
+
+    def release(self, conn):
+        """Return a connection, discarding any uncommitted work"""
+        try:
+            if getattr(conn, 'in_transaction', True):  # Other drivers cannot tell; always roll back
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._lock:
+            self._in_use -= 1
+            closed = self._closed
+        if closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._created -= 1
+
+    def close(self):
+        """Close idle connections; connections in use are closed when released"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._created - self._in_use,
+                'acquired': self._acquired,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'replaced': self._replaced,
+                'total_wait_seconds': round(self._wait_time, 6),
+                'max_wait_seconds': round(self._max_wait_time, 6),
+            }
@@ -1,4 +1,5 @@
 from app import app, get_db
+from migrations import migrate
 import os
 
 def init_database():
@@ -22,6 +23,7 @@ def init_database():
                 db.executescript(schema)
                 db.commit()
                 print("Schema executed successfully")
+            migrate(db)
             
             # Create test user
             print("\nCreating test user...")
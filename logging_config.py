@@ -0,0 +1,189 @@
+"""Non-blocking, redacting log setup shared by the app and its scripts.
+
+Request threads only filter a record and drop it on a queue; a QueueListener
+thread renders the message, masks credential-looking fields and does the
+file and stream I/O. DEBUG records are rate limited per call site so a
+chatty debug line cannot flood the queue. Since messages are rendered later,
+log with %-style arguments and pass values that are not mutated afterwards.
+"""
+import atexit
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+REDACTED = '[REDACTED]'
+
+# Substrings of field names whose values never reach a log sink
+SECRET_WORDS = ('password', 'passwd', 'secret', 'token', 'api_key', 'authorization', 'cookie')
+
+_SECRET_PATTERN = re.compile(
+    r"""(?P<key>['"]?[\w-]*(?:""" + '|'.join(SECRET_WORDS) + r""")[\w-]*['"]?\s*[:=]\s*)"""
+    r"""(?P<value>(?:bearer|basic)\s+[^\s,;}'"]+|'[^']*'|"[^"]*"|[^\s,;}&)]+)""",
+    re.IGNORECASE,
+)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_installed = {'handler': None, 'listener': None}
+
+
+def is_secret(name):
+    name = str(name).lower()
+    return any(word in name for word in SECRET_WORDS)
+
+
+def redact(value):
+    """Mask secret fields in dicts, lists and `key=value` / `'key': value` text"""
+    if isinstance(value, dict):
+        return {key: REDACTED if is_secret(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    if isinstance(value, str) and is_secret(value):
+        return _SECRET_PATTERN.sub(lambda m: m.group('key') + REDACTED, value)
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    """Masks secrets in the rendered message before a sink writes it"""
+
+    def filter(self, record):
+        message = record.getMessage()
+        if is_secret(message):
+            record.msg = redact(message)
+            record.args = None
+        return True
+
+
+class DebugRateLimiter(logging.Filter):
+    """Lets at most `per_second` DEBUG records through per call site, in bursts of `burst`"""
+
+    def __init__(self, per_second=10.0, burst=None, clock=time.monotonic):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst if burst is not None else max(1.0, per_second)
+        self.dropped = 0
+        self._clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not self.per_second:
+            return True
+        key = (record.pathname, record.lineno)
+        now = self._clock()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.per_second)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self.dropped += 1
+                return False
+            self._buckets[key] = (tokens - 1, now)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full.
+
+    Records are queued as they are; the listener thread renders them.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record  # QueueHandler would format the message on the calling thread
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line, including any (redacted) `extra=` fields"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = REDACTED if is_secret(name) else redact(value)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level='INFO', levels=None, log_file='app.log', structured=False,
+                      debug_per_second=10.0, queue_size=10000):
+    """Route the root logger through a queue to stream (and file) handlers.
+
+    `levels` maps logger names to their own levels, e.g. {'werkzeug': 'WARNING'}.
+    Calling again replaces the previous setup. Returns the running listener.
+    """
+    stop_logging()
+    formatter = StructuredFormatter() if structured else logging.Formatter(LOG_FORMAT)
+    sinks = [logging.StreamHandler()]
+    if log_file:
+        sinks.append(logging.FileHandler(log_file))
+    for sink in sinks:
+        sink.setFormatter(formatter)
+        sink.addFilter(RedactingFilter())  # On the listener thread, with the formatting
+
+    log_queue = queue.Queue(queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(DebugRateLimiter(debug_per_second))
+    listener = QueueListener(log_queue, *sinks, respect_handler_level=True)
+    listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+    for name, logger_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(logger_level)
+    _installed.update(handler=handler, listener=listener)
+    return listener
+
+
+def logging_configured():
+    """Whether configure_logging() is in effect"""
+    return _installed['listener'] is not None
+
+
+def discard_logging():
+    """Forget a setup inherited across fork() without stopping it.
+
+    The listener thread did not survive the fork and its queue's lock may
+    have been held at that moment, so stop_logging() could block forever.
+    """
+    handler = _installed['handler']
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    _installed.update(handler=None, listener=None)
+
+
+def stop_logging():
+    """Detach the queue handler and flush everything still queued"""
+    handler, listener = _installed['handler'], _installed['listener']
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        for sink in listener.handlers:
+            sink.close()
+    _installed.update(handler=None, listener=None)
+
+
+atexit.register(stop_logging)
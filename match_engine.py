@@ -0,0 +1,259 @@
+"""Vectorized major matching shared by every scoring path in app.py"""
+import numpy as np
+
+from match_index import MatchIndex, tie_radius
+from repositories import SQLITE_CATALOG
+
+# Dimensions with a weight column on majors, in the default questionnaire order
+DIMENSIONS = ('analytical', 'creative', 'social', 'technical')
+WEIGHT_COLUMNS = tuple(f'{dimension}_weight' for dimension in DIMENSIONS)
+
+# Questionnaire sliders run from 1 to 10; weights are stored on a 0-1 scale
+SCORE_SCALE = 10.0
+
+# Weight of a major on a dimension nobody has rated it on yet
+NEUTRAL_WEIGHT = 0.5
+
+SKILLS_WEIGHT = 0.7
+PERSONALITY_WEIGHT = 0.3
+NEUTRAL_PERSONALITY_MATCH = 0.5
+
+# Below this many majors a full vectorized scan beats building a KD-tree
+DEFAULT_INDEX_MIN_MAJORS = 10000
+
+# The questionnaire calls the fourth dimension "practical", the majors table "technical"
+_FIELD_ALIASES = {
+    'analytical': ('analytical', 'analytical_score'),
+    'creative': ('creative', 'creative_score'),
+    'social': ('social', 'social_score'),
+    'technical': ('technical', 'technical_score', 'practical', 'practical_score'),
+}
+
+
+def user_vector(scores, dimensions=DIMENSIONS):
+    """Convert a dict of 1-10 dimension scores to a 0-1 numpy vector"""
+    values = []
+    for dimension in dimensions:
+        for key in _FIELD_ALIASES.get(dimension, (dimension, f'{dimension}_score')):
+            if scores.get(key) is not None:
+                values.append(float(scores[key]))
+                break
+        else:
+            raise KeyError(f"Missing score for dimension: {dimension}")
+    return np.array(values, dtype=np.float64) / SCORE_SCALE
+
+
+class MatchEngine:
+    """In-memory matrix of major weights that scores users in one array operation.
+
+    Works on any number of dimensions: `weights` is a [major x dimension]
+    matrix, read from the majors' <dimension>_weight columns when omitted.
+    """
+
+    def __init__(self, majors, source=None, version=None,
+                 index_min_majors=DEFAULT_INDEX_MIN_MAJORS, dimensions=DIMENSIONS, weights=None):
+        self.source = source
+        self.version = version
+        self.dimensions = tuple(dimensions)
+        self.index_min_majors = index_min_majors
+        self._index = None
+        self.majors = [
+            {
+                'major_id': major['id'],
+                'name': major['name'],
+                'description': major['description'],
+                'careers': major['careers'],
+                'skills': major['skills'],
+            }
+            for major in majors
+        ]
+        self.ids = np.array([major['id'] for major in majors], dtype=np.int64)
+        if weights is None:
+            weights = [[major[f'{dimension}_weight'] for dimension in self.dimensions]
+                       for major in majors]
+        self.weights = np.array(weights, dtype=np.float64).reshape(len(majors),
+                                                                   len(self.dimensions))
+        self._positions = {major_id: i for i, major_id in enumerate(self.ids.tolist())}
+        self.load_personality_matches([])
+
+    @classmethod
+    def from_db(cls, db, source=None, version=None, dimensions=DIMENSIONS,
+                catalog=SQLITE_CATALOG, **kwargs):
+        """Load every major's weights and personality matches through `catalog`,
+        the CatalogRepository of the backend `db` came from.
+
+        Dimensions with a <dimension>_weight column on majors read it; the others
+        come from major_dimension_weights, with NEUTRAL_WEIGHT where unrated.
+        """
+        majors = catalog.majors(db)
+        weights = np.full((len(majors), len(dimensions)), NEUTRAL_WEIGHT)
+        extra = {}
+        for i, dimension in enumerate(dimensions):
+            if dimension in DIMENSIONS:
+                weights[:, i] = [major[f'{dimension}_weight'] for major in majors]
+            else:
+                extra[dimension] = i
+        if extra:
+            positions = {major['id']: i for i, major in enumerate(majors)}
+            for major_id, dimension, weight in catalog.dimension_weights(db, tuple(extra)):
+                if major_id in positions:
+                    weights[positions[major_id], extra[dimension]] = weight
+        engine = cls(majors, source=source, version=version, dimensions=dimensions,
+                     weights=weights, **kwargs)
+        engine.load_personality_matches(catalog.personality_matches(db))
+        return engine
+
+    def load_personality_matches(self, matches):
+        """Build the dense [personality type x major] match strength matrix.
+
+        Only personality types with at least one recorded match get a row;
+        missing pairs default to a neutral match.
+        """
+        type_ids = sorted({match[0] for match in matches if match[0] is not None})
+        self._personality_rows = {type_id: i for i, type_id in enumerate(type_ids)}
+        self.personality = np.full((len(type_ids), len(self)), NEUTRAL_PERSONALITY_MATCH)
+        for type_id, major_id, strength in matches:
+            position = self._positions.get(major_id)
+            if position is not None and type_id is not None and strength is not None:
+                self.personality[self._personality_rows[type_id], position] = strength
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def index(self):
+        """KD-tree over the weights, built on first use for large catalogs"""
+        if self._index is None and len(self) >= max(self.index_min_majors, 1):
+            distance_cost = SKILLS_WEIGHT / len(self.dimensions)
+            self._index = MatchIndex(self.weights, PERSONALITY_WEIGHT / distance_cost)
+        return self._index
+
+    def personality_vector(self, personality_type_id):
+        """Per-major match strengths for a personality type, or None when it has no matches"""
+        row = self._personality_rows.get(personality_type_id)
+        return None if row is None else self.personality[row]
+
+    def score(self, vector, personality=None, positions=None):
+        """Score a user vector against every major (or only those at `positions`).
+
+        Returns (match_scores, dimension_matches) where dimension_matches has
+        one column per dimension.
+        """
+        weights = self.weights if positions is None else self.weights[positions]
+        dimension_matches = 1.0 - np.abs(weights - vector)
+        if personality is None:
+            personality = NEUTRAL_PERSONALITY_MATCH
+        elif positions is not None:
+            personality = personality[positions]
+        match_scores = (dimension_matches.mean(axis=1) * SKILLS_WEIGHT +
+                        personality * PERSONALITY_WEIGHT)
+        return match_scores, dimension_matches
+
+    def top_k(self, vector, k=None, personality=None, personality_key=None):
+        """Return the k best matching majors, best first (all majors if k is None).
+
+        Ties are broken by catalog position. Large catalogs answer bounded
+        queries from the KD-tree; pass `personality_key` (e.g. the personality
+        type id) so the tree built for a personality vector can be reused.
+        """
+        candidates = None
+        if k is not None and self.index is not None:
+            candidates = self.index.query(vector, k, personality, personality_key)
+        if candidates is not None:
+            # The tree's candidates include every tie at the k-th score; in
+            # catalog order, ranking them breaks ties exactly like the full scan
+            candidates = np.sort(candidates)
+        else:
+            candidates = np.arange(len(self))
+        match_scores, dimension_matches = self.score(vector, personality, candidates)
+        order = top_k_positions(match_scores, k)
+        return [
+            self._build_match(candidates[i], match_scores[i], dimension_matches[i], personality)
+            for i in order
+        ]
+
+    def top_k_batch(self, vectors, k, max_cells=4_000_000):
+        """Top-k majors for every row of `vectors` (neutral personality).
+
+        Returns (positions, match_scores), both shaped (rows, k) and ordered
+        best first, with ties broken by catalog position as in top_k. The
+        full scan works through the rows in slices so that at most
+        `max_cells` row x major scores are held at once.
+        """
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, len(self.dimensions))
+        k = max(0, min(k, len(self)))
+        if k == 0:
+            return (np.empty((len(vectors), 0), dtype=np.int64),
+                    np.empty((len(vectors), 0), dtype=np.float64))
+        if self.index is not None:
+            return self._rank_batch(vectors, self.index.query_batch(vectors, k), k)
+        step = max(1, max_cells // len(self))
+        positions = np.empty((len(vectors), k), dtype=np.int64)
+        match_scores = np.empty((len(vectors), k), dtype=np.float64)
+        for start in range(0, len(vectors), step):
+            chunk = vectors[start:start + step]
+            if k < len(self):
+                distances = np.zeros((len(chunk), len(self)))
+                for i in range(len(self.dimensions)):
+                    distances += np.abs(chunk[:, i, None] - self.weights[:, i])
+                # Everything within the k-th distance, ties included
+                kth = np.partition(distances, k - 1, axis=1)[:, k - 1]
+                within = distances <= tie_radius(kth)[:, None]
+                columns = np.nonzero(within)[1]
+                candidates = np.split(columns, np.cumsum(within.sum(axis=1))[:-1])
+            else:
+                candidates = [np.arange(len(self))] * len(chunk)
+            (positions[start:start + step],
+             match_scores[start:start + step]) = self._rank_batch(chunk, candidates, k)
+        return positions, match_scores
+
+    def _rank_batch(self, vectors, candidates, k):
+        """Exact top-k of each row's candidate positions, ordered by (-score, position)"""
+        width = max(len(row) for row in candidates)
+        positions = np.full((len(vectors), width), len(self), dtype=np.int64)  # Padding sorts last
+        for row, row_candidates in enumerate(candidates):
+            positions[row, :len(row_candidates)] = row_candidates
+        padding = positions == len(self)
+        weights = self.weights[np.where(padding, 0, positions)]
+        dimension_matches = 1.0 - np.abs(weights - vectors[:, None, :])
+        match_scores = (dimension_matches.mean(axis=2) * SKILLS_WEIGHT +
+                        NEUTRAL_PERSONALITY_MATCH * PERSONALITY_WEIGHT)
+        match_scores[padding] = -np.inf
+        # lexsort uses the last key as the primary one
+        order = np.lexsort((positions, -match_scores), axis=1)[:, :k]
+        return (np.take_along_axis(positions, order, axis=1),
+                np.take_along_axis(match_scores, order, axis=1))
+
+    def _build_match(self, position, match_score, dimension_matches, personality):
+        match = dict(self.majors[position])
+        match['match_score'] = float(match_score)
+        for i, dimension in enumerate(self.dimensions):
+            match[f'{dimension}_weight'] = float(self.weights[position, i])
+            match[f'{dimension}_match'] = float(dimension_matches[i])
+        if personality is None:
+            match['personality_match'] = NEUTRAL_PERSONALITY_MATCH
+        else:
+            match['personality_match'] = float(personality[position])
+        return match
+
+
+def top_k_positions(match_scores, k=None):
+    """Positions of the k highest scores, best first, ties broken by position.
+
+    Only the k candidates (plus any tied with the k-th) are sorted, so the
+    cost beyond one linear partition grows with k rather than with the
+    catalog size.
+    """
+    count = len(match_scores)
+    if k is None or k >= count:
+        candidates = np.arange(count)
+    elif k <= 0:
+        return np.array([], dtype=np.int64)
+    else:
+        # Every score tied with the k-th stays a candidate, so the lowest
+        # positions win the tie rather than whichever the partition kept
+        kth = -np.partition(-match_scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(match_scores >= kth)
+    # lexsort uses the last key as the primary one
+    order = np.lexsort((candidates, -match_scores[candidates]))
+    return candidates[order[:k]]
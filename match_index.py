@@ -0,0 +1,77 @@
+"""KD-tree index for sub-linear top-k major lookups.
+
+A major's skills score is 1 - mean(|user - weights|), so ranking majors by
+score is the same as ranking them by L1 distance in the weight space. The
+personality term is folded in as a fifth coordinate scaled so that the L1
+distance stays an exact, monotone transform of the full match score.
+"""
+import numpy as np
+from sklearn.neighbors import KDTree
+
+TIE_TOLERANCE = 1e-9  # Slack for distances that differ from the k-th only by rounding
+
+
+def tie_radius(distance):
+    """Search radius that keeps every major tied with one at `distance`"""
+    return distance * (1.0 + TIE_TOLERANCE) + TIE_TOLERANCE
+
+
+class MatchIndex:
+    """Nearest-major index over the weights matrix of a MatchEngine.
+
+    `personality_scale` is the personality weight divided by the score lost
+    per unit of L1 distance, so a major's fifth coordinate is
+    (1 - strength) * personality_scale and queries sit at 0 on that axis.
+    """
+
+    def __init__(self, weights, personality_scale, leaf_size=40):
+        self.weights = weights
+        self.personality_scale = personality_scale
+        self.leaf_size = leaf_size
+        self._tree = KDTree(weights, leaf_size=leaf_size, metric='manhattan')
+        self._personality_trees = {}
+
+    def _personality_tree(self, key, personality):
+        """Five-dimensional tree for one personality type, built on first use"""
+        tree = self._personality_trees.get(key)
+        if tree is None:
+            extra = (1.0 - np.asarray(personality, dtype=np.float64)) * self.personality_scale
+            points = np.column_stack((self.weights, extra))
+            tree = KDTree(points, leaf_size=self.leaf_size, metric='manhattan')
+            self._personality_trees[key] = tree
+        return tree
+
+    def query(self, vector, k, personality=None, personality_key=None):
+        """Positions of the k majors closest to `vector` under the match score.
+
+        Every major tied with the k-th is included too, so there may be more
+        than k; the tree orders ties arbitrarily, and the caller's exact
+        ranking then breaks them the same way as the full scan. A personality
+        vector is only indexed when a `personality_key` identifies it; returns
+        None when the query cannot be answered from the index.
+        """
+        k = min(k, len(self.weights))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        if personality is None:
+            tree, point = self._tree, vector
+        elif personality_key is not None:
+            tree = self._personality_tree(personality_key, personality)
+            point = np.append(vector, 0.0)
+        else:
+            return None
+        point = point.reshape(1, -1)
+        distance = tree.query(point, k=k)[0][0, -1]
+        return tree.query_radius(point, r=tie_radius(distance))[0]
+
+    def query_batch(self, vectors, k):
+        """Positions of the k closest majors for each row of `vectors`.
+
+        One array per row, holding the majors tied with the k-th as well
+        (see query()).
+        """
+        k = min(k, len(self.weights))
+        if k <= 0:
+            return [np.array([], dtype=np.int64) for _ in range(len(vectors))]
+        distances = self._tree.query(vectors, k=k)[0][:, -1]
+        return list(self._tree.query_radius(vectors, r=tie_radius(distances)))
@@ -0,0 +1,204 @@
+"""Versioned, in-place schema migrations for the SQLite database.
+
+schema.sql creates the base tables; each migration here upgrades an existing
+database by one version without touching its data. The applied version is
+kept in PRAGMA user_version.
+
+Usage: python migrations.py [database path]
+"""
+import logging
+import sqlite3
+import sys
+
+from question_bank import DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS
+
+logger = logging.getLogger(__name__)
+
+
+def version_table_sql(version_table, *tables):
+    """A one-row version table and triggers bumping it on any change to `tables`"""
+    return f'''
+CREATE TABLE IF NOT EXISTS {version_table} (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO {version_table} (id, version) VALUES (1, 1);
+''' + ''.join(
+        f'''
+CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version AFTER {event} ON {table}
+BEGIN
+    UPDATE {version_table} SET version = version + 1 WHERE id = 1;
+END;
+'''
+        for table in tables
+        for event in ('INSERT', 'UPDATE', 'DELETE')
+    )
+
+
+CATALOG_VERSION_SQL = version_table_sql('catalog_version', 'majors', 'major_personality_matches')
+
+# Kept apart from the catalog version: questionnaire submissions create types,
+# which must not invalidate everything derived from the majors
+PERSONALITY_TYPES_VERSION_SQL = version_table_sql('personality_types_version', 'personality_types')
+
+HOT_QUERY_INDEXES_SQL = '''
+-- profile: latest response for a user
+CREATE INDEX IF NOT EXISTS idx_questionnaire_responses_user_timestamp
+    ON questionnaire_responses (user_id, timestamp DESC);
+-- profile: top recommendations for a response (covers the join column too)
+CREATE INDEX IF NOT EXISTS idx_major_recommendations_response_score
+    ON major_recommendations (response_id, match_score DESC, major_id);
+-- personality match lookups by type, and replacement by major in bulk upserts
+CREATE INDEX IF NOT EXISTS idx_major_personality_matches_type_major
+    ON major_personality_matches (personality_type_id, major_id, match_strength);
+CREATE INDEX IF NOT EXISTS idx_major_personality_matches_major
+    ON major_personality_matches (major_id);
+'''
+
+QUESTION_BANK_SQL = '''
+CREATE TABLE IF NOT EXISTS dimensions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT NOT NULL UNIQUE,      -- e.g. 'analytical'; majors weight columns are <code>_weight
+    label TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    personality_code TEXT           -- personality type when this is the strongest dimension
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    position INTEGER NOT NULL,
+    field TEXT NOT NULL UNIQUE,     -- key of the answer in submitted questionnaires
+    text TEXT NOT NULL,
+    dimension_id INTEGER NOT NULL REFERENCES dimensions (id),
+    weight REAL NOT NULL DEFAULT 1.0
+);
+-- Weights (0-1) for dimensions without a column on majors
+CREATE TABLE IF NOT EXISTS major_dimension_weights (
+    major_id INTEGER NOT NULL REFERENCES majors (id),
+    dimension_id INTEGER NOT NULL REFERENCES dimensions (id),
+    weight REAL NOT NULL,
+    PRIMARY KEY (major_id, dimension_id)
+);
+-- Every dimension score of a response (questionnaire_responses has columns for four)
+CREATE TABLE IF NOT EXISTS response_dimension_scores (
+    response_id INTEGER NOT NULL REFERENCES questionnaire_responses (id),
+    dimension_id INTEGER NOT NULL REFERENCES dimensions (id),
+    score REAL NOT NULL,
+    PRIMARY KEY (response_id, dimension_id)
+);
+''' + version_table_sql('question_bank_version', 'dimensions', 'questions') + \
+    version_table_sql('catalog_version', 'major_dimension_weights')
+
+
+def question_bank_tables(conn):
+    """Question bank tables, seeded with the original four-question instrument"""
+    for statement in split_statements(QUESTION_BANK_SQL):
+        conn.execute(statement)
+    if conn.execute('SELECT 1 FROM dimensions LIMIT 1').fetchone() is not None:
+        return
+    conn.executemany(
+        'INSERT INTO dimensions (code, label, position, personality_code) VALUES (?, ?, ?, ?)',
+        [(code, label, position, personality_code)
+         for position, (code, label, personality_code) in enumerate(DEFAULT_DIMENSIONS, 1)])
+    conn.executemany('''
+        INSERT INTO questions (position, field, text, dimension_id)
+        VALUES (?, ?, ?, (SELECT id FROM dimensions WHERE code = ?))
+    ''', [(position, field, text, dimension)
+          for position, (field, dimension, text) in enumerate(DEFAULT_QUESTIONS, 1)])
+
+
+def unique_personality_type_codes(conn):
+    """Merge duplicate personality type codes into the oldest row, then enforce uniqueness"""
+    for index in conn.execute('PRAGMA index_list(personality_types)').fetchall():
+        columns = conn.execute(f'PRAGMA index_info({index[1]})').fetchall()
+        if index[2] and [column[2] for column in columns] == ['code']:
+            return
+    duplicates = conn.execute('''
+        SELECT p.id, keep.id
+        FROM personality_types p
+        JOIN (SELECT code, MIN(id) AS id FROM personality_types GROUP BY code) keep
+          ON keep.code = p.code AND keep.id != p.id
+    ''').fetchall()
+    for duplicate_id, keep_id in duplicates:
+        conn.execute('UPDATE questionnaire_responses SET personality_type_id = ? '
+                     'WHERE personality_type_id = ?', (keep_id, duplicate_id))
+        conn.execute('UPDATE major_personality_matches SET personality_type_id = ? '
+                     'WHERE personality_type_id = ?', (keep_id, duplicate_id))
+        conn.execute('DELETE FROM personality_types WHERE id = ?', (duplicate_id,))
+    conn.execute('CREATE UNIQUE INDEX idx_personality_types_code ON personality_types (code)')
+
+
+# (version, description, SQL script or callable taking the connection)
+MIGRATIONS = [
+    (1, 'catalog version table and triggers', CATALOG_VERSION_SQL),
+    (2, 'unique personality type codes', unique_personality_type_codes),
+    (3, 'indexes for hot queries', HOT_QUERY_INDEXES_SQL),
+    (4, 'personality types version table and triggers', PERSONALITY_TYPES_VERSION_SQL),
+    (5, 'question bank and per-dimension weights and scores', question_bank_tables),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def split_statements(script):
+    """Split a SQL script into complete statements (trigger bodies stay whole)"""
+    statements = []
+    current = ''
+    for line in script.splitlines(keepends=True):
+        if not current and (not line.strip() or line.strip().startswith('--')):
+            continue
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ''
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def has_base_schema(conn):
+    """Whether schema.sql has been applied to this database"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'majors'"
+    ).fetchone() is not None
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Apply pending migrations, each in its own transaction. Returns the versions applied."""
+    if not has_base_schema(conn):
+        return []
+    if conn.in_transaction:
+        conn.commit()
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version > target:
+            break
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Re-read under the write lock in case another process migrated first
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in split_statements(migration):
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info("Applied migration %s: %s", version, description)
+        applied.append(version)
+    return applied
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'recruitmentbuddy.db'
+    conn = sqlite3.connect(db_path)
+    applied = migrate(conn)
+    print(f"Applied migrations: {applied or 'none'}; schema version {get_schema_version(conn)}")
+    conn.close()
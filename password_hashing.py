@@ -0,0 +1,121 @@
+"""Password hashing and verification on a bounded process pool.
+
+Key derivation is deliberately slow, so it runs in worker processes instead
+of holding the GIL on request threads, and a cap on queued jobs sheds load
+during login storms. The request thread still blocks until its hash is done,
+so this bounds how many hashes run at once; it does not free the thread to
+serve other requests meanwhile.
+
+Workers are started by a fork server (or spawned where there is none), so
+they do not inherit the web process's threads, sockets or fork hooks. A
+worker that dies, e.g. killed for memory, breaks the whole executor; the
+hasher then replaces it and retries the job once.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+def hash_method_prefix(method):
+    """`method` as werkzeug writes it into stored hashes, with its defaults filled in"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2' and len(args) <= 2:
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Invalid hash method '{method}'")
+
+
+def worker_context():
+    """Multiprocessing context that starts workers from a clean process"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing jobs are already queued"""
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords with a configurable werkzeug method.
+
+    `workers=0` runs everything inline on the calling thread.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, salt_length=16, workers=2, max_pending=32,
+                 timeout=30.0):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.method_prefix = hash_method_prefix(method)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=worker_context())
+            return self._executor
+
+    def _replace(self, executor):
+        """Drop a broken executor; the next job starts a fresh one"""
+        with self._lock:
+            if self._executor is not executor:
+                return  # Another thread already replaced it
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, executor, function, args, kwargs):
+        if not self._pending.acquire(blocking=False):
+            raise PasswordHasherBusy(f'{self.max_pending} password hashing jobs already queued')
+        try:
+            future = executor.submit(function, *args, **kwargs)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def _run(self, function, *args, **kwargs):
+        """Run `function` in a worker process and wait for its result on this thread"""
+        if self.workers <= 0:
+            return function(*args, **kwargs)
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return self._submit(executor, function, args, kwargs).result(timeout=self.timeout)
+            except BrokenProcessPool:
+                self._replace(executor)
+                if attempt:
+                    raise
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(generate_password_hash, password, method=self.method,
+                         salt_length=self.salt_length)
+
+    def verify(self, stored_hash, password):
+        """Check a password against a stored hash of any supported method"""
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """Whether a stored hash was made with different parameters than configured"""
+        return stored_hash.split('$', 1)[0] != self.method_prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
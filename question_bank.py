@@ -0,0 +1,127 @@
+"""Questionnaire questions and scoring dimensions, loaded from the database.
+
+Each question feeds one dimension with a weight. The bank keeps a
+[question x dimension] matrix whose columns are normalized weights, so turning
+answers into dimension scores is a single matrix product however many
+questions and dimensions an instrument has.
+"""
+import sqlite3
+
+import numpy as np
+
+MIN_ANSWER = 1
+MAX_ANSWER = 10
+
+# (code, label, personality type code assigned when it is the strongest dimension)
+DEFAULT_DIMENSIONS = (
+    ('analytical', 'Analytical', 'INTJ'),  # Architect
+    ('creative', 'Creative', 'ENFP'),      # Innovator
+    ('social', 'Social', 'ESFJ'),          # Counselor
+    ('technical', 'Technical', 'ISTJ'),    # Craftsman
+)
+
+# (answer field, dimension code, text); the questionnaire asks them in this order
+DEFAULT_QUESTIONS = (
+    ('analytical', 'analytical',
+     'How much do you enjoy solving complex problems and analyzing data?'),
+    ('creative', 'creative',
+     'How much do you enjoy expressing yourself creatively and thinking outside the box?'),
+    ('social', 'social',
+     'How much do you enjoy working with and helping others?'),
+    ('practical', 'technical',
+     'How much do you enjoy hands-on work and practical problem-solving?'),
+)
+
+
+class QuestionBank:
+    """Immutable questions and dimensions with the matrix that scores answers"""
+
+    def __init__(self, dimensions, questions, source=None, version=None):
+        """`dimensions` are (code, label, personality_code) rows and `questions`
+        (field, dimension_code, text) or (field, dimension_code, text, weight) rows.
+        """
+        self.source = source
+        self.version = version
+        self.dimensions = tuple(row[0] for row in dimensions)
+        self.labels = tuple(row[1] for row in dimensions)
+        self.personality_codes = tuple(row[2] for row in dimensions)
+        positions = {code: i for i, code in enumerate(self.dimensions)}
+
+        self.questions = []
+        matrix = np.zeros((len(questions), len(self.dimensions)))
+        for i, row in enumerate(questions):
+            field, dimension, text = row[:3]
+            if dimension not in positions:
+                raise ValueError(f"Question {field!r} uses unknown dimension {dimension!r}")
+            matrix[i, positions[dimension]] = row[3] if len(row) > 3 else 1.0
+            self.questions.append({
+                'field': field,
+                'dimension': dimension,
+                'text': text,
+                'progress': round(100 * (i + 1) / len(questions)),
+            })
+        self.questions = tuple(self.questions)
+        self.fields = tuple(question['field'] for question in self.questions)
+
+        totals = matrix.sum(axis=0)
+        if len(set(self.fields)) != len(self.fields):
+            raise ValueError('Question fields must be unique')
+        if np.any(totals <= 0):
+            unasked = [code for code, total in zip(self.dimensions, totals) if total <= 0]
+            raise ValueError(f"Dimensions without questions: {', '.join(unasked)}")
+        # Each dimension's score is the weighted mean of its questions' answers
+        self.matrix = matrix / totals
+
+    @classmethod
+    def from_db(cls, db, source=None, version=None):
+        """Load the bank from the dimensions and questions tables.
+
+        Databases that predate those tables get the default instrument.
+        """
+        try:
+            dimensions = db.execute('''
+                SELECT code, label, personality_code FROM dimensions ORDER BY position, id
+            ''').fetchall()
+            questions = db.execute('''
+                SELECT q.field, d.code, q.text, q.weight
+                FROM questions q
+                JOIN dimensions d ON d.id = q.dimension_id
+                ORDER BY q.position, q.id
+            ''').fetchall()
+        except sqlite3.OperationalError:
+            return cls(DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS, source=source, version=version)
+        return cls([tuple(row) for row in dimensions], [tuple(row) for row in questions],
+                   source=source, version=version)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def answers(self, data):
+        """Answers to every question, in question order, as a float array.
+
+        Raises ValueError when an answer is missing, not a number, or off the
+        MIN_ANSWER..MAX_ANSWER scale.
+        """
+        try:
+            values = np.array([data[field] for field in self.fields], dtype=np.float64)
+        except KeyError as e:
+            raise ValueError(f"Missing answer: {e.args[0]}")
+        except (TypeError, ValueError):
+            raise ValueError('Answers must be numbers')
+        invalid = ~((values >= MIN_ANSWER) & (values <= MAX_ANSWER))
+        if invalid.any():
+            raise ValueError(f"Answers must be between {MIN_ANSWER} and {MAX_ANSWER}: "
+                             f"{', '.join(np.array(self.fields)[invalid])}")
+        return values
+
+    def scores(self, answers):
+        """Dimension scores on the answer scale; `answers` may be one row or a 2-D batch"""
+        return np.asarray(answers, dtype=np.float64) @ self.matrix
+
+    def score_dict(self, answers):
+        """{dimension code: score} for one set of answers"""
+        return dict(zip(self.dimensions, self.scores(answers).tolist()))
+
+    def personality_code(self, scores):
+        """Personality type code of the strongest dimension (the first one on ties)"""
+        return self.personality_codes[int(np.argmax(scores))]
@@ -0,0 +1,35 @@
+"""Memoized recommendation lists for the discrete questionnaire input space.
+
+Dimension scores from the default questionnaire are 1-10 sliders on four
+dimensions, so there are only 10^4 distinct inputs per personality type.
+Ranked recommendations for each input are cached under the catalog version they were computed from, so a
+catalog change can never serve a stale list.
+"""
+import itertools
+
+from lru import LRUCache
+from match_engine import DIMENSIONS, SCORE_SCALE, user_vector
+
+SLIDER_VALUES = range(1, 11)
+
+
+def quantize(scores, dimensions=DIMENSIONS):
+    """Slider values as an int tuple, or None when any score is off the 1-10 grid"""
+    values = user_vector(scores, dimensions) * SCORE_SCALE
+    quantized = tuple(int(round(value)) for value in values)
+    if any(abs(value - q) > 1e-9 or q not in SLIDER_VALUES
+           for value, q in zip(values, quantized)):
+        return None
+    return quantized
+
+
+def grid_inputs(count=len(DIMENSIONS)):
+    """Every possible set of `count` slider values"""
+    return itertools.product(SLIDER_VALUES, repeat=count)
+
+
+class RecommendationCache(LRUCache):
+    """Bounded LRU of ranked match lists.
+
+    Cached lists are shared between requests and must not be mutated.
+    """
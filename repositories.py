@@ -0,0 +1,381 @@
+"""Storage for users, the catalog, questionnaire responses and recommendations.
+
+Repositories hold the SQL; a backend supplies connections and the dialect
+differences (row limits, generated ids, bulk writes). Every repository method
+takes an open connection as its first argument and leaves committing to the
+caller, so one request can group several calls into a transaction.
+
+The app's STORAGE_BACKEND setting picks one of BACKENDS: SQLiteBackend on
+the DATABASE file, or PyodbcBackend on the DATABASE_URL connection string
+once SQLite's single writer becomes the bottleneck.
+"""
+import abc
+import functools
+from contextlib import contextmanager
+
+from db_pool import ConnectionPool
+
+try:
+    import pyodbc
+except ImportError:  # Only PyodbcBackend needs it
+    pyodbc = None
+
+LEGACY_SCORE_COLUMNS = {  # questionnaire_responses column -> dimension
+    'analytical_score': 'analytical',
+    'creative_score': 'creative',
+    'social_score': 'social',
+    'practical_score': 'technical',
+}
+
+
+BACKENDS = ('sqlite', 'pyodbc')
+CATALOG_TABLES = ('majors', 'personality_types')
+
+
+class Dialect(abc.ABC):
+    """SQL that differs between databases"""
+
+    name = None
+
+    @abc.abstractmethod
+    def limit(self, count='?'):
+        """Clause after ORDER BY returning the first `count` rows"""
+
+    @abc.abstractmethod
+    def insert(self, backend, conn, table, columns, values):
+        """Insert one row and return its generated id"""
+
+
+class SQLiteDialect(Dialect):
+    name = 'sqlite'
+
+    def limit(self, count='?'):
+        return f'LIMIT {count}'
+
+    def insert(self, backend, conn, table, columns, values):
+        cursor = backend.execute(conn, f'''
+            INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+        ''', values)
+        row_id = getattr(cursor, 'lastrowid', None)  # ODBC cursors do not have it
+        if row_id is None:
+            row_id = backend.execute(conn, 'SELECT last_insert_rowid()').fetchone()[0]
+        return row_id
+
+
+class SQLServerDialect(Dialect):
+    name = 'sqlserver'
+
+    def limit(self, count='?'):
+        return f'OFFSET 0 ROWS FETCH NEXT {count} ROWS ONLY'
+
+    def insert(self, backend, conn, table, columns, values):
+        return backend.execute(conn, f'''
+            INSERT INTO {table} ({', '.join(columns)}) OUTPUT INSERTED.id
+            VALUES ({', '.join('?' * len(columns))})
+        ''', values).fetchone()[0]
+
+
+SQLITE = SQLiteDialect()
+SQLSERVER = SQLServerDialect()
+
+
+class Backend:
+    """Pooled connections plus the dialect their SQL is written in.
+
+    `pool` may be None for repositories that are only ever handed
+    connections opened elsewhere (see SQLITE_CATALOG).
+    """
+
+    dialect = SQLITE
+
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    @contextmanager
+    def connection(self):
+        """A pooled connection, committed if the block succeeds and rolled back if not"""
+        conn = self.pool.acquire()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            self.pool.release(conn)  # Rolls back anything left uncommitted
+
+    def execute(self, conn, sql, params=()):
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor
+
+    def executemany(self, conn, sql, rows):
+        conn.cursor().executemany(sql, rows)
+
+    def close(self):
+        self.pool.close()
+
+
+class SQLiteBackend(Backend):
+    """SQLite through the app's ConnectionPool"""
+
+
+def ping(conn):
+    """Whether a pooled connection still answers"""
+    return conn.cursor().execute('SELECT 1').fetchone()[0] == 1
+
+
+class PyodbcBackend(Backend):
+    """Any ODBC database through pyodbc, with pooled connections.
+
+    Bulk writes set fast_executemany, so a batch goes to the server as one
+    parameter array instead of one round trip per row. `connect` replaces
+    pyodbc.connect(connection_string), e.g. to open a local stand-in. Idle
+    connections are pinged before reuse, as the server may have dropped them.
+    """
+
+    def __init__(self, connection_string, dialect=SQLSERVER, size=10, timeout=5.0, connect=None):
+        if connect is None:
+            if pyodbc is None:
+                raise RuntimeError('PyodbcBackend needs the pyodbc package')
+            connect = functools.partial(pyodbc.connect, connection_string, autocommit=False)
+        self.dialect = dialect
+        super().__init__(ConnectionPool(connection_string, size=size, timeout=timeout,
+                                        connect=connect, validate=ping))
+
+    def executemany(self, conn, sql, rows):
+        if not rows:
+            return  # pyodbc rejects an empty parameter list
+        cursor = conn.cursor()
+        cursor.fast_executemany = True
+        cursor.executemany(sql, rows)
+
+
+def as_dict(cursor, row):
+    """A row as {column: value}, whatever row type the driver returns"""
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def fetchone(cursor):
+    return as_dict(cursor, cursor.fetchone())
+
+
+def fetchall(cursor):
+    return [as_dict(cursor, row) for row in cursor.fetchall()]
+
+
+class Repository:
+    def __init__(self, backend):
+        self.backend = backend
+        self.dialect = backend.dialect
+
+    def execute(self, conn, sql, params=()):
+        return self.backend.execute(conn, sql, params)
+
+
+class UserRepository(Repository):
+    def get(self, conn, user_id):
+        return fetchone(self.execute(conn, 'SELECT * FROM users WHERE id = ?', (user_id,)))
+
+    def credentials(self, conn, email):
+        """{id, password} of the user with `email`, or None (one unique-index lookup)"""
+        return fetchone(self.execute(conn, 'SELECT id, password FROM users WHERE email = ?',
+                                     (email,)))
+
+    def password(self, conn, user_id):
+        row = self.execute(conn, 'SELECT password FROM users WHERE id = ?', (user_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def email_exists(self, conn, email):
+        return self.execute(conn, 'SELECT id FROM users WHERE email = ?',
+                            (email,)).fetchone() is not None
+
+    def create(self, conn, first_name, last_name, email, password_hash):
+        """Insert a user; returns the new id"""
+        return self.dialect.insert(self.backend, conn, 'users',
+                                   ('first_name', 'last_name', 'email', 'password'),
+                                   (first_name, last_name, email, password_hash))
+
+    def update(self, conn, user_id, first_name, last_name, email, password_hash=None):
+        """Update the user's details, and their password when a hash is given"""
+        if password_hash is None:
+            self.execute(conn, '''
+                UPDATE users SET first_name = ?, last_name = ?, email = ? WHERE id = ?
+            ''', (first_name, last_name, email, user_id))
+        else:
+            self.execute(conn, '''
+                UPDATE users SET first_name = ?, last_name = ?, email = ?, password = ?
+                WHERE id = ?
+            ''', (first_name, last_name, email, password_hash, user_id))
+
+    def set_password(self, conn, user_id, password_hash):
+        self.execute(conn, 'UPDATE users SET password = ? WHERE id = ?', (password_hash, user_id))
+
+
+class CatalogRepository(Repository):
+    def rows(self, conn, table, columns=None, after=0, limit=None):
+        """Rows of a catalog table with id > `after`, in id order.
+
+        `columns` maps each returned name to its column (every column when
+        None); names and tables must come from a whitelist, never a client.
+        """
+        if table not in CATALOG_TABLES:
+            raise ValueError(f"Not a catalog table: {table}")
+        sql = f'{_select(table, columns)} WHERE id > ? ORDER BY id'
+        if limit is None:
+            return fetchall(self.execute(conn, sql, (after,)))
+        return fetchall(self.execute(conn, f'{sql} {self.dialect.limit()}', (after, limit)))
+
+    def row(self, conn, table, row_id, columns=None):
+        """One row of a catalog table by id, or None"""
+        if table not in CATALOG_TABLES:
+            raise ValueError(f"Not a catalog table: {table}")
+        return fetchone(self.execute(conn, f'{_select(table, columns)} WHERE id = ?', (row_id,)))
+
+    def majors(self, conn):
+        """Every major, in id order"""
+        return self.rows(conn, 'majors')
+
+    def major(self, conn, major_id):
+        return self.row(conn, 'majors', major_id)
+
+    def dimension_weights(self, conn, codes):
+        """(major_id, dimension code, weight) rated for the given dimensions"""
+        if not codes:
+            return []
+        return self.execute(conn, f'''
+            SELECT w.major_id, d.code, w.weight
+            FROM major_dimension_weights w
+            JOIN dimensions d ON d.id = w.dimension_id
+            WHERE d.code IN ({', '.join('?' * len(codes))})
+        ''', tuple(codes)).fetchall()
+
+    def personality_matches(self, conn):
+        """(personality_type_id, major_id, match_strength) of every recorded match"""
+        return self.execute(conn, '''
+            SELECT personality_type_id, major_id, match_strength
+            FROM major_personality_matches
+        ''').fetchall()
+
+    def personality_type_ids(self, conn):
+        """{code: id}; the oldest row wins for duplicate codes"""
+        return {code: type_id for type_id, code in self.execute(
+            conn, 'SELECT id, code FROM personality_types ORDER BY id DESC').fetchall()}
+
+    def personality_type_id(self, conn, code):
+        row = self.execute(conn, 'SELECT id FROM personality_types WHERE code = ? ORDER BY id',
+                           (code,)).fetchone()
+        return None if row is None else row[0]
+
+    def create_personality_type(self, conn, code, name, description):
+        return self.dialect.insert(self.backend, conn, 'personality_types',
+                                   ('code', 'name', 'description'), (code, name, description))
+
+    def dimension_ids(self, conn):
+        """{dimension code: id}"""
+        return {code: dimension_id for dimension_id, code in
+                self.execute(conn, 'SELECT id, code FROM dimensions').fetchall()}
+
+
+def _select(table, columns):
+    if columns is None:
+        return f'SELECT * FROM {table}'
+    return (f"SELECT id, {', '.join(f'{column} AS {name}' for name, column in columns.items())} "
+            f"FROM {table}")
+
+
+# Read by code that is handed a bare SQLite connection rather than a backend
+SQLITE_CATALOG = CatalogRepository(SQLiteBackend())
+
+# Hot profile queries; migrations.py indexes both (see tests/test_migrations.py)
+LATEST_RESPONSE_SQL = '''
+    SELECT q.*, p.code as personality_type, p.name as personality_name, p.description as personality_description
+    FROM questionnaire_responses q
+    LEFT JOIN personality_types p ON q.personality_type_id = p.id
+    WHERE q.user_id = ?
+    ORDER BY q.timestamp DESC
+    {limit}
+'''
+TOP_RECOMMENDATIONS_SQL = '''
+    SELECT m.*, mr.match_score
+    FROM major_recommendations mr
+    JOIN majors m ON mr.major_id = m.id
+    WHERE mr.response_id = ?
+    ORDER BY mr.match_score DESC
+    {limit}
+'''
+LATEST_RESPONSE_QUERY = LATEST_RESPONSE_SQL.format(limit=SQLITE.limit(1))
+TOP_RECOMMENDATIONS_QUERY = TOP_RECOMMENDATIONS_SQL.format(limit=SQLITE.limit())
+
+
+class ResponseRepository(Repository):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.latest_sql = LATEST_RESPONSE_SQL.format(limit=self.dialect.limit(1))
+        self.catalog = CatalogRepository(backend)
+
+    def create(self, conn, user_id, scores, personality_type_id, raw_responses):
+        """Insert a response with its {dimension: score} scores; returns the new id.
+
+        The four original dimensions have their own columns; save every score
+        with save_dimension_scores().
+        """
+        columns = ('user_id', *LEGACY_SCORE_COLUMNS, 'personality_type_id', 'raw_responses')
+        values = (user_id, *(scores.get(dimension) for dimension in LEGACY_SCORE_COLUMNS.values()),
+                  personality_type_id, raw_responses)
+        return self.dialect.insert(self.backend, conn, 'questionnaire_responses', columns, values)
+
+    def save_dimension_scores(self, conn, response_id, scores):
+        """Every known dimension's score, in one bulk write"""
+        ids = self.catalog.dimension_ids(conn)
+        self.backend.executemany(conn, '''
+            INSERT INTO response_dimension_scores (response_id, dimension_id, score)
+            VALUES (?, ?, ?)
+        ''', [(response_id, ids[code], score) for code, score in scores.items() if code in ids])
+
+    def dimension_scores(self, conn, response_id):
+        """{dimension code: score} saved for a response"""
+        return {code: score for code, score in self.execute(conn, '''
+            SELECT d.code, s.score
+            FROM response_dimension_scores s
+            JOIN dimensions d ON d.id = s.dimension_id
+            WHERE s.response_id = ?
+        ''', (response_id,)).fetchall()}
+
+    def latest(self, conn, user_id):
+        """The user's latest response with its personality type, or None"""
+        return fetchone(self.execute(conn, self.latest_sql, (user_id,)))
+
+
+class RecommendationRepository(Repository):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.top_sql = TOP_RECOMMENDATIONS_SQL.format(limit=self.dialect.limit())
+
+    def save(self, conn, response_id, matches):
+        """Save match engine results (scores 0-1) for a response, in one bulk write"""
+        self.backend.executemany(conn, '''
+            INSERT INTO major_recommendations
+            (response_id, major_id, match_score, analytical_match, creative_match,
+             social_match, technical_match, personality_match)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (response_id, match['major_id'], match['match_score'] * 100,  # Stored as a percentage
+             match.get('analytical_match'), match.get('creative_match'),
+             match.get('social_match'), match.get('technical_match'), match['personality_match'])
+            for match in matches
+        ])
+
+    def top(self, conn, response_id, limit):
+        """The response's best `limit` majors with their match scores"""
+        return fetchall(self.execute(conn, self.top_sql, (response_id, limit)))
+
+
+class Repositories:
+    """Every repository on one backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.users = UserRepository(backend)
+        self.catalog = CatalogRepository(backend)
+        self.responses = ResponseRepository(backend)
+        self.recommendations = RecommendationRepository(backend)
@@ -0,0 +1,42 @@
+"""Whole-page cache for GET views whose HTML depends only on a few request values.
+
+Entries hold the rendered body and its ETag, so a hit builds a small Response
+from bytes without touching the view or its templates, and a matching
+If-None-Match turns it into an empty 304.
+"""
+import hashlib
+from typing import NamedTuple
+
+from flask import Response
+
+from lru import LRUCache
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class ResponseCache(LRUCache):
+    """Bounded LRU of rendered pages"""
+
+
+def page_from_response(response):
+    """A CachedPage for a rendered 200 response"""
+    body = response.get_data()
+    return CachedPage(body, hashlib.sha256(body).hexdigest()[:32], response.mimetype)
+
+
+def page_response(page, request):
+    """A conditional response for a cached page.
+
+    The body differs by login state, which lives in the session cookie, so
+    only the browser may store it, and it revalidates with the ETag each time.
+    """
+    response = Response(page.body, mimetype=page.mimetype)
+    response.set_etag(page.etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
@@ -1,3 +1,6 @@
+-- Fresh schema; migrations.py upgrades it (and older databases) in place
+PRAGMA user_version = 0;
+
 -- Drop tables if they exist
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS majors;
@@ -6,6 +9,13 @@ DROP TABLE IF EXISTS questionnaire_responses;
 DROP TABLE IF EXISTS major_recommendations;
 DROP TABLE IF EXISTS personality_types;
 DROP TABLE IF EXISTS major_personality_matches;
+DROP TABLE IF EXISTS catalog_version;
+DROP TABLE IF EXISTS personality_types_version;
+DROP TABLE IF EXISTS major_dimension_weights;
+DROP TABLE IF EXISTS response_dimension_scores;
+DROP TABLE IF EXISTS questions;
+DROP TABLE IF EXISTS dimensions;
+DROP TABLE IF EXISTS question_bank_version;
 
 -- Users table
 DROP TABLE IF EXISTS users;
@@ -21,7 +31,7 @@ CREATE TABLE users (
 -- Create personality types table
 CREATE TABLE personality_types (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    code TEXT NOT NULL,         -- e.g., 'INTJ', 'ENFP'
+    code TEXT NOT NULL UNIQUE,  -- e.g., 'INTJ', 'ENFP'
     name TEXT NOT NULL,         -- e.g., 'Architect', 'Campaigner'
     description TEXT,
     strengths TEXT,
@@ -96,6 +106,39 @@ CREATE TABLE major_personality_matches (
     FOREIGN KEY (personality_type_id) REFERENCES personality_types(id)
 );
 
+-- Catalog version, bumped whenever majors or personality matches change so
+-- in-process caches (scoring matrices, indexes) know when to rebuild
+CREATE TABLE catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT INTO catalog_version (id, version) VALUES (1, 1);
+
+CREATE TRIGGER majors_insert_version AFTER INSERT ON majors
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER majors_update_version AFTER UPDATE ON majors
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER majors_delete_version AFTER DELETE ON majors
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER major_personality_matches_insert_version AFTER INSERT ON major_personality_matches
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER major_personality_matches_update_version AFTER UPDATE ON major_personality_matches
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER major_personality_matches_delete_version AFTER DELETE ON major_personality_matches
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+
 -- Create table for storing questionnaire responses
 CREATE TABLE questionnaire_responses (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
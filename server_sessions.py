@@ -0,0 +1,279 @@
+"""Server-side sessions: the cookie carries only a random session id.
+
+Session data lives in a store (in-process or SQLite) and is loaded the first
+time a request touches the session, so requests that never read it cost
+nothing. On the way out the data is serialized and compared with what was
+loaded, which catches in-place changes to nested values, and the store is
+only written when something changed or the entry is nearing expiry.
+"""
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+
+from db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_BYTES = 32
+BACKENDS = ('cookie', 'memory', 'sqlite')
+
+
+def new_session_id():
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+
+def is_valid_session_id(sid):
+    """Whether `sid` looks like an id we issued, so junk cookies never reach the store"""
+    return (isinstance(sid, str) and len(sid) == 43
+            and all(c.isalnum() or c in '-_' for c in sid))
+
+
+class MemorySessionStore:
+    """Session data in this process, for a single-process server"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._entries = {}  # sid -> (data, expires)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, sid):
+        """(data, expires) for a live session, or None"""
+        with self._lock:
+            entry = self._entries.get(sid)
+        if entry is None or entry[1] <= self.clock():
+            return None
+        return entry
+
+    def save(self, sid, data, expires):
+        with self._lock:
+            self._entries[sid] = (data, expires)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def sweep(self):
+        """Drop expired sessions; returns how many were removed"""
+        now = self.clock()
+        with self._lock:
+            expired = [sid for sid, (_, expires) in self._entries.items() if expires <= now]
+            for sid in expired:
+                del self._entries[sid]
+        return len(expired)
+
+    def close(self):
+        pass
+
+    def after_fork(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """Session data in a SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path, clock=time.time, pool_size=5):
+        self.clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.pool = ConnectionPool(path, size=pool_size)
+        self._execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                expires REAL NOT NULL
+            )
+        ''')
+        self._execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires)')
+
+    def _execute(self, sql, params=(), fetch=False):
+        conn = self.pool.acquire()
+        try:
+            cursor = conn.execute(sql, params)
+            if fetch:
+                return cursor.fetchone()
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            self.pool.release(conn)
+
+    def load(self, sid):
+        """(data, expires) for a live session, or None"""
+        row = self._execute('SELECT data, expires FROM sessions WHERE id = ? AND expires > ?',
+                            (sid, self.clock()), fetch=True)
+        return None if row is None else (bytes(row[0]), row[1])
+
+    def save(self, sid, data, expires):
+        self._execute('''
+            INSERT INTO sessions (id, data, expires) VALUES (?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires = excluded.expires
+        ''', (sid, data, expires))
+
+    def delete(self, sid):
+        self._execute('DELETE FROM sessions WHERE id = ?', (sid,))
+
+    def sweep(self):
+        """Drop expired sessions; returns how many were removed"""
+        return self._execute('DELETE FROM sessions WHERE expires <= ?', (self.clock(),))
+
+    def close(self):
+        self.pool.close()
+
+    def after_fork(self):
+        """Use fresh connections in a forked child; those inherited stay untouched.
+
+        SQLite connections must not be used (or closed) across fork(), so the
+        old pool is returned for the caller to keep referenced.
+        """
+        inherited = self.pool
+        self.pool = ConnectionPool(inherited.path, size=inherited.size)
+        return inherited
+
+
+def make_session_store(backend, sqlite_path=None):
+    """Store for a SESSION_BACKEND name, or None for Flask's signed cookie"""
+    if backend == 'cookie':
+        return None
+    if backend == 'memory':
+        return MemorySessionStore()
+    if backend == 'sqlite':
+        return SQLiteSessionStore(sqlite_path)
+    raise ValueError(f"Unknown session backend {backend!r}; choose from {', '.join(BACKENDS)}")
+
+
+class ServerSession(SessionMixin):
+    """Session dict loaded from the store on first use.
+
+    `clear()` (as done on login and logout) also retires the session id, so
+    an id fixed before login never carries over to the logged-in session.
+    """
+
+    def __init__(self, sid, loader):
+        self.sid = sid
+        self.new = sid is None
+        self.accessed = False
+        self.modified = False
+        self.regenerate = False
+        self.original = None  # Serialized data as loaded
+        self.expires = 0.0
+        self._loader = loader
+        self._data = None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self.accessed = True
+            self._data = {}
+            entry = self._loader(self.sid) if self.sid is not None else None
+            if entry is None:
+                # Unknown or expired: never adopt an id the client chose
+                self.sid, self.new = None, True
+            else:
+                self._data, self.original, self.expires = entry
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def clear(self):
+        self.data.clear()
+        self.modified = True
+        self.regenerate = True
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface over a session store"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, sweep_interval=300, clock=time.time):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._next_sweep = clock() + sweep_interval
+        self._sweep_lock = threading.Lock()
+
+    def _load(self, sid):
+        entry = self.store.load(sid)
+        if entry is None:
+            return None
+        data, expires = entry
+        try:
+            return self.serializer.loads(data.decode('utf-8')), data, expires
+        except (ValueError, UnicodeDecodeError):
+            logger.warning("Discarding unreadable session data")
+            return None
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        return ServerSession(sid if is_valid_session_id(sid) else None, self._load)
+
+    def _maybe_sweep(self, now):
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            removed = self.store.sweep()
+            if removed:
+                logger.debug("Swept %d expired sessions", removed)
+        finally:
+            self._sweep_lock.release()
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not session.loaded:
+            return
+        now = self.clock()
+        self._maybe_sweep(now)
+        cookie = dict(domain=self.get_cookie_domain(app), path=self.get_cookie_path(app),
+                      secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app),
+                      httponly=self.get_cookie_httponly(app))
+        name = self.get_cookie_name(app)
+
+        if not session:
+            if session.sid is not None:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, **cookie)
+            return
+
+        data = self.serializer.dumps(dict(session)).encode('utf-8')
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        sid = session.sid
+        if sid is None or session.regenerate:
+            if sid is not None:
+                self.store.delete(sid)
+            sid = new_session_id()
+        elif data == session.original and session.expires - now > lifetime / 2:
+            return  # Unchanged and not yet due for an expiry refresh
+        self.store.save(sid, data, now + lifetime)
+        if sid != session.sid or session.permanent:
+            response.set_cookie(name, sid, expires=self.get_expiration_time(app, session),
+                                **cookie)
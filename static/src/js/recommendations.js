@@ -0,0 +1,157 @@
+// Radar charts on the recommendations page. Scores come from data attributes
+// rendered by recommendations.html: the user's and the dimension labels on
+// #recommendations, each major's on its canvas, all in dimension order.
+function userScores() {
+    return JSON.parse(document.getElementById('recommendations').dataset.userScores);
+}
+
+function dimensionLabels() {
+    return JSON.parse(document.getElementById('recommendations').dataset.dimensionLabels);
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Create radar charts for each major
+    document.querySelectorAll('canvas[data-major-scores]').forEach(canvas => {
+        createRadarChart(canvas.id, {
+            labels: dimensionLabels(),
+            userScores: userScores(),
+            majorScores: JSON.parse(canvas.dataset.majorScores)
+        });
+    });
+});
+
+function createRadarChart(canvasId, data) {
+    return new Chart(document.getElementById(canvasId).getContext('2d'), {
+        type: 'radar',
+        data: {
+            labels: data.labels,
+            datasets: [{
+                label: 'Your Profile',
+                data: data.userScores,
+                fill: true,
+                backgroundColor: 'rgba(var(--accent-color-rgb), 0.2)',
+                borderColor: 'rgb(var(--accent-color-rgb))',
+                pointBackgroundColor: 'rgb(var(--accent-color-rgb))',
+                pointBorderColor: '#fff',
+                pointHoverBackgroundColor: '#fff',
+                pointHoverBorderColor: 'rgb(var(--accent-color-rgb))'
+            }, {
+                label: 'Major Requirements',
+                data: data.majorScores,
+                fill: true,
+                backgroundColor: 'rgba(255, 255, 255, 0.2)',
+                borderColor: '#ffffff',
+                pointBackgroundColor: '#ffffff',
+                pointBorderColor: '#fff',
+                pointHoverBackgroundColor: '#fff',
+                pointHoverBorderColor: '#ffffff'
+            }]
+        },
+        options: {
+            elements: {
+                line: { borderWidth: 2 }
+            },
+            scales: {
+                r: {
+                    angleLines: { color: 'rgba(255, 255, 255, 0.1)' },
+                    grid: { color: 'rgba(255, 255, 255, 0.1)' },
+                    pointLabels: { color: 'rgba(255, 255, 255, 0.7)' },
+                    ticks: {
+                        color: 'rgba(255, 255, 255, 0.7)',
+                        backdropColor: 'transparent'
+                    }
+                }
+            },
+            plugins: {
+                legend: {
+                    labels: { color: 'rgba(255, 255, 255, 0.7)' }
+                }
+            }
+        }
+    });
+}
+
+// "Learn More" loads just that major from /api/majors/<id>; the browser
+// revalidates it with the catalog ETag, so repeat opens are an empty 304.
+document.addEventListener('click', function(event) {
+    const button = event.target.closest('[data-major-url]');
+    if (button) {
+        const canvas = button.closest('.card').querySelector('canvas[data-major-scores]');
+        showMajorDetails(button.dataset.majorUrl, JSON.parse(canvas.dataset.majorScores));
+    }
+});
+
+// The chart reuses the card's per-dimension scores, which cover every
+// dimension of the question bank rather than only the majors table columns
+function showMajorDetails(url, majorScores) {
+    fetch(`${url}?fields=name,description,career_opportunities,required_skills`, { headers: { 'Accept': 'application/json' } })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(major => renderMajorDetails({
+            name: major.name,
+            description: major.description,
+            careers: major.career_opportunities.split(','),
+            skills: major.required_skills.split(','),
+            majorScores: majorScores
+        }))
+        .catch(error => console.error('Error loading major details:', error));
+}
+
+function renderMajorDetails(majorData) {
+    const modal = new bootstrap.Modal(document.getElementById('majorDetailsModal'));
+
+    // Update modal content
+    document.getElementById('majorDetailsModalLabel').textContent = majorData.name;
+    document.querySelector('#overview .description').textContent = majorData.description;
+
+    // Update careers
+    const careersList = document.querySelector('#careers .careers-list');
+    careersList.innerHTML = majorData.careers.map(career => `
+        <div class="col">
+            <div class="card bg-dark border-primary h-100">
+                <div class="card-body">
+                    <h5 class="card-title h6 accent-text">${career}</h5>
+                    <p class="card-text text-light-emphasis">
+                        Career description and requirements will go here.
+                    </p>
+                </div>
+            </div>
+        </div>
+    `).join('');
+
+    // Update skills
+    const skillsList = document.querySelector('#skills .skills-list');
+    skillsList.innerHTML = majorData.skills.map(skill => `
+        <li class="mb-3">
+            <div class="d-flex align-items-center mb-2">
+                <i class="bi bi-check2-circle text-primary me-2"></i>
+                <strong class="text-light">${skill}</strong>
+            </div>
+            <p class="text-light-emphasis ms-4 mb-0">
+                Detailed explanation of the skill and its importance.
+            </p>
+        </li>
+    `).join('');
+
+    // Create skills radar chart
+    if (window.modalSkillsChart) {
+        window.modalSkillsChart.destroy();
+    }
+    window.modalSkillsChart = createRadarChart('modalSkillsChart', {
+        labels: dimensionLabels(),
+        userScores: userScores(),
+        majorScores: majorData.majorScores
+    });
+
+    // Show the modal
+    modal.show();
+}
+
+function shareResults() {
+    // TODO: Implement sharing functionality
+    alert('Share functionality coming soon!');
+}
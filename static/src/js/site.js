@@ -0,0 +1,152 @@
+// Page scripts shared by every template. Each block checks for its page's
+// markup first, so the whole file can be cached once and loaded everywhere.
+
+// Home page: show the welcome popup on the first visit only
+document.addEventListener('DOMContentLoaded', function() {
+    const welcomePopupElement = document.getElementById('welcomePopup');
+    if (welcomePopupElement && !localStorage.getItem('welcomeShown')) {
+        const welcomePopup = new bootstrap.Modal(welcomePopupElement);
+        welcomePopup.show();
+        localStorage.setItem('welcomeShown', 'true');
+    }
+});
+
+// Questionnaire: the current step and its neighbours come from data attributes
+// on #questionnaire, rendered by questionnaire.html. In single-page mode every
+// step is already on the page, so moving between them needs no requests.
+function questionnaireState() {
+    return document.getElementById('questionnaire').dataset;
+}
+
+function isSinglePage() {
+    return questionnaireState().mode === 'single-page';
+}
+
+function showStep(step) {
+    document.querySelectorAll('#questionnaire [data-question-step]').forEach(section => {
+        section.hidden = Number(section.dataset.questionStep) !== step;
+    });
+    questionnaireState().step = step;
+    document.title = `Questionnaire - Step ${step}`;
+    history.replaceState(null, '', `#step-${step}`);
+    window.scrollTo(0, 0);
+}
+
+function calculateScores() {
+    // Store the scores on the page (one step, or all of them) in session storage
+    document.querySelectorAll('#questionnaire input[type="range"]').forEach(range => {
+        sessionStorage.setItem(range.dataset.dimension || range.name, parseFloat(range.value));
+    });
+
+    // One score per question in the bank, including steps answered on earlier pages
+    const scores = {};
+    questionnaireState().fields.split(',').forEach(field => {
+        scores[field] = parseFloat(sessionStorage.getItem(field)) || 0;
+    });
+
+    return scores;
+}
+
+function nextQuestion() {
+    const state = questionnaireState();
+
+    // Store current score
+    calculateScores();
+
+    if (Number(state.step) === Number(state.totalSteps)) {
+        submitQuestionnaire();
+    } else if (isSinglePage()) {
+        showStep(Number(state.step) + 1);
+    } else {
+        window.location.href = state.nextUrl;
+    }
+}
+
+function previousQuestion() {
+    const state = questionnaireState();
+    if (isSinglePage()) {
+        showStep(Number(state.step) - 1);
+    } else {
+        window.location.href = state.previousUrl;
+    }
+}
+
+function submitQuestionnaire() {
+    const scores = calculateScores();
+
+    fetch(questionnaireState().submitUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(scores)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            showMessage('success', data.message || 'Questionnaire submitted successfully!');
+            sessionStorage.clear();
+            // Redirect to profile page after a short delay
+            setTimeout(() => {
+                window.location.href = data.redirect;
+            }, 1000);
+        } else {
+            showMessage('error', data.message || 'Error submitting questionnaire');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showMessage('error', 'An error occurred while submitting the questionnaire');
+    });
+}
+
+function showMessage(type, message) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} alert-dismissible fade show position-fixed top-0 start-50 translate-middle-x mt-3`;
+    alertDiv.style.zIndex = '1050';
+    alertDiv.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+    `;
+    document.body.appendChild(alertDiv);
+
+    // Auto-remove the alert after 3 seconds
+    setTimeout(() => {
+        alertDiv.remove();
+    }, 3000);
+}
+
+if (document.getElementById('questionnaire')) {
+    // Update progress bar as user changes values
+    document.querySelectorAll('input[type="range"]').forEach(range => {
+        range.addEventListener('input', function() {
+            const value = this.value;
+            const progressBar = this.parentElement.querySelector('.progress-bar');
+            if (progressBar) {
+                progressBar.style.width = `${(value - 1) * 11.11}%`;  // Convert 1-10 to 0-100%
+                progressBar.textContent = value;
+                progressBar.setAttribute('aria-valuenow', value);
+            }
+        });
+    });
+
+    // Initialize progress bars with stored values if they exist
+    window.addEventListener('load', function() {
+        document.querySelectorAll('#questionnaire input[type="range"]').forEach(range => {
+            const storedValue = sessionStorage.getItem(range.getAttribute('data-dimension'));
+            if (storedValue) {
+                range.value = storedValue;
+                range.dispatchEvent(new Event('input'));
+            }
+        });
+
+        // Reloads and shared links come back to the step they were on
+        const match = window.location.hash.match(/^#step-(\d+)$/);
+        if (isSinglePage() && match) {
+            const step = Number(match[1]);
+            if (step >= 1 && step <= Number(questionnaireState().totalSteps)) {
+                showStep(step);
+            }
+        }
+    });
+}
@@ -0,0 +1,140 @@
+"""Cache-friendly static file serving.
+
+Files are served through Flask's send_file, which answers If-None-Match and
+If-Modified-Since with 304 and hands the file to the server's wsgi.file_wrapper
+(sendfile) or, with USE_X_SENDFILE, to the front-end proxy. On top of that,
+ETags are content hashes, and URLs carrying the current content fingerprint
+are cached as immutable. Built bundles (see assets.py) are looked up through
+the build manifest, cached as immutable because their names carry a content
+hash, and served from their precompressed .br/.gz siblings when the client
+accepts them. Files in the build without a hash in their name, the manifest
+among them, are revalidated like any other unversioned URL.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+import threading
+
+from flask import send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from assets import DIST_DIR, HASH_LENGTH, MANIFEST_NAME
+
+FINGERPRINT_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Content-Encoding -> file suffix, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+# 'site.<hash>.css', and its 'site.<hash>.css.gz' sibling
+HASHED_NAME = re.compile(r'\.[0-9a-f]{%d}\.' % HASH_LENGTH)
+
+
+def is_hashed(filename):
+    """Whether a built file's name carries its content hash"""
+    return HASHED_NAME.search(posixpath.basename(filename)) is not None
+
+
+class StaticFiles:
+    """Serves one static folder, caching content digests until a file changes"""
+
+    def __init__(self, folder, max_age=0, immutable_max_age=IMMUTABLE_MAX_AGE):
+        self.folder = folder
+        self.max_age = max_age
+        self.immutable_max_age = immutable_max_age
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._manifest = (None, {})
+
+    def digest(self, filename):
+        """SHA-256 of a static file's contents, or None if there is no such file"""
+        path = safe_join(self.folder, filename)
+        if path is None:
+            return None
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        key = (info.st_mtime_ns, info.st_size)
+        cached = self._digests.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._digests[path] = (key, digest.hexdigest())
+        return digest.hexdigest()
+
+    def fingerprint(self, filename):
+        """Short content hash used to version static URLs"""
+        digest = self.digest(filename)
+        return digest[:FINGERPRINT_LENGTH] if digest else None
+
+    @property
+    def manifest(self):
+        """Bundle name -> built file, re-read whenever the build rewrites it"""
+        path = os.path.join(self.folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._manifest = (None, {})
+            return {}
+        if self._manifest[0] != mtime:
+            with open(path, encoding='utf-8') as f:
+                self._manifest = (mtime, json.load(f))
+        return self._manifest[1]
+
+    @property
+    def manifest_version(self):
+        """Changes whenever a build rewrites the manifest (None before the first build)"""
+        self.manifest
+        return self._manifest[0]
+
+    def resolve(self, filename):
+        """The built file for a bundle name, or None"""
+        return self.manifest.get(filename)
+
+    def send(self, filename, version=None, accept_encodings=None):
+        """Response for a static file.
+
+        `version` is the URL's fingerprint, if any; `accept_encodings` is the
+        request's parsed Accept-Encoding header.
+        """
+        digest = self.digest(filename)
+        if digest is None:
+            raise NotFound()
+        built = filename.startswith(DIST_DIR + '/')
+        immutable = (built and is_hashed(filename)) or version == digest[:FINGERPRINT_LENGTH]
+        max_age = self.immutable_max_age if immutable else self.max_age
+
+        encoding, variant = (self._precompressed(filename, accept_encodings)
+                             if built else (None, None))
+        if encoding is None:
+            response = send_from_directory(self.folder, filename, etag=digest[:32],
+                                           conditional=True, max_age=max_age)
+        else:
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(self.folder, variant, mimetype=mimetype,
+                                           etag=self.digest(variant)[:32],
+                                           conditional=True, max_age=max_age)
+            response.content_encoding = encoding
+        if built:
+            response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.immutable = True
+        return response
+
+    def _precompressed(self, filename, accept_encodings):
+        """The best precompressed sibling the client accepts, as (encoding, filename)"""
+        for encoding, suffix in PRECOMPRESSED:
+            if accept_encodings and accept_encodings[encoding] > 0:
+                if self.digest(filename + suffix) is not None:
+                    return encoding, filename + suffix
+        return None, None
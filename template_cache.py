@@ -0,0 +1,71 @@
+"""Template render caching: a persistent Jinja bytecode cache and a fragment cache tag.
+
+    {% cache 'navbar', 'user_id' in session %} ... {% endcache %}
+
+renders its body once per (template, template mtime, fragment name, catalog
+version, key values) and reuses the HTML afterwards. Only wrap markup that
+depends on nothing but the listed key values.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from lru import LRUCache
+
+
+class FragmentCache(LRUCache):
+    """Bounded LRU of rendered template fragments"""
+
+
+def bytecode_cache(directory):
+    """A FileSystemBytecodeCache in `directory` (created if needed), or None to disable"""
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory, pattern='__jinja2_%s.cache')
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the {% cache name[, key, ...] %} tag.
+
+    The environment's `fragment_cache` holds the rendered fragments (None disables
+    caching) and `fragment_cache_version()` returns the current catalog version;
+    None means versions are not tracked, so fragments are rendered every time.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None, fragment_cache_version=lambda: None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        keys = []
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        # The template's mtime is baked in when it compiles, so edits start new keys
+        try:
+            mtime = os.stat(parser.filename).st_mtime_ns if parser.filename else 0
+        except OSError:
+            mtime = 0
+        args = [nodes.Const(parser.name), nodes.Const(mtime), name, nodes.List(keys)]
+        return nodes.CallBlock(self.call_method('_render_fragment', args), [], [], body) \
+            .set_lineno(lineno)
+
+    def _render_fragment(self, template, mtime, name, keys, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        version = self.environment.fragment_cache_version()
+        if version is None:
+            return caller()
+        key = (template, mtime, name, version, tuple(keys))
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.put(key, fragment)
+        return fragment
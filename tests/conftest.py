@@ -4,6 +4,9 @@ import tempfile
 import os
 from pathlib import Path
 
+# The default LOG_FILE would write app.log into the checkout; tests log to stderr only
+os.environ.setdefault('LOG_FILE', '')
+
 @pytest.fixture(scope='session')
 def test_db():
     """Create a test database and populate it with test data"""
@@ -87,3 +90,38 @@ def sample_personality_data():
         "strengths": "Test Strengths",
         "weaknesses": "Test Weaknesses"
     }
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh database built from schema.sql, with one test user"""
+    from app import create_app, get_db
+    from migrations import migrate
+
+    app = create_app({'DATABASE': str(tmp_path / 'app.db'), 'TESTING': True, 'WARM_UP': False,
+                      'LOG_FILE': None, 'SESSION_SQLITE_PATH': str(tmp_path / 'sessions.db')})
+
+    with app.app_context():
+        db = get_db()
+        with open(Path(__file__).parent.parent / 'schema.sql', 'r') as f:
+            db.executescript(f.read())
+        migrate(db)
+        db.execute(
+            'INSERT INTO users (first_name, last_name, email, password) VALUES (?, ?, ?, ?)',
+            ('Test', 'User', 'test@example.com', 'not-a-real-hash')
+        )
+        db.commit()
+
+    yield app
+
+    app.extensions.pop('db_pool').close()
+    app.session_interface.store.close()
+    if 'password_hasher' in app.extensions:
+        app.extensions.pop('password_hasher').shutdown()
+
+@pytest.fixture
+def app_client(app):
+    """Test client for `app`, logged in as the test user"""
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+        yield client
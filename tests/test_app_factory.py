@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+@pytest.fixture
+def warm_app(app):
+    from app import create_app
+
+    warm_app = create_app(dict(app.config, WARM_UP=True))  # Same database and settings
+    yield warm_app
+    warm_app.config['WARM_UP'] = False
+    warm_app.extensions.pop('db_pool').close()
+    warm_app.session_interface.store.close()
+
+def test_warm_up_loads_before_the_first_request(warm_app):
+    from app import get_response_cache
+
+    assert warm_app.extensions['warmed_up'] is True
+    assert 'db_pool' in warm_app.extensions and 'match_engine' in warm_app.extensions
+    assert 'question_bank' in warm_app.extensions and 'personality_types' in warm_app.extensions
+    with warm_app.app_context():
+        assert get_response_cache().stats()['size'] >= len(warm_app.config['WARM_UP_PATHS'])
+    client = warm_app.test_client()
+    assert client.get('/healthz').status_code == 200
+    assert json.loads(client.get('/readyz').data) == {'status': 'ready'}
+
+def test_not_ready_until_background_warm_up_succeeds(app, tmp_path):
+    from app import create_app
+
+    # No schema: loading the catalog fails until the database is switched back
+    cold_app = create_app(dict(app.config, WARM_UP=True, WARM_UP_RETRY_INTERVAL=0.05,
+                               DATABASE=str(tmp_path / 'empty.db')))
+    client = cold_app.test_client()
+    try:
+        assert client.get('/healthz').status_code == 200
+        assert client.get('/readyz').status_code == 503
+        assert client.get('/readyz').status_code == 503  # Probes only report
+    finally:
+        cold_app.config['DATABASE'] = app.config['DATABASE']
+    cold_app.extensions['warm_up_thread'].join(timeout=10)
+    assert cold_app.extensions['warmed_up'] is True
+    assert client.get('/readyz').status_code == 200
+    cold_app.config['WARM_UP'] = False
+    cold_app.extensions['warmed_up'] = False
+    assert client.get('/readyz').status_code == 200
+    cold_app.extensions.pop('db_pool').close()
+    cold_app.session_interface.store.close()
+
+def test_each_call_builds_a_separate_app(app):
+    from app import create_app, get_response_cache
+    from server_sessions import ServerSessionInterface
+
+    other = create_app(dict(app.config, RESPONSE_CACHE_SIZE=7))
+    try:
+        assert other is not app and isinstance(other.session_interface, ServerSessionInterface)
+        assert other.session_interface is not app.session_interface
+        with other.app_context():
+            assert get_response_cache().maxsize == 7
+        with app.app_context():
+            assert get_response_cache().maxsize == app.config['RESPONSE_CACHE_SIZE']
+    finally:
+        other.session_interface.store.close()
+
+def test_importing_sets_nothing_up():
+    """Only the factory configures anything; app and asgi_app call it on first use"""
+    code = '''
+import threading
+import app as module
+import logging_config
+
+assert 'app' not in vars(module) and not module._after_fork['registered']
+assert not logging_config.logging_configured() and threading.active_count() == 1
+assert module.asgi_app.wsgi_app is module.app
+assert module._after_fork['registered'] and logging_config.logging_configured()
+'''
+    env = dict(os.environ, LOG_FILE='')
+    result = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parent.parent,
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+def test_forked_workers_share_warm_state_and_reopen_connections(warm_app):
+    engine = warm_app.extensions['match_engine']
+    store_pool = warm_app.session_interface.store.pool
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child: report what it sees, then exit without running pytest teardown
+        try:
+            from app import get_db_pool
+            threads = threading.active_count()  # The fork hook itself starts nothing
+            with warm_app.app_context():
+                pool = get_db_pool()
+                majors = pool.acquire().execute('SELECT COUNT(*) FROM majors').fetchone()[0]
+            result = {
+                'threads': threads,
+                'same_engine': warm_app.extensions['match_engine'] is engine,
+                'new_session_pool': warm_app.session_interface.store.pool is not store_pool,
+                'majors': majors,
+                'ready': warm_app.test_client().get('/readyz').status_code,
+                'log_listener': threading.active_count() > threads,  # Restarted by the request
+            }
+            os.write(write_fd, json.dumps(result).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as pipe:
+        result = json.loads(pipe.read())
+    assert result['threads'] == 1 and result['log_listener']
+    assert result['same_engine'] and result['new_session_pool']
+    assert result['majors'] > 0 and result['ready'] == 200
+    assert warm_app.session_interface.store.pool is store_pool  # The parent is untouched
@@ -0,0 +1,179 @@
+import asyncio
+import io
+import json
+import threading
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from asgi import AsgiAdapter, build_environ
+
+def call(adapter, method, path, body=b'', headers=(), chunks=None, delay=0):
+    """Drive one request through the adapter: (status, headers, body)"""
+    async def run():
+        parts = chunks if chunks is not None else [body]
+        received = list(parts)
+
+        async def receive():
+            await asyncio.sleep(delay)
+            chunk = received.pop(0)
+            return {'type': 'http.request', 'body': chunk, 'more_body': bool(received)}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        path_only, _, query = path.partition('?')
+        scope = {'type': 'http', 'method': method, 'path': path_only,
+                 'query_string': query.encode(), 'headers': list(headers),
+                 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000)}
+        await adapter(scope, receive, send)
+        return sent
+    return messages(asyncio.run(run()))
+
+def messages(sent):
+    start = sent[0]
+    return (start['status'], dict(start['headers']),
+            b''.join(message.get('body', b'') for message in sent[1:]))
+
+def echo_app(environ, start_response):
+    body = environ['wsgi.input'].read()
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('X-Path', environ['PATH_INFO'])])
+    return [body, b'|', environ['QUERY_STRING'].encode(), b'|', environ.get('HTTP_X_A', '').encode()]
+
+def test_request_and_response_translation():
+    adapter = AsgiAdapter(echo_app, workers=1)
+    status, headers, body = call(adapter, 'POST', '/p?q=1', chunks=[b'ab', b'cd'],
+                                 headers=[(b'x-a', b'1'), (b'x-a', b'2')])
+    assert status == 200 and headers[b'x-path'] == b'/p'
+    assert body == b'abcd|q=1|1,2'
+    adapter.close()
+
+def test_environ_headers():
+    environ = build_environ({'method': 'GET', 'path': '/café', 'headers': [
+        (b'content-type', b'application/json'), (b'content-length', b'2')]}, io.BytesIO(b'{}'), 2)
+    assert environ['CONTENT_TYPE'] == 'application/json' and environ['CONTENT_LENGTH'] == '2'
+    assert environ['PATH_INFO'].encode('latin-1').decode('utf-8') == '/café'
+
+def test_oversized_bodies_never_reach_the_app():
+    calls = []
+    adapter = AsgiAdapter(lambda environ, start_response: calls.append(1), max_body_size=3)
+    assert call(adapter, 'POST', '/', b'toolong')[0] == 413
+    assert call(adapter, 'POST', '/', headers=[(b'content-length', b'100')])[0] == 413
+    assert calls == []
+
+def test_large_bodies_are_streamed_to_the_app():
+    """Past body_buffer the app reads the body as it arrives, within max_body_size"""
+    received = []
+
+    def reading_app(environ, start_response):
+        stream = environ['wsgi.input']
+        first = stream.read(2)
+        seen = len(received)
+        try:
+            rest = stream.read()
+        except RequestEntityTooLarge:
+            start_response('413 Request Entity Too Large', [])
+            return [b'']
+        start_response('200 OK', [])
+        return [first, b'|', str(seen).encode(), b'|', rest]
+
+    def counting(adapter, chunks):
+        async def run():
+            parts = list(chunks)
+
+            async def receive():
+                received.append(1)
+                chunk = parts.pop(0)
+                return {'type': 'http.request', 'body': chunk, 'more_body': bool(parts)}
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+            await adapter({'type': 'http', 'method': 'POST', 'path': '/', 'headers': []},
+                          receive, send)
+            return sent
+        received.clear()
+        return messages(asyncio.run(run()))
+
+    adapter = AsgiAdapter(reading_app, workers=1, body_buffer=2, max_body_size=10)
+    assert counting(adapter, [b'ab', b'cd', b'ef'])[::2] == (200, b'ab|1|cdef')
+    assert counting(adapter, [b'ab', b'cdefgh', b'ijklmn'])[0] == 413
+    adapter.close()
+
+def test_app_errors_become_500():
+    def broken(environ, start_response):
+        raise RuntimeError('boom')
+    assert call(AsgiAdapter(broken), 'GET', '/')[0] == 500
+
+def test_streamed_response_with_backpressure():
+    def stream(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return (str(i).encode() for i in range(50))
+    status, _, body = call(AsgiAdapter(stream, send_buffer=2), 'GET', '/')
+    assert body == ''.join(str(i) for i in range(50)).encode()
+
+def test_slow_clients_do_not_hold_workers():
+    lock = threading.Lock()
+    running = [0, 0]  # now, max
+
+    def app(environ, start_response):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        with lock:
+            running[0] -= 1
+        start_response('204 No Content', [])
+        return []
+
+    adapter = AsgiAdapter(app, workers=2)
+
+    async def many():
+        async def one():
+            async def receive():
+                await asyncio.sleep(0.05)  # A slow upload
+                return {'type': 'http.request', 'body': b'x', 'more_body': False}
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+            await adapter({'type': 'http', 'method': 'POST', 'path': '/', 'headers': []},
+                          receive, send)
+            return sent[0]['status']
+        return await asyncio.gather(*(one() for _ in range(200)))
+
+    statuses = asyncio.run(many())
+    assert statuses == [204] * 200 and running[1] <= 2
+    adapter.close()
+
+def test_hot_routes_through_the_adapter(app, app_client):
+    from app import asgi_adapter
+    cookie = app_client.get_cookie('session').value
+    adapter = asgi_adapter(app)
+    headers = [(b'cookie', f'session={cookie}'.encode())]
+    try:
+        status, response_headers, body = call(adapter, 'GET', '/api/majors?limit=2&fields=id',
+                                              headers=headers)
+        assert status == 200 and len(json.loads(body)) == 2
+        assert b'rel="next"' in response_headers[b'link']
+
+        answers = json.dumps({'analytical': 8, 'creative': 3, 'social': 5, 'practical': 9})
+        status, _, body = call(adapter, 'POST', '/submit_questionnaire', answers.encode(),
+                               headers + [(b'content-type', b'application/json')])
+        assert status == 200 and json.loads(body)['status'] == 'success'
+
+        status, _, body = call(adapter, 'GET', '/profile', headers=headers)
+        assert status == 200 and b'ISTJ' in body
+    finally:
+        adapter.close()
+
+def test_legacy_write_callable_is_sent():
+    def writing_app(environ, start_response):
+        write = start_response('200 OK', [('Content-Type', 'text/plain')])
+        write(b'written|')
+        return [b'returned']
+
+    adapter = AsgiAdapter(writing_app, workers=1)
+    assert call(adapter, 'GET', '/') == (200, {b'content-type': b'text/plain'},
+                                         b'written|returned')
+    adapter.close()
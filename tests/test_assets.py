@@ -0,0 +1,170 @@
+import gzip
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from assets import VENDOR_FILES, AssetError, build, load_manifest, minify_css, minify_js
+from static_files import StaticFiles
+
+STATIC = Path(__file__).parent.parent / 'static'
+
+@pytest.fixture
+def static_dir(tmp_path):
+    """A copy of static/src and static/images with small stand-ins for the vendored files"""
+    shutil.copytree(STATIC / 'src', tmp_path / 'src')
+    shutil.copytree(STATIC / 'images', tmp_path / 'images')
+    for path in VENDOR_FILES:
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if path.endswith('bootstrap-icons.css'):
+            target.write_text('@font-face { src: url("./fonts/bootstrap-icons.woff2?24e3") '
+                              'format("woff2"); }\n.bi::before { content: "\\f101"; }\n')
+        elif path.endswith('.css'):
+            target.write_text('.btn{color:red}.x{background:url("data:image/svg+xml,%3csvg%3e")}')
+        elif path.endswith('.js'):
+            target.write_text('window.vendored = true')
+        else:
+            target.write_bytes(b'font bytes')
+    return tmp_path
+
+def test_minifiers_keep_strings_and_line_breaks():
+    """Comments and indentation go; string contents and statement boundaries stay"""
+    assert minify_css('a  {\n  color: red ;\n} /* note */ b > c { x: "a  b" }') == \
+        'a{color:red}b>c{x:"a b"}'
+    source = "const a = 'x // not a comment'; // comment\n    /* block */ let b = `  ${a}`\nf()"
+    assert minify_js(source) == "const a = 'x // not a comment';\nlet b = `  ${a}`\nf()"
+
+def test_build_writes_hashed_bundles_and_manifest(static_dir):
+    """Bundles are named by content hash and listed in the manifest"""
+    manifest = build(str(static_dir))
+    assert {'css/site.css', 'js/site.js', 'js/recommendations.js'} <= set(manifest)
+    assert load_manifest(str(static_dir)) == manifest
+
+    css = (static_dir / manifest['css/site.css']).read_text()
+    assert css.startswith('.btn{color:red}')
+    assert '--accent-color:#7b1fa2' in css
+    # Vendored font URLs point at hashed copies next to the bundle
+    font = css.split('url("', 2)[2].split('"')[0]
+    assert font.startswith('../media/bootstrap-icons.') and font.endswith('.woff2')
+    assert (static_dir / 'dist' / 'css' / font).resolve().read_bytes() == b'font bytes'
+
+    js = (static_dir / manifest['js/site.js']).read_bytes()
+    assert js.startswith(b'window.vendored = true;\n')
+    assert gzip.decompress((static_dir / (manifest['js/site.js'] + '.gz')).read_bytes()) == js
+
+    # Unchanged sources rebuild to the same names
+    assert build(str(static_dir)) == manifest
+
+def test_build_reports_missing_vendor_files(static_dir):
+    os.unlink(static_dir / 'vendor' / 'chart.js' / 'chart.umd.js')
+    with pytest.raises(AssetError, match='--fetch'):
+        build(str(static_dir))
+
+def test_built_bundles_served_precompressed(app, static_dir):
+    """Built files are immutable and served from their .gz sibling when accepted"""
+    from werkzeug.datastructures import Accept
+
+    manifest = build(str(static_dir))
+    static_files = StaticFiles(str(static_dir))
+    assert static_files.resolve('js/site.js') == manifest['js/site.js']
+    raw = (static_dir / manifest['js/site.js']).read_bytes()
+
+    with app.test_request_context():
+        response = static_files.send(manifest['js/site.js'],
+                                     accept_encodings=Accept([('gzip', 1)]))
+        response.direct_passthrough = False
+        assert response.content_encoding == 'gzip'
+        assert response.mimetype == 'text/javascript'
+        assert gzip.decompress(response.get_data()) == raw
+        assert response.cache_control.immutable
+        assert 'Accept-Encoding' in response.vary
+
+        plain = static_files.send(manifest['js/site.js'])
+        plain.direct_passthrough = False
+        assert plain.content_encoding is None
+        assert plain.get_data() == raw
+        assert plain.headers['ETag'] != response.headers['ETag']
+
+        # Unhashed build files, the manifest above all, must pick up a rebuild
+        for unhashed in ('dist/manifest.json', 'dist/js/site.js'):
+            (static_dir / unhashed).write_text('{}')
+            response = static_files.send(unhashed)
+            assert not response.cache_control.immutable
+            assert response.cache_control.max_age == 0
+
+def test_templates_use_sources_before_a_build(app, app_client):
+    """Without a manifest, pages load our sources and any not-yet-vendored files upstream"""
+    from app import get_static_files
+
+    with app.app_context():
+        assert not get_static_files().resolve('css/site.css')
+    with app_client.session_transaction() as session:
+        session.clear()
+    page = app_client.get('/login').get_data(as_text=True)
+    assert '/static/src/css/site.css?v=' in page
+    assert '/static/src/js/site.js?v=' in page
+    assert '<style>' not in page
+
+def test_templates_use_built_bundles(app, app_client, static_dir):
+    """With a manifest, url_for resolves bundle names to hashed files"""
+    manifest = build(str(static_dir))
+    original = app.extensions.pop('static_files', None)
+    app.extensions['static_files'] = StaticFiles(str(static_dir))
+    with app_client.session_transaction() as session:
+        session.clear()
+    try:
+        page = app_client.get('/login').get_data(as_text=True)
+    finally:
+        app.extensions.pop('static_files')
+        if original is not None:
+            app.extensions['static_files'] = original
+    assert f'/static/{manifest["css/site.css"]}"' in page
+    assert f'/static/{manifest["js/site.js"]}"' in page
+    assert 'cdn.jsdelivr.net' not in page
+    assert json.loads((static_dir / 'dist' / 'manifest.json').read_text()) == manifest
+
+def test_build_writes_image_variants(static_dir):
+    """Each display width gets 1x/2x WebP and JPEG variants, never upscaled"""
+    Image = pytest.importorskip('PIL.Image')
+
+    manifest = build(str(static_dir))
+    with Image.open(static_dir / manifest['images/mascot-160w.webp']) as image:
+        assert image.format == 'WEBP' and image.width == 160
+    with Image.open(static_dir / manifest['images/mascot-50w.jpg']) as image:
+        assert image.format == 'JPEG' and image.width == 50
+    assert 'images/mascot-200w.webp' in manifest
+    assert 'images/mascot-400w.webp' not in manifest  # The source is 252px wide
+    assert not (static_dir / (manifest['images/mascot-80w.webp'] + '.gz')).exists()
+
+def test_responsive_image_helper(app, static_dir):
+    """The helper offers built variants through srcset and falls back to the original"""
+    pytest.importorskip('PIL.Image')
+    from app import responsive_image
+
+    with app.test_request_context():
+        plain = str(responsive_image('images/mascot.jpg', 80, alt='Mascot', style='width: 80px'))
+    assert plain.startswith('<img src="/static/images/mascot.jpg?v=')
+    assert plain.endswith('alt="Mascot" style="width: 80px">')
+
+    manifest = build(str(static_dir))
+    original = app.extensions.pop('static_files', None)
+    app.extensions['static_files'] = StaticFiles(str(static_dir))
+    try:
+        with app.test_request_context():
+            html = str(responsive_image('images/mascot.jpg', 80, alt='<Mascot>',
+                                        **{'class': 'rounded-circle'}))
+            wide = str(responsive_image('images/mascot.jpg', 200))
+    finally:
+        app.extensions.pop('static_files')
+        if original is not None:
+            app.extensions['static_files'] = original
+    webp = f'/static/{manifest["images/mascot-80w.webp"]} 1x, ' \
+           f'/static/{manifest["images/mascot-160w.webp"]} 2x'
+    assert html.startswith(f'<picture><source type="image/webp" srcset="{webp}">')
+    assert f'<img src="/static/{manifest["images/mascot-80w.jpg"]}" srcset=' in html
+    assert 'alt="&lt;Mascot&gt;" class="rounded-circle"></picture>' in html
+    # No 400px variant exists for a 252px source, so only 1x is offered
+    assert f'srcset="/static/{manifest["images/mascot-200w.webp"]} 1x"' in wide
@@ -0,0 +1,123 @@
+import io
+import json
+import numpy as np
+import pytest
+from batch_scoring import BatchInputError, iter_json_array, iter_ndjson, parse_row
+from match_engine import MatchEngine, user_vector
+from tests.test_match_engine import make_majors
+
+def test_iter_json_array_handles_elements_split_across_reads():
+    """Elements and numbers cut at a read boundary are reassembled"""
+    rows = [{'analytical': i % 10 + 1, 'creative': 2.5, 'social': 10,
+             'technical': 1, 'id': f'stü-{i}'} for i in range(50)]
+    body = json.dumps(rows).encode('utf-8')
+    assert list(iter_json_array(io.BytesIO(body), read_size=7)) == rows
+    assert list(iter_json_array(io.BytesIO(b' [ 1 , 22 ] '), read_size=1)) == [1, 22]
+    with pytest.raises(BatchInputError):
+        list(iter_json_array(io.BytesIO(b'{"a": 1}')))
+    with pytest.raises(BatchInputError):
+        list(iter_json_array(io.BytesIO(b'[1, 2')))
+
+def test_iter_json_array_rejects_bad_separators():
+    for body in (b'[,,1]', b'[1 2]', b'[1,]', b'[1,,2]', b'[1 .5]'):
+        for read_size in (1, 3, 64):
+            with pytest.raises(BatchInputError):
+                list(iter_json_array(io.BytesIO(body), read_size=read_size))
+    for read_size in range(1, 11):
+        body = b'[1.5, 2e3, -Infinity, true, "a\\u00e9b"]'
+        assert list(iter_json_array(io.BytesIO(body), read_size=read_size)) == [
+            1.5, 2000.0, float('-inf'), True, 'a\u00e9b']
+
+def test_iter_json_array_stops_at_a_malformed_element():
+    """The rest of the body is not read once an element cannot be valid JSON"""
+    stream = io.BytesIO(b'[{"a": 1}, {"a" 2}, ' + b'{"a": 3}, ' * 10000 + b'{}]')
+    with pytest.raises(BatchInputError, match='Invalid JSON array element'):
+        list(iter_json_array(stream, read_size=64))
+    assert stream.tell() <= 128
+
+    stream = io.BytesIO(b'["' + b'x' * 10000)
+    with pytest.raises(BatchInputError, match='too large'):
+        list(iter_json_array(stream, read_size=64, max_element_size=1000))
+    assert stream.tell() < 2000
+
+def test_iter_ndjson_skips_blank_lines():
+    body = b'{"a": 1}\n\n[1, 2]\n{"b": 2}'
+    assert list(iter_ndjson(io.BytesIO(body), read_size=3)) == [{'a': 1}, [1, 2], {'b': 2}]
+
+def test_top_k_batch_breaks_ties_like_top_k():
+    """One-decimal weights tie constantly; every path ranks ties by catalog order"""
+    majors = make_majors(2000, seed=10)
+    for major in majors:
+        for dimension in ('analytical', 'creative', 'social', 'technical'):
+            major[f'{dimension}_weight'] = round(major[f'{dimension}_weight'], 1)
+    vectors = np.random.default_rng(11).integers(1, 11, size=(200, 4)) / 10.0
+    brute = MatchEngine(majors, index_min_majors=len(majors) + 1)
+    for engine in (brute, MatchEngine(majors, index_min_majors=0)):
+        positions, scores = engine.top_k_batch(vectors, 10, max_cells=50000)
+        for vector, row_positions in zip(vectors, positions):
+            assert engine.ids[row_positions].tolist() == [
+                m['major_id'] for m in brute.top_k(vector, k=10)]
+
+def test_parse_row_rejects_non_finite_scores():
+    for row in ([float('nan'), 5, 5, 5], {'analytical': float('inf'), 'creative': 5,
+                                           'social': 5, 'technical': 5}):
+        with pytest.raises(ValueError):
+            parse_row(row)
+
+def test_top_k_batch_matches_single_queries():
+    """Chunked brute force and the KD-tree agree with per-student top_k"""
+    majors = make_majors(2000, seed=8)
+    vectors = np.random.default_rng(9).integers(1, 11, size=(40, 4)) / 10.0
+    for engine in (MatchEngine(majors, index_min_majors=len(majors) + 1),
+                   MatchEngine(majors, index_min_majors=0)):
+        positions, scores = engine.top_k_batch(vectors, 5, max_cells=10000)
+        for vector, row_positions, row_scores in zip(vectors, positions, scores):
+            expected = engine.top_k(vector, k=5)
+            assert engine.ids[row_positions].tolist() == [m['major_id'] for m in expected]
+            assert row_scores.tolist() == pytest.approx([m['match_score'] for m in expected])
+
+def test_batch_endpoint_streams_ndjson(app, app_client):
+    """JSON array and NDJSON input both stream one line per row, errors inline"""
+    from app import calculate_major_matches, get_db_pool
+
+    rows = [
+        {'id': 'a', 'analytical': 9, 'creative': 6, 'social': 4, 'practical': 9},
+        [1, 10, 5, 3],
+        {'analytical': 11, 'creative': 6, 'social': 4, 'practical': 9},
+    ]
+    response = app_client.post('/api/match/batch?k=2', data=json.dumps(rows),
+                               content_type='application/json')
+    assert response.status_code == 200
+    with app.app_context():
+        assert get_db_pool().stats()['in_use'] == 0  # Released before the stream is read
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert lines[0]['id'] == 'a'
+    with app.app_context():
+        expected = calculate_major_matches(rows[0], limit=2)
+    assert [m['major_id'] for m in lines[0]['matches']] == [m['major_id'] for m in expected]
+    assert lines[0]['matches'][0]['match_score'] == pytest.approx(expected[0]['match_score'])
+    assert len(lines[1]['matches']) == 2
+    assert 'error' in lines[2] and 'matches' not in lines[2]
+
+    body = '\n'.join(json.dumps(row) for row in rows[:2]) + '\n'
+    response = app_client.post('/api/match/batch', data=body,
+                               content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert len(lines) == 2 and len(lines[0]['matches']) == 5
+
+    response = app_client.post('/api/match/batch?k=0', data='[]',
+                               content_type='application/json')
+    assert response.status_code == 400
+
+def test_batch_endpoint_has_its_own_body_limit(app, app_client):
+    """MAX_CONTENT_LENGTH does not cap batch uploads; BATCH_MATCH_MAX_BODY_SIZE does"""
+    body = json.dumps([[5, 5, 5, 5]] * 100)
+    app.config['MAX_CONTENT_LENGTH'] = 100
+    response = app_client.post('/api/match/batch?k=1', data=body, content_type='application/json')
+    assert response.status_code == 200 and len(response.data.decode().splitlines()) == 100
+
+    app.config['BATCH_MATCH_MAX_BODY_SIZE'] = 100
+    response = app_client.post('/api/match/batch?k=1', data=body, content_type='application/json')
+    assert response.status_code == 413
@@ -0,0 +1,203 @@
+import json
+import pytest
+from catalog import CatalogError, CatalogWatcher, bulk_upsert_majors, get_catalog_version
+
+NEW_MAJOR = {
+    'name': 'Data Science',
+    'description': 'Statistics and computing',
+    'careers': 'Data Scientist,ML Engineer',
+    'skills': 'Statistics,Programming',
+    'analytical_weight': 0.95,
+    'creative_weight': 0.5,
+    'social_weight': 0.3,
+    'technical_weight': 0.9,
+    'personality_matches': [{'personality_type': 'INTJ', 'match_strength': 0.9}]
+}
+
+@pytest.fixture
+def db(app, app_client):
+    from app import get_db
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO personality_types (code, name) VALUES ('INTJ', 'Architect')")
+        db.commit()
+        yield db
+
+def test_bulk_upsert_inserts_updates_and_bumps_version(db):
+    version = get_catalog_version(db)
+    psychology = dict(NEW_MAJOR, name='Psychology', social_weight=1.0)
+    del psychology['personality_matches']
+    result = bulk_upsert_majors(db, [NEW_MAJOR, psychology])
+    assert (result['inserted'], result['updated']) == (1, 1)
+    assert result['version'] > version
+    assert db.execute("SELECT social_weight FROM majors WHERE name = 'Psychology'").fetchone()[0] == 1.0
+    assert db.execute('SELECT COUNT(*) FROM major_personality_matches').fetchone()[0] == 1
+
+    result = bulk_upsert_majors(db, [dict(NEW_MAJOR, personality_matches=[])])
+    assert (result['inserted'], result['updated']) == (0, 1)
+    assert db.execute('SELECT COUNT(*) FROM major_personality_matches').fetchone()[0] == 0
+
+def test_bulk_upsert_is_all_or_nothing(db):
+    count = db.execute('SELECT COUNT(*) FROM majors').fetchone()[0]
+    bad_type = dict(NEW_MAJOR, personality_matches=[{'personality_type': 'XXXX',
+                                                     'match_strength': 1}])
+    with pytest.raises(CatalogError):
+        bulk_upsert_majors(db, [dict(NEW_MAJOR, name='Other'), bad_type])
+    with pytest.raises(CatalogError):
+        bulk_upsert_majors(db, [dict(NEW_MAJOR, creative_weight=2)])
+    assert db.execute('SELECT COUNT(*) FROM majors').fetchone()[0] == count
+
+@pytest.mark.parametrize('matches', [
+    'INTJ', ['INTJ'], [{'match_strength': 0.5}], [{'personality_type': 'XXXX', 'match_strength': 0.5}],
+    [{'personality_type': 'INTJ'}], [{'personality_type': 'INTJ', 'match_strength': 'high'}],
+    [{'personality_type': 'INTJ', 'match_strength': float('nan')}],
+    [{'personality_type': 'INTJ', 'match_strength': 1.5}],
+    [{'personality_type': 'INTJ', 'match_strength': 0.5, 'explanation': 7}],
+])
+def test_invalid_personality_matches_rejected(app, app_client, db, matches, monkeypatch):
+    major = dict(NEW_MAJOR, personality_matches=matches)
+    with pytest.raises(CatalogError):
+        bulk_upsert_majors(db, [major])
+    monkeypatch.setitem(app.config, 'ADMIN_API_TOKEN', 'secret')
+    response = app_client.post('/admin/catalog/majors', json=[major],
+                               headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 400
+
+def test_database_rejections_are_catalog_errors(db):
+    db.execute('CREATE UNIQUE INDEX idx_majors_name ON majors (name)')
+    existing = db.execute('SELECT id, name FROM majors ORDER BY id LIMIT 2').fetchall()
+    renamed = dict(NEW_MAJOR, id=existing[0][0], name=existing[1][1])  # Collides with the second
+    with pytest.raises(CatalogError):
+        bulk_upsert_majors(db, [renamed])
+    name = db.execute('SELECT name FROM majors WHERE id = ?', (existing[0][0],)).fetchone()[0]
+    assert name == existing[0][1]
+
+def test_watcher_notifies_only_on_change():
+    watcher = CatalogWatcher()
+    seen = []
+    watcher.subscribe(lambda source, version: seen.append(version))
+    assert watcher.observe('db', 1)
+    assert not watcher.observe('db', 1)
+    assert watcher.observe('db', 2)
+    assert watcher.observe('db', None) and watcher.observe('db', None)
+    assert seen == [1, 2, None, None]
+
+def test_admin_endpoint_refreshes_cached_payloads(app, app_client):
+    first = json.loads(app_client.get('/api/majors').data)
+    app.config['ADMIN_API_TOKEN'] = None
+    assert app_client.post('/admin/catalog/majors', json=[]).status_code == 404
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+    try:
+        assert app_client.post('/admin/catalog/majors', json=[]).status_code == 401
+        headers = {'Authorization': 'Bearer secret'}
+        response = app_client.post('/admin/catalog/majors', headers=headers,
+                                   json={'majors': [{'name': 'Bad'}]})
+        assert response.status_code == 400
+        major = dict(NEW_MAJOR, personality_matches=[])
+        response = app_client.post('/admin/catalog/majors', headers=headers,
+                                   json={'majors': [major]})
+        assert response.status_code == 200
+        assert json.loads(response.data)['inserted'] == 1
+    finally:
+        app.config['ADMIN_API_TOKEN'] = None
+
+    majors = json.loads(app_client.get('/api/majors').data)
+    assert len(majors) == len(first) + 1
+    assert majors[-1]['career_opportunities'] == NEW_MAJOR['careers']
+
+def test_upsert_majors_cli(app, app_client, tmp_path):
+    path = tmp_path / 'majors.json'
+    path.write_text(json.dumps([dict(NEW_MAJOR, personality_matches=[])]))
+    result = app.test_cli_runner().invoke(args=['upsert-majors', str(path)])
+    assert result.exit_code == 0, result.output
+    assert 'Inserted 1, updated 0 majors' in result.output
+
+def test_personality_type_get_or_create_is_race_free(app, db):
+    """Concurrent creates of one code from separate connections insert a single row"""
+    import sqlite3
+    import threading
+    from catalog import PersonalityTypeRegistry, get_or_create_personality_type
+
+    # Without the UNIQUE constraint only the write lock prevents duplicates
+    db.executescript('''
+        DROP TABLE personality_types;
+        CREATE TABLE personality_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT
+        );
+        INSERT INTO personality_types (code, name) VALUES ('INTJ', 'Architect');
+    ''')
+    ids = []
+    barrier = threading.Barrier(8)
+
+    def create():
+        conn = sqlite3.connect(app.config['DATABASE'], timeout=10)
+        barrier.wait()
+        ids.append(get_or_create_personality_type(conn, 'ENFP', 'Type ENFP', None))
+        conn.close()
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 1
+    assert db.execute("SELECT COUNT(*) FROM personality_types WHERE code = 'ENFP'").fetchone()[0] == 1
+
+    registry = PersonalityTypeRegistry()
+    registry.load(db)
+    assert registry.get_or_create(db, 'ENFP', 'unused', None) == ids[0]
+    assert registry.get_or_create(db, 'INTJ', 'unused', None) == 1
+
+def test_personality_type_get_or_create_leaves_the_callers_transaction_open(db):
+    from catalog import get_or_create_personality_type
+
+    db.execute("UPDATE majors SET name = 'Renamed' WHERE id = 1")
+    assert db.in_transaction
+    type_id = get_or_create_personality_type(db, 'ESFP', 'Type ESFP', None)
+    assert db.in_transaction  # Not committed on the caller's behalf
+    db.rollback()
+    assert db.execute('SELECT name FROM majors WHERE id = 1').fetchone()[0] != 'Renamed'
+    assert db.execute("SELECT id FROM personality_types WHERE code = 'ESFP'").fetchone() is None
+    assert get_or_create_personality_type(db, 'ESFP', 'Type ESFP', None) >= type_id
+    assert not db.in_transaction
+
+class StaleFirstLookup:
+    """A connection whose first SELECT misses, as if another writer inserted just after it"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.stale = True
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+    def cursor(self):
+        return self  # Repositories run their SQL through cursor().execute()
+
+    def execute(self, sql, params=()):
+        if self.stale and sql.lstrip().startswith('SELECT'):
+            self.stale = False
+            self.result = self.conn.execute('SELECT NULL WHERE 0')
+        else:
+            self.result = self.conn.execute(sql, params)
+        return self.result
+
+    def fetchone(self):
+        return self.result.fetchone()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+def test_personality_type_get_or_create_reselects_after_a_unique_conflict(db):
+    from catalog import get_or_create_personality_type
+
+    intj = db.execute("SELECT id FROM personality_types WHERE code = 'INTJ'").fetchone()[0]
+    assert get_or_create_personality_type(StaleFirstLookup(db), 'INTJ', 'unused', None) == intj
+    assert db.execute("SELECT COUNT(*) FROM personality_types WHERE code = 'INTJ'").fetchone()[0] == 1
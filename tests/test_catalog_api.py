@@ -0,0 +1,111 @@
+import json
+import sqlite3
+
+import pytest
+
+from catalog_api import (MAJOR_FIELDS, ApiQueryError, fetch_item, fetch_page, parse_fields,
+                         parse_page_args)
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE majors (id INTEGER PRIMARY KEY, name TEXT, description TEXT, '
+                 'careers TEXT, skills TEXT, analytical_weight REAL, creative_weight REAL, '
+                 'social_weight REAL, technical_weight REAL)')
+    conn.executemany('INSERT INTO majors VALUES (?, ?, ?, ?, ?, 0.5, 0.5, 0.5, 0.5)',
+                     [(i, f'Major {i}', 'd', 'c', 's') for i in (1, 2, 3, 5, 8)])
+    return conn
+
+def test_keyset_pages_cover_every_row_once(db):
+    after, names = 0, []
+    while after is not None:
+        page = fetch_page(db, 'majors', ('name',), MAJOR_FIELDS, after, 2)
+        names += [major['name'] for major in json.loads(page.body)]
+        after = page.next_cursor
+    assert names == ['Major 1', 'Major 2', 'Major 3', 'Major 5', 'Major 8']
+
+    last = fetch_page(db, 'majors', ('id',), MAJOR_FIELDS, 3, 2)
+    assert json.loads(last.body) == [{'id': 5}, {'id': 8}] and last.next_cursor is None
+
+def test_fields_select_and_rename_columns(db):
+    fields = parse_fields('name,career_opportunities,name', MAJOR_FIELDS)
+    assert fields == ('name', 'career_opportunities')
+    assert json.loads(fetch_item(db, 'majors', fields, MAJOR_FIELDS, 2).body) == {
+        'name': 'Major 2', 'career_opportunities': 'c'}
+    assert fetch_item(db, 'majors', fields, MAJOR_FIELDS, 4) is None
+    assert parse_fields(None, MAJOR_FIELDS) == tuple(MAJOR_FIELDS)
+    for bad in ('password', 'id;DROP TABLE majors', ','):
+        with pytest.raises(ApiQueryError):
+            parse_fields(bad, MAJOR_FIELDS)
+
+def test_page_args_validated():
+    assert parse_page_args({}, 100, 500) == (0, 100)
+    assert parse_page_args({'after': '7', 'limit': '5'}, 100, 500) == (7, 5)
+    for args in ({'limit': '0'}, {'limit': '501'}, {'after': 'x'}, {'after': '-1'}):
+        with pytest.raises(ApiQueryError):
+            parse_page_args(args, 100, 500)
+    with pytest.raises(ApiQueryError, match='after'):
+        parse_page_args({'after': '-1'}, 100, 500)
+
+def test_majors_api_pages_with_link_header(app_client):
+    everything = json.loads(app_client.get('/api/majors').data)
+    response = app_client.get('/api/majors?limit=2&fields=id,name')
+    assert json.loads(response.data) == [{'id': m['id'], 'name': m['name']} for m in everything[:2]]
+    next_url = response.headers['Link'].split(';')[0].strip('<>')
+    assert f"after={everything[1]['id']}" in next_url and 'fields=id,name' in next_url
+    assert json.loads(app_client.get(next_url).data)[0]['id'] == everything[2]['id']
+    assert app_client.get('/api/majors?fields=password').status_code == 400
+
+def test_repeat_pages_skip_sql_and_revalidate(app_client, monkeypatch):
+    import app as app_module
+
+    first = app_client.get('/api/personality-types?fields=code')
+    assert first.cache_control.private and first.cache_control.no_cache
+    monkeypatch.setattr(app_module, 'fetch_page', None)  # A cache miss would fail
+    second = app_client.get('/api/personality-types?fields=code')
+    assert second.data == first.data and second.headers['ETag'] == first.headers['ETag']
+    revalidated = app_client.get('/api/personality-types?fields=code',
+                                 headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304 and revalidated.data == b''
+
+def test_catalog_change_changes_etag(app, app_client):
+    from app import get_db
+
+    first = app_client.get('/api/majors/1')
+    assert json.loads(first.data)['id'] == 1
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE majors SET name = 'Renamed' WHERE id = 1")
+        db.commit()
+    response = app_client.get('/api/majors/1', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert json.loads(response.data)['name'] == 'Renamed'
+    assert app_client.get('/api/majors/999999').status_code == 404
+
+def test_recommendations_link_to_major_details(app_client):
+    with app_client.session_transaction() as session:
+        session['questionnaire_responses'] = {'analytical': 9, 'creative': 2,
+                                              'social': 3, 'technical': 8}
+    page = app_client.get('/recommendations').get_data(as_text=True)
+    assert 'data-major-url="/api/majors/' in page
+    assert 'onclick="showMajorDetails' not in page
+
+def test_missing_major_is_404_even_with_a_current_etag(app_client):
+    first = app_client.get('/api/majors/1')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert app_client.get('/api/majors/1', headers={'If-None-Match': etag}).status_code == 304
+    for tag in (etag, '*'):
+        response = app_client.get('/api/majors/999999', headers={'If-None-Match': tag})
+        assert response.status_code == 404
+
+def test_new_personality_types_leave_majors_cached(app, app_client):
+    """Creating a type retags /api/personality-types without touching the majors version"""
+    from app import get_personality_type_id
+
+    types = app_client.get('/api/personality-types')
+    majors = app_client.get('/api/majors')
+    with app.app_context():
+        get_personality_type_id('XXXX')
+    assert app_client.get('/api/personality-types').headers['ETag'] != types.headers['ETag']
+    assert app_client.get('/api/majors').headers['ETag'] == majors.headers['ETag']
@@ -0,0 +1,103 @@
+import gzip
+import zlib
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+
+from compression import DEFAULT_RULES, CompressionMiddleware, choose_encoding
+
+BODY = b'{"majors": [' + b'{"name": "Computer Science"}, ' * 200 + b'{}]}'
+
+def make_client(response_factory, **config):
+    config.setdefault('COMPRESSION_RULES', DEFAULT_RULES)
+
+    @Request.application
+    def wsgi_app(request):
+        return response_factory(request)
+
+    return Client(CompressionMiddleware(wsgi_app, config))
+
+def test_choose_encoding():
+    assert choose_encoding('gzip, deflate') == 'gzip'
+    assert choose_encoding('gzip;q=0, deflate') is None
+    assert choose_encoding('*') in ('br', 'gzip')
+    assert choose_encoding(None) is None
+
+def test_large_json_is_gzipped():
+    client = make_client(lambda request: Response(BODY, mimetype='application/json'))
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()) == BODY
+    assert int(response.headers.get('Content-Length', 0)) == 0
+
+    identity = client.get('/')
+    assert 'Content-Encoding' not in identity.headers
+    assert identity.get_data() == BODY
+
+def test_small_and_unlisted_bodies_pass_through():
+    small = make_client(lambda request: Response(b'{}', mimetype='application/json'))
+    assert 'Content-Encoding' not in small.get('/', headers={'Accept-Encoding': 'gzip'}).headers
+    image = make_client(lambda request: Response(BODY, mimetype='image/jpeg'))
+    response = image.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
+
+def test_precompressed_responses_untouched():
+    payload = gzip.compress(BODY)
+
+    def precompressed(request):
+        response = Response(payload, mimetype='text/javascript')
+        response.content_encoding = 'gzip'
+        return response
+
+    response = make_client(precompressed).get('/', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.get_data() == payload
+
+def test_streaming_responses_flush_each_chunk():
+    """Each chunk the app yields is decodable as soon as it arrives"""
+    rows = [b'{"index": %d}\n' % i * 50 for i in range(3)]
+    client = make_client(lambda request: Response(iter(rows), mimetype='application/x-ndjson'))
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    received = [decoder.decompress(chunk) for chunk in response.iter_encoded()]
+    assert b''.join(received) + decoder.flush() == b''.join(rows)
+    assert received[0] == rows[0]
+
+def test_level_and_threshold_configurable_per_type():
+    rules = {'application/json': {'min_size': len(BODY) + 1, 'gzip_level': 1}}
+    client = make_client(lambda request: Response(BODY, mimetype='application/json'),
+                         COMPRESSION_RULES=rules)
+    assert 'Content-Encoding' not in client.get('/', headers={'Accept-Encoding': 'gzip'}).headers
+    rules['application/json']['min_size'] = 0
+    fast = client.get('/', headers={'Accept-Encoding': 'gzip'}).get_data()
+    rules['application/json']['gzip_level'] = 9
+    small = client.get('/', headers={'Accept-Encoding': 'gzip'}).get_data()
+    assert len(small) <= len(fast)
+
+def test_etags_round_trip_through_compression():
+    """Compressed bodies get their own ETag, which still revalidates to a 304"""
+    def conditional(request):
+        response = Response(BODY, mimetype='application/json')
+        response.set_etag('abc')
+        return response.make_conditional(request)
+
+    client = make_client(conditional)
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['ETag'] == '"abc-gzip"'
+    revalidated = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"abc-gzip"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == '"abc-gzip"'
+    assert client.get('/', headers={'If-None-Match': '"abc"'}).status_code == 304
+
+def test_app_pages_compressed(app, app_client):
+    response = app_client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'RecruitmentBuddy' in gzip.decompress(response.get_data())
+    app.config['COMPRESSION_ENABLED'] = False
+    try:
+        response = app_client.get('/', headers={'Accept-Encoding': 'gzip'})
+    finally:
+        app.config['COMPRESSION_ENABLED'] = True
+    assert 'Content-Encoding' not in response.headers
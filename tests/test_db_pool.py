@@ -0,0 +1,69 @@
+import threading
+import pytest
+from db_pool import ConnectionPool, PoolTimeout
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+def test_connections_are_reused_and_tuned(pool):
+    conn = pool.acquire()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert pool.stats()['open'] == 1
+
+def test_release_discards_uncommitted_work(pool):
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    pool.release(conn)
+    conn = pool.acquire()
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    pool.release(conn)
+
+def test_pool_is_bounded(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    threading.Timer(0.05, pool.release, (first,)).start()
+    assert pool.acquire() is first
+    stats = pool.stats()
+    assert (stats['open'], stats['in_use'], stats['waits'], stats['timeouts']) == (2, 2, 1, 1)
+    pool.release(second)
+
+def test_validate_replaces_dead_idle_connections(tmp_path):
+    dead = set()
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=1,
+                          validate=lambda conn: id(conn) not in dead)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn  # Still alive: reused
+    pool.release(conn)
+    dead.add(id(conn))
+    fresh = pool.acquire()
+    assert fresh is not conn
+    stats = pool.stats()
+    assert (stats['open'], stats['in_use'], stats['replaced']) == (1, 1, 1)
+    pool.release(fresh)
+    pool.close()
+
+def test_closed_pool_closes_released_connections(pool):
+    conn = pool.acquire()
+    pool.close()
+    pool.release(conn)
+    assert pool.stats()['open'] == 0
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+def test_requests_share_pooled_connections(app, app_client):
+    app_client.get('/api/majors')
+    app_client.get('/api/majors')
+    stats = app.extensions['db_pool'].stats()
+    assert stats['open'] == 1 and stats['in_use'] == 0
+    assert stats['acquired'] >= 3
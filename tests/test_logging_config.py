@@ -0,0 +1,105 @@
+import json
+import logging
+import queue
+
+from logging_config import (REDACTED, DebugRateLimiter, NonBlockingQueueHandler, RedactingFilter,
+                            StructuredFormatter, configure_logging, redact)
+
+def make_record(msg, *args, level=logging.INFO, lineno=1, **extra):
+    record = logging.LogRecord('test', level, __file__, lineno, msg, args or None, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_redact_masks_credential_fields():
+    """Secret-named keys are masked in dicts and in rendered text"""
+    form = {'email': 'a@example.com', 'password': 'hunter2', 'confirm_password': 'hunter2'}
+    assert redact(form) == {'email': 'a@example.com', 'password': REDACTED,
+                            'confirm_password': REDACTED}
+    text = redact(f"Form data: {form}")
+    assert 'hunter2' not in text and 'a@example.com' in text
+    assert redact('Authorization: Bearer abc123 ok') == f'Authorization: {REDACTED} ok'
+    assert redact('path=/login password=hunter2&x=1') == f'path=/login password={REDACTED}&x=1'
+
+def test_redacting_filter_rewrites_formatted_message():
+    """Secrets passed through %-args are masked before the record is queued"""
+    record = make_record('form=%s', {'password': 'hunter2'})
+    assert RedactingFilter().filter(record)
+    assert 'hunter2' not in record.getMessage()
+    clean = make_record('status=%s', 'ok')
+    RedactingFilter().filter(clean)
+    assert clean.args == ('ok',)
+
+def test_debug_rate_limit_per_call_site():
+    """DEBUG records beyond the budget are dropped; other levels always pass"""
+    now = [0.0]
+    limiter = DebugRateLimiter(per_second=2, clock=lambda: now[0])
+    results = [limiter.filter(make_record('x', level=logging.DEBUG)) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+    assert limiter.filter(make_record('x', level=logging.DEBUG, lineno=2))
+    assert limiter.filter(make_record('x', level=logging.WARNING))
+    now[0] = 1.0
+    assert limiter.filter(make_record('x', level=logging.DEBUG))
+    assert limiter.dropped == 3
+
+def test_full_queue_drops_instead_of_blocking():
+    """A full queue costs the caller a counter increment, not a wait"""
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    handler.handle(make_record('first'))
+    handler.handle(make_record('second'))
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+def test_queue_handler_leaves_rendering_to_the_listener():
+    """The calling thread never renders the message; %-args reach the queue untouched"""
+    class Counted:
+        renders = 0
+
+        def __str__(self):
+            Counted.renders += 1
+            return 'value'
+
+    handler = NonBlockingQueueHandler(queue.Queue())
+    handler.handle(make_record('arg=%s', Counted()))
+    record = handler.queue.get_nowait()
+    assert Counted.renders == 0 and record.msg == 'arg=%s'
+    assert record.getMessage() == 'arg=value'
+
+def test_structured_formatter_includes_redacted_extras():
+    """JSON lines carry extra fields, with secret ones masked"""
+    record = make_record('login', user_id=3, token='abc')
+    entry = json.loads(StructuredFormatter().format(record))
+    assert entry['message'] == 'login'
+    assert entry['user_id'] == 3
+    assert entry['token'] == REDACTED
+
+def test_configure_logging_writes_through_listener(app, tmp_path):
+    """Records reach the file sink via the listener, with per-logger levels applied"""
+    from app import setup_logging
+
+    log_file = tmp_path / 'test.log'
+    try:
+        listener = configure_logging(level='INFO', levels={'quiet': 'ERROR'}, log_file=log_file)
+        logging.getLogger('loud').info('visible password=%s', 'hunter2')
+        logging.getLogger('quiet').info('hidden')
+        listener.stop()
+        listener.start()
+        contents = log_file.read_text()
+        assert 'visible password=' + REDACTED in contents
+        assert 'hunter2' not in contents and 'hidden' not in contents
+    finally:
+        logging.getLogger('quiet').setLevel(logging.NOTSET)
+        setup_logging(app)
+
+def test_discard_logging_never_touches_the_inherited_queue(app):
+    """After fork() the listener's queue lock may be held forever; replacing the setup must not wait on it"""
+    from app import setup_logging
+    from logging_config import discard_logging, logging_configured
+
+    listener = configure_logging(log_file=None)
+    with listener.queue.mutex:  # As if the listener thread held it at fork time
+        discard_logging()
+        assert not logging_configured()
+        replacement = configure_logging(log_file=None)
+        assert replacement is not listener
+    listener.stop()
+    setup_logging(app)
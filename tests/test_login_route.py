@@ -0,0 +1,88 @@
+import sqlite3
+
+from werkzeug.security import generate_password_hash
+
+from db_diagnostics import estimate_row_count, login_diagnostics
+
+def add_user(app, email, password_hash):
+    from app import get_db
+
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            'INSERT INTO users (first_name, last_name, email, password) VALUES (?, ?, ?, ?)',
+            ('Login', 'User', email, password_hash)
+        )
+        db.commit()
+
+def stored_hash(app, email):
+    from app import get_db
+
+    with app.app_context():
+        return get_db().execute('SELECT password FROM users WHERE email = ?',
+                                (email,)).fetchone()[0]
+
+def test_login_upgrades_outdated_hash(app, app_client):
+    """A successful login re-hashes a password stored with old parameters"""
+    add_user(app, 'old@example.com', generate_password_hash('secret', 'pbkdf2:sha256:500'))
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    app.config['PASSWORD_HASH_WORKERS'] = 0
+    try:
+        with app_client.session_transaction() as session:
+            session.clear()
+        response = app_client.post('/login', data={'email': ' old@example.com ',
+                                                   'password': 'secret'})
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/questionnaire')
+        with app_client.session_transaction() as session:
+            assert session['user_id'] == 2
+        assert stored_hash(app, 'old@example.com').startswith('pbkdf2:sha256:1000$')
+    finally:
+        app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'
+        app.config['PASSWORD_HASH_WORKERS'] = 2
+
+def test_login_rejects_bad_credentials(app, app_client):
+    """Unknown emails and wrong passwords re-render the form without a session"""
+    add_user(app, 'known@example.com', generate_password_hash('secret', 'pbkdf2:sha256:1000'))
+    app.config['PASSWORD_HASH_WORKERS'] = 0
+    try:
+        with app_client.session_transaction() as session:
+            session.clear()
+        response = app_client.post('/login', data={'email': 'nobody@example.com',
+                                                   'password': 'secret'})
+        assert b'Invalid email address.' in response.data
+        response = app_client.post('/login', data={'email': 'known@example.com',
+                                                   'password': 'wrong'})
+        assert b'Incorrect password.' in response.data
+        with app_client.session_transaction() as session:
+            assert 'user_id' not in session
+    finally:
+        app.config['PASSWORD_HASH_WORKERS'] = 2
+
+def test_sampled_login_diagnostics_are_logged(app, app_client, caplog):
+    """With a sample rate of 1 every login logs schema and user-count stats"""
+    app.config['LOGIN_DIAGNOSTICS_SAMPLE_RATE'] = 1.0
+    try:
+        with app_client.session_transaction() as session:
+            session.clear()
+        with caplog.at_level('INFO', logger='app'):
+            app_client.post('/login', data={'email': 'nobody@example.com', 'password': 'x'})
+    finally:
+        app.config['LOGIN_DIAGNOSTICS_SAMPLE_RATE'] = 0.0
+    assert any('Login diagnostics' in record.getMessage() and "'approx_users': 1" in
+               record.getMessage() for record in caplog.records)
+
+def test_login_diagnostics_do_not_scan_users():
+    """Row counts come from ANALYZE statistics or the highest rowid"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT UNIQUE)')
+    conn.executemany('INSERT INTO users (email) VALUES (?)',
+                     [(f'user{i}@example.com',) for i in range(50)])
+    conn.execute('DELETE FROM users WHERE id <= 10')
+    assert estimate_row_count(conn, 'users') == 50
+
+    conn.execute('ANALYZE')
+    stats = login_diagnostics(conn)
+    assert stats['approx_users'] == 40
+    assert stats['user_columns'] == ['id', 'email']
+    assert stats['tables'] == {'users': 2}
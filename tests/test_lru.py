@@ -0,0 +1,15 @@
+from catalog_api import CatalogPageCache
+from lru import LRUCache
+from recommendation_cache import RecommendationCache
+from response_cache import ResponseCache
+from template_cache import FragmentCache
+
+def test_every_cache_is_an_lru():
+    for cache_type in (RecommendationCache, ResponseCache, FragmentCache, CatalogPageCache):
+        assert issubclass(cache_type, LRUCache)
+
+def test_zero_maxsize_disables_the_cache():
+    cache = LRUCache(maxsize=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None and len(cache) == 0
+    assert cache.stats() == {'size': 0, 'maxsize': 0, 'hits': 0, 'misses': 1}
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from match_engine import MatchEngine, top_k_positions, user_vector
+
+def make_majors(count, seed=0):
+    """Random majors shaped like rows of the majors table"""
+    rng = np.random.default_rng(seed)
+    weights = rng.random((count, 4))
+    return [
+        {
+            'id': i + 1,
+            'name': f'Major {i + 1}',
+            'description': 'Test Description',
+            'careers': 'Career A,Career B',
+            'skills': 'Skill A,Skill B',
+            'analytical_weight': w[0],
+            'creative_weight': w[1],
+            'social_weight': w[2],
+            'technical_weight': w[3]
+        }
+        for i, w in enumerate(weights)
+    ]
+
+def loop_scores(majors, vector, personality=None):
+    """Reference implementation: the original per-major Python loop"""
+    scores = []
+    for i, major in enumerate(majors):
+        dimension_match = (
+            (1 - abs(vector[0] - major['analytical_weight'])) +
+            (1 - abs(vector[1] - major['creative_weight'])) +
+            (1 - abs(vector[2] - major['social_weight'])) +
+            (1 - abs(vector[3] - major['technical_weight']))
+        ) / 4
+        personality_match = 0.5 if personality is None else personality[i]
+        scores.append(dimension_match * 0.7 + personality_match * 0.3)
+    return scores
+
+def test_user_vector_accepts_questionnaire_field_names():
+    """The 'practical' slider maps onto the technical dimension"""
+    vector = user_vector({'analytical': 8, 'creative': 6, 'social': 7, 'practical': 9})
+    assert vector.tolist() == pytest.approx([0.8, 0.6, 0.7, 0.9])
+    vector = user_vector({'analytical_score': 8, 'creative_score': 6,
+                          'social_score': 7, 'technical_score': 9})
+    assert vector.tolist() == pytest.approx([0.8, 0.6, 0.7, 0.9])
+    with pytest.raises(KeyError):
+        user_vector({'analytical': 8, 'creative': 6})
+
+def test_scores_match_reference_loop():
+    """Vectorized scores equal the per-major loop, with and without personality"""
+    majors = make_majors(200)
+    engine = MatchEngine(majors)
+    vector = user_vector({'analytical': 3, 'creative': 9, 'social': 5, 'technical': 1})
+    scores, _ = engine.score(vector)
+    assert scores.tolist() == pytest.approx(loop_scores(majors, vector))
+
+    personality = np.random.default_rng(1).random(len(majors))
+    scores, _ = engine.score(vector, personality)
+    assert scores.tolist() == pytest.approx(loop_scores(majors, vector, personality))
+
+def test_top_k_matches_full_sort():
+    """argpartition top-k returns the same majors as sorting everything"""
+    majors = make_majors(500)
+    engine = MatchEngine(majors)
+    vector = user_vector({'analytical': 7, 'creative': 2, 'social': 4, 'technical': 8})
+    expected = sorted(range(len(majors)),
+                      key=lambda i: loop_scores(majors, vector)[i], reverse=True)[:10]
+    matches = engine.top_k(vector, k=10)
+    assert [match['major_id'] for match in matches] == [majors[i]['id'] for i in expected]
+    assert matches[0]['match_score'] >= matches[-1]['match_score']
+    assert set(matches[0]) >= {'name', 'careers', 'skills', 'analytical_match',
+                               'technical_weight', 'personality_match'}
+
+def test_top_k_positions_edge_cases():
+    """k larger than the catalog returns everything; ties keep catalog order"""
+    scores = np.array([0.5, 0.9, 0.5, 0.1])
+    assert top_k_positions(scores).tolist() == [1, 0, 2, 3]
+    assert top_k_positions(scores, k=10).tolist() == [1, 0, 2, 3]
+    assert top_k_positions(scores, k=0).tolist() == []
+    ties = np.array([0.1] + [0.5] * 50 + [0.9])
+    assert top_k_positions(ties[::-1].copy(), k=3).tolist() == [0, 1, 2]  # Ties at the k-th score
+    assert top_k_positions(ties, k=3).tolist() == [51, 1, 2]
+    assert len(MatchEngine([]).top_k(np.zeros(4), k=3)) == 0
+
+def test_dense_personality_matrix():
+    """Recorded matches fill their cell; other majors and types stay neutral"""
+    majors = make_majors(5)
+    engine = MatchEngine(majors)
+    engine.load_personality_matches([(7, 2, 0.9), (7, 4, 0.1), (3, 1, 1.0), (3, 99, 0.2)])
+    assert engine.personality.shape == (2, 5)
+    assert engine.personality_vector(7).tolist() == [0.5, 0.9, 0.5, 0.1, 0.5]
+    assert engine.personality_vector(3).tolist() == [1.0, 0.5, 0.5, 0.5, 0.5]
+    assert engine.personality_vector(1) is None
+    assert engine.personality_vector(None) is None
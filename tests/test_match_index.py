@@ -0,0 +1,44 @@
+import numpy as np
+from match_engine import MatchEngine
+from tests.test_match_engine import make_majors
+
+def test_index_matches_brute_force():
+    """KD-tree answers are identical to the exact vectorized scan"""
+    majors = make_majors(5000, seed=3)
+    brute = MatchEngine(majors, index_min_majors=len(majors) + 1)
+    indexed = MatchEngine(majors, index_min_majors=0)
+    assert brute.index is None and indexed.index is not None
+
+    rng = np.random.default_rng(4)
+    personality = rng.random(len(majors))
+    for vector in rng.integers(1, 11, size=(50, 4)) / 10.0:
+        assert indexed.top_k(vector, k=10) == brute.top_k(vector, k=10)
+        assert (indexed.top_k(vector, k=10, personality=personality, personality_key=7) ==
+                brute.top_k(vector, k=10, personality=personality))
+
+def test_index_breaks_ties_like_brute_force():
+    """One-decimal weights tie constantly; the tree must still rank ties by catalog order"""
+    majors = make_majors(2000, seed=6)
+    for major in majors:
+        for dimension in ('analytical', 'creative', 'social', 'technical'):
+            major[f'{dimension}_weight'] = round(major[f'{dimension}_weight'], 1)
+    brute = MatchEngine(majors, index_min_majors=len(majors) + 1)
+    indexed = MatchEngine(majors, index_min_majors=0)
+
+    rng = np.random.default_rng(7)
+    personality = rng.integers(0, 11, len(majors)) / 10.0
+    for vector in rng.integers(1, 11, size=(400, 4)) / 10.0:
+        assert indexed.top_k(vector, k=10) == brute.top_k(vector, k=10)
+    for vector in rng.integers(1, 11, size=(50, 4)) / 10.0:
+        assert (indexed.top_k(vector, k=10, personality=personality, personality_key=1) ==
+                brute.top_k(vector, k=10, personality=personality))
+
+def test_index_skipped_for_unkeyed_personality_and_full_rankings():
+    """Queries the tree cannot answer fall back to the full scan"""
+    majors = make_majors(300, seed=5)
+    engine = MatchEngine(majors, index_min_majors=0)
+    personality = np.linspace(0, 1, len(majors))
+    vector = np.full(4, 0.5)
+    assert engine.index.query(vector, 5, personality) is None
+    assert len(engine.top_k(vector, k=5, personality=personality)) == 5
+    assert len(engine.top_k(vector)) == len(majors)
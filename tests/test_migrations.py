@@ -0,0 +1,80 @@
+import shutil
+import sqlite3
+from pathlib import Path
+import pytest
+from migrations import LATEST_VERSION, get_schema_version, migrate
+
+LEGACY_DB = Path(__file__).parent.parent / 'recruitmentbuddy.db'
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Copy of the shipped database, created before any migrations existed"""
+    path = tmp_path / 'legacy.db'
+    shutil.copy(LEGACY_DB, path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+def query_plan(conn, sql, params):
+    return ' | '.join(row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+def test_upgrades_legacy_database_in_place(legacy_db):
+    legacy_db.executescript('''
+        INSERT INTO personality_types (code, name) VALUES ('INTJ', 'Architect');
+        INSERT INTO personality_types (code, name) VALUES ('INTJ', 'Duplicate');
+        INSERT INTO major_personality_matches (major_id, personality_type_id, match_strength)
+        VALUES (1, (SELECT MAX(id) FROM personality_types), 0.8);
+    ''')
+    users = legacy_db.execute('SELECT * FROM users').fetchall()
+    assert get_schema_version(legacy_db) == 0
+
+    assert migrate(legacy_db) == list(range(1, LATEST_VERSION + 1))
+    assert get_schema_version(legacy_db) == LATEST_VERSION
+    assert [tuple(row) for row in legacy_db.execute('SELECT * FROM users')] == \
+        [tuple(row) for row in users]
+    assert legacy_db.execute("SELECT COUNT(*) FROM personality_types WHERE code = 'INTJ'").fetchone()[0] == 1
+    keep_id = legacy_db.execute("SELECT id FROM personality_types WHERE code = 'INTJ'").fetchone()[0]
+    assert legacy_db.execute('SELECT personality_type_id FROM major_personality_matches').fetchone()[0] == keep_id
+    with pytest.raises(sqlite3.IntegrityError):
+        legacy_db.execute("INSERT INTO personality_types (code, name) VALUES ('INTJ', 'Again')")
+
+    version = legacy_db.execute('SELECT version FROM catalog_version').fetchone()[0]
+    legacy_db.execute('UPDATE majors SET social_weight = 0.5 WHERE id = 1')
+    assert legacy_db.execute('SELECT version FROM catalog_version').fetchone()[0] == version + 1
+
+    assert migrate(legacy_db) == []
+
+def test_fresh_schema_migrates(app, app_client):
+    from app import get_db
+
+    with app.app_context():
+        db = get_db()
+        assert get_schema_version(db) == LATEST_VERSION
+        # schema.sql already declares code UNIQUE; no second index is added
+        unique_indexes = [row for row in db.execute('PRAGMA index_list(personality_types)')
+                          if row['unique']]
+        assert len(unique_indexes) == 1
+
+def test_hot_queries_use_indexes(legacy_db):
+    from repositories import LATEST_RESPONSE_QUERY, TOP_RECOMMENDATIONS_QUERY
+
+    migrate(legacy_db)
+    plans = {
+        'latest response': query_plan(legacy_db, LATEST_RESPONSE_QUERY, (1,)),
+        'top recommendations': query_plan(legacy_db, TOP_RECOMMENDATIONS_QUERY, (1, 5)),
+        'personality by code': query_plan(
+            legacy_db, 'SELECT id FROM personality_types WHERE code = ?', ('INTJ',)),
+        'matches by type': query_plan(legacy_db, '''
+            SELECT major_id, match_strength FROM major_personality_matches
+            WHERE personality_type_id = ?
+        ''', (1,)),
+        'matches by major': query_plan(
+            legacy_db, 'DELETE FROM major_personality_matches WHERE major_id = ?', (1,)),
+        'user by email': query_plan(
+            legacy_db, 'SELECT * FROM users WHERE email = ?', ('test@example.com',)),
+    }
+    for name, plan in plans.items():
+        assert 'USING' in plan and 'INDEX' in plan, f'{name}: {plan}'
+        assert 'SCAN' not in plan.replace('SCAN CONSTANT ROW', ''), f'{name}: {plan}'
+        assert 'TEMP B-TREE' not in plan, f'{name}: {plan}'
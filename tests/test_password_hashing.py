@@ -0,0 +1,65 @@
+import os
+import signal
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from password_hashing import PasswordHasher, PasswordHasherBusy, hash_method_prefix
+
+FAST_METHOD = 'pbkdf2:sha256:1000'
+
+def test_hash_and_verify_in_worker_processes():
+    hasher = PasswordHasher(method=FAST_METHOD, workers=1)
+    try:
+        stored = hasher.hash('secret')
+        assert stored.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(stored, 'secret')
+        assert not hasher.verify(stored, 'wrong')
+    finally:
+        hasher.shutdown()
+
+def test_needs_rehash_compares_parameters():
+    hasher = PasswordHasher(method=FAST_METHOD, workers=0)
+    assert not hasher.needs_rehash(hasher.hash('secret'))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:500'))
+    assert PasswordHasher(method='pbkdf2:sha256', workers=0).method_prefix.startswith('pbkdf2:sha256:')
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512',
+                                    'pbkdf2:sha256:1000'])
+def test_method_prefix_matches_werkzeug_without_hashing(method):
+    expected = generate_password_hash('', method, salt_length=1).split('$', 1)[0]
+    assert hash_method_prefix(method) == expected
+    with pytest.raises(ValueError):
+        hash_method_prefix('md5')
+
+def test_queue_depth_limit_sheds_load():
+    hasher = PasswordHasher(method='pbkdf2:sha256:2000000', workers=1, max_pending=1)
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        hasher.hash('secret')
+
+    thread = threading.Thread(target=slow_hash)
+    thread.start()
+    started.wait()
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            for _ in range(100):
+                hasher.hash('other')
+    finally:
+        thread.join()
+        hasher.shutdown()
+
+def test_killed_worker_is_replaced():
+    hasher = PasswordHasher(method=FAST_METHOD, workers=1)
+    try:
+        stored = hasher.hash('secret')
+        executor = hasher._executor
+        assert executor._mp_context.get_start_method() != 'fork'
+        for pid in list(executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        assert hasher.verify(stored, 'secret')
+        assert hasher._executor is not executor
+        assert not hasher.verify(stored, 'wrong')
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,131 @@
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from match_engine import MatchEngine
+from migrations import migrate
+from question_bank import DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS, QuestionBank
+
+def large_bank():
+    """12 dimensions, 40 questions spread round-robin with varying weights"""
+    dimensions = [(f'd{i}', f'Dimension {i}', f'T{i:03d}') for i in range(12)]
+    questions = [(f'q{i}', f'd{i % 12}', f'Question {i}', 1.0 + i % 3) for i in range(40)]
+    return QuestionBank(dimensions, questions)
+
+def test_large_bank_scores_are_weighted_means():
+    bank = large_bank()
+    assert len(bank) == 40 and bank.matrix.shape == (40, 12)
+    answers = np.arange(40) % 10 + 1.0
+    scores = bank.scores(answers)
+    for d in range(12):
+        rows = [i for i in range(40) if i % 12 == d]
+        weights = np.array([1.0 + i % 3 for i in rows])
+        assert scores[d] == pytest.approx(np.dot(weights, answers[rows]) / weights.sum())
+    batch = bank.scores(np.vstack([answers, answers[::-1]]))
+    assert batch.shape == (2, 12) and np.allclose(batch[0], scores)
+    assert bank.personality_code(scores) == f'T{int(np.argmax(scores)):03d}'
+
+def test_answers_validated_against_every_question():
+    bank = large_bank()
+    answers = {f'q{i}': 5 for i in range(40)}
+    assert bank.answers(answers).shape == (40,)
+    for bad in ({k: v for k, v in answers.items() if k != 'q39'},
+                dict(answers, q3=11), dict(answers, q3=0), dict(answers, q3='x'),
+                dict(answers, q3=float('nan'))):
+        with pytest.raises(ValueError):
+            bank.answers(bad)
+
+def test_validate_questionnaire_input_takes_a_bank():
+    from app import validate_questionnaire_input
+
+    answers = {'analytical': 8, 'creative': 3, 'social': 5, 'practical': 9}
+    assert validate_questionnaire_input(answers)  # No app context: the default bank
+    assert not validate_questionnaire_input(dict(answers, social=11))
+    bank = large_bank()
+    assert validate_questionnaire_input({f'q{i}': 5 for i in range(40)}, bank)
+    assert not validate_questionnaire_input(answers, bank)
+
+def test_invalid_banks_rejected():
+    with pytest.raises(ValueError):
+        QuestionBank(DEFAULT_DIMENSIONS, [('q', 'unknown', 'text')])
+    with pytest.raises(ValueError):
+        QuestionBank(DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS[:3])
+
+def test_default_bank_matches_the_original_instrument():
+    bank = QuestionBank(DEFAULT_DIMENSIONS, DEFAULT_QUESTIONS)
+    answers = bank.answers({'analytical': 8, 'creative': 3, 'social': 5, 'practical': 9})
+    scores = bank.score_dict(answers)
+    assert scores == {'analytical': 8, 'creative': 3, 'social': 5, 'technical': 9}
+    assert bank.personality_code([8, 3, 5, 9]) == 'ISTJ'
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    with open(Path(__file__).parent.parent / 'schema.sql', 'r') as f:
+        conn.executescript(f.read())
+    yield conn
+    conn.close()
+
+def test_from_db_reads_migrated_tables_and_falls_back(db):
+    legacy = QuestionBank.from_db(db)
+    assert legacy.fields == ('analytical', 'creative', 'social', 'practical')
+    migrate(db)
+    bank = QuestionBank.from_db(db)
+    assert bank.dimensions == legacy.dimensions and bank.questions == legacy.questions
+
+def test_match_engine_reads_extra_dimension_weights(db):
+    migrate(db)
+    db.execute("INSERT INTO dimensions (code, label, position) VALUES ('outdoor', 'Outdoor', 5)")
+    db.execute("INSERT INTO major_dimension_weights (major_id, dimension_id, weight) "
+               "SELECT 2, id, 0.9 FROM dimensions WHERE code = 'outdoor'")
+    count = db.execute('SELECT COUNT(*) FROM majors').fetchone()[0]
+    dimensions = ('analytical', 'creative', 'social', 'technical', 'outdoor')
+    engine = MatchEngine.from_db(db, dimensions=dimensions)
+    assert engine.dimensions == dimensions
+    assert engine.weights[:, 4].tolist() == [0.5, 0.9] + [0.5] * (count - 2)  # Unrated are neutral
+
+def test_new_dimension_and_question_change_the_questionnaire(app, app_client):
+    from app import get_db
+
+    before = app_client.get('/questionnaire')
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO dimensions (code, label, position, personality_code) "
+                   "VALUES ('outdoor', 'Outdoor', 5, 'ISTP')")
+        db.execute("INSERT INTO questions (position, field, text, dimension_id) "
+                   "SELECT 5, 'outdoors', 'How much do you enjoy working outdoors?', id "
+                   "FROM dimensions WHERE code = 'outdoor'")
+        db.commit()
+
+    page = app_client.get('/questionnaire', headers={'If-None-Match': before.headers['ETag']})
+    assert page.status_code == 200
+    text = page.get_data(as_text=True)
+    assert re.findall(r'data-dimension="(\w+)"', text)[-1] == 'outdoors'
+    assert 'data-fields="analytical,creative,social,practical,outdoors"' in text
+    assert 'working outdoors' in text
+
+    answers = {'analytical': 2, 'creative': 2, 'social': 2, 'practical': 2}
+    response = app_client.post('/submit_questionnaire', data=json.dumps(answers),
+                               content_type='application/json')
+    assert response.status_code == 400
+    response = app_client.post('/submit_questionnaire', data=json.dumps(dict(answers, outdoors=9)),
+                               content_type='application/json')
+    assert json.loads(response.data)['status'] == 'success'
+    with app.app_context():
+        db = get_db()
+        code = db.execute('''
+            SELECT p.code FROM questionnaire_responses r
+            JOIN personality_types p ON p.id = r.personality_type_id
+        ''').fetchone()[0]
+        scores = dict(db.execute('''
+            SELECT d.code, s.score FROM response_dimension_scores s
+            JOIN dimensions d ON d.id = s.dimension_id
+        ''').fetchall())
+    assert code == 'ISTP'
+    assert scores == {'analytical': 2, 'creative': 2, 'social': 2, 'technical': 2, 'outdoor': 9}
+    assert app_client.get('/recommendations').status_code == 200
@@ -0,0 +1,45 @@
+import json
+import re
+
+def test_single_page_questionnaire_has_every_step(app_client):
+    """One response carries all the sliders; only the first step starts visible"""
+    page = app_client.get('/questionnaire').get_data(as_text=True)
+    assert 'data-mode="single-page"' in page
+    assert re.findall(r'data-dimension="(\w+)"', page) == [
+        'analytical', 'creative', 'social', 'practical']
+    assert re.findall(r'data-question-step="(\d)"( hidden)?', page) == [
+        ('1', ''), ('2', ' hidden'), ('3', ' hidden'), ('4', ' hidden')]
+    assert 'data-next-url' not in page
+
+def test_single_page_is_cacheable(app_client):
+    first = app_client.get('/questionnaire')
+    again = app_client.get('/questionnaire', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+def test_step_urls_still_served_one_at_a_time(app, app_client):
+    page = app_client.get('/questionnaire?step=3').get_data(as_text=True)
+    assert 'data-mode="steps"' in page and 'data-next-url="/questionnaire?step=4"' in page
+    assert re.findall(r'data-dimension="(\w+)"', page) == ['social']
+
+    app.config['QUESTIONNAIRE_SINGLE_PAGE'] = False
+    try:
+        app.extensions.pop('response_cache', None)
+        page = app_client.get('/questionnaire').get_data(as_text=True)
+    finally:
+        app.config['QUESTIONNAIRE_SINGLE_PAGE'] = True
+    assert re.findall(r'data-dimension="(\w+)"', page) == ['analytical']
+
+def test_one_submit_completes_the_questionnaire(app_client):
+    answers = {'analytical': 8, 'creative': 3, 'social': 5, 'practical': 9}
+    response = app_client.post('/submit_questionnaire', data=json.dumps(answers),
+                               content_type='application/json')
+    assert json.loads(response.data)['status'] == 'success'
+    with app_client.session_transaction() as session:
+        assert session['questionnaire_responses'] == {
+            'analytical': 8.0, 'creative': 3.0, 'social': 5.0, 'practical': 9.0}
+    assert app_client.get('/recommendations').status_code == 200
+
+    invalid = dict(answers, social=11)
+    response = app_client.post('/submit_questionnaire', data=json.dumps(invalid),
+                               content_type='application/json')
+    assert response.status_code == 400
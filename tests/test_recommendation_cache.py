@@ -0,0 +1,51 @@
+import json
+from recommendation_cache import RecommendationCache, grid_inputs, quantize
+
+def test_quantize_only_accepts_slider_grid():
+    assert quantize({'analytical': 8, 'creative': 6.0, 'social': '7', 'practical': 10}) == (8, 6, 7, 10)
+    assert quantize({'analytical': 8.5, 'creative': 6, 'social': 7, 'practical': 10}) is None
+    assert quantize({'analytical': 0, 'creative': 6, 'social': 7, 'practical': 10}) is None
+    assert sum(1 for _ in grid_inputs()) == 10 ** 4
+
+def test_lru_eviction():
+    cache = RecommendationCache(maxsize=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a') == [1]
+    cache.put('c', [3])
+    assert cache.get('b') is None
+    assert cache.get('a') == [1] and cache.get('c') == [3]
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1}
+
+def test_cached_matches_keyed_on_catalog_version(app, app_client):
+    """Repeat inputs are served from the cache until the catalog changes"""
+    from app import cached_major_matches, get_db, get_recommendation_cache
+
+    answers = {'analytical': 9, 'creative': 5, 'social': 4, 'practical': 9}
+    with app.app_context():
+        first = cached_major_matches(answers, limit=3)
+    with app.app_context():
+        assert cached_major_matches(answers, limit=3) is first
+        assert cached_major_matches(dict(answers, social=4.5), limit=3) is not first
+        get_db().execute('UPDATE majors SET social_weight = 0.1 WHERE name = ?',
+                         ('Computer Science',))
+        get_db().commit()
+    with app.app_context():
+        assert cached_major_matches(answers, limit=3) is not first
+        assert get_recommendation_cache().hits >= 1
+
+def test_warm_recommendation_cache(app, app_client):
+    """Precomputing fills an entry per input and endpoint"""
+    from app import get_recommendation_cache, warm_recommendation_cache
+
+    with app.app_context():
+        cache = get_recommendation_cache()
+        cache.clear()
+        warm_recommendation_cache()
+    assert len(cache) == min(2 * 10 ** 4, cache.maxsize)
+    hits = cache.hits
+    response = app_client.post('/submit_questionnaire', content_type='application/json',
+                               data=json.dumps({'analytical': 3, 'creative': 9,
+                                                'social': 2, 'practical': 5}))
+    assert response.status_code == 200
+    assert cache.hits == hits + 1
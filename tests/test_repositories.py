@@ -0,0 +1,268 @@
+"""Contract tests every storage backend must pass.
+
+The pyodbc backend runs against a stand-in with pyodbc's connection and
+cursor interface (plain tuples, no lastrowid, fast_executemany) over SQLite,
+so no database server is needed. It runs once with the SQLite dialect and
+once with the SQL Server dialect, whose OFFSET/FETCH row limits and OUTPUT
+INSERTED ids the stand-in rewrites into SQLite's LIMIT and RETURNING.
+"""
+import json
+import re
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from db_pool import ConnectionPool
+from match_engine import MatchEngine
+from migrations import migrate
+from repositories import (SQLITE, SQLSERVER, Dialect, PyodbcBackend, Repositories, SQLiteBackend,
+                          TOP_RECOMMENDATIONS_SQL)
+
+SQL_SERVER_SYNTAX = [  # (SQL Server pattern, SQLite replacement)
+    (re.compile(r'OFFSET 0 ROWS FETCH NEXT (\S+) ROWS ONLY'), r'LIMIT \1'),
+    (re.compile(r'OUTPUT INSERTED\.id\s+(VALUES \(.*?\))', re.S), r'\1 RETURNING id'),
+]
+
+def from_sql_server(sql):
+    """SQL Server SQL as SQLite runs it; SQLite-only syntax is an error"""
+    if re.search(r'\bLIMIT\b|last_insert_rowid', sql):
+        raise AssertionError(f'Not SQL Server syntax: {sql}')
+    for pattern, replacement in SQL_SERVER_SYNTAX:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+class StandInCursor:
+    def __init__(self, conn):
+        self._cursor = conn._conn.cursor()
+        self.fast_executemany = False
+        self.bulk_writes = conn.bulk_writes
+        self.translate = conn.translate
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self.translate(sql), params)
+        return self
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        if not rows:
+            raise ValueError('The second parameter to executemany must not be empty.')
+        self.bulk_writes.append((self.fast_executemany, len(rows)))
+        self._cursor.executemany(self.translate(sql), rows)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+class StandInConnection:
+    """pyodbc.Connection's interface over sqlite3 (tuple rows, always in a transaction)"""
+
+    def __init__(self, path, bulk_writes, translate=str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self.bulk_writes = bulk_writes
+        self.translate = translate
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+@pytest.fixture(params=['sqlite', 'pyodbc', 'pyodbc-sqlserver'])
+def backend(request, tmp_path):
+    path = str(tmp_path / 'contract.db')
+    conn = sqlite3.connect(path)
+    with open(Path(__file__).parent.parent / 'schema.sql', 'r') as f:
+        conn.executescript(f.read())
+    migrate(conn)
+    conn.close()
+    if request.param == 'sqlite':
+        backend = SQLiteBackend(ConnectionPool(path, size=2))
+    else:
+        bulk_writes = []
+        if request.param == 'pyodbc':
+            dialect, translate = SQLITE, str
+        else:
+            dialect, translate = SQLSERVER, from_sql_server
+        backend = PyodbcBackend('DRIVER={stand-in}', dialect=dialect, size=2,
+                                connect=lambda: StandInConnection(path, bulk_writes, translate))
+        backend.bulk_writes = bulk_writes
+    yield backend
+    backend.close()
+
+@pytest.fixture
+def repos(backend):
+    return Repositories(backend)
+
+def test_users(repos):
+    with repos.backend.connection() as conn:
+        user_id = repos.users.create(conn, 'Ada', 'Lovelace', 'ada@example.com', 'hash1')
+    with repos.backend.connection() as conn:
+        assert repos.users.credentials(conn, 'ada@example.com') == {'id': user_id,
+                                                                    'password': 'hash1'}
+        assert repos.users.credentials(conn, 'nobody@example.com') is None
+        assert repos.users.email_exists(conn, 'ada@example.com')
+        repos.users.update(conn, user_id, 'Ada', 'King', 'ada@example.com')
+        assert repos.users.password(conn, user_id) == 'hash1'
+        repos.users.update(conn, user_id, 'Ada', 'King', 'ada@example.com', 'hash2')
+        repos.users.set_password(conn, user_id, 'hash3')
+    with repos.backend.connection() as conn:
+        user = repos.users.get(conn, user_id)
+        assert (user['last_name'], user['password']) == ('King', 'hash3')
+        assert repos.users.get(conn, user_id + 1) is None
+
+def test_failed_units_of_work_roll_back(repos):
+    with pytest.raises(RuntimeError):
+        with repos.backend.connection() as conn:
+            repos.users.create(conn, 'A', 'B', 'rollback@example.com', 'x')
+            raise RuntimeError
+    with repos.backend.connection() as conn:
+        assert not repos.users.email_exists(conn, 'rollback@example.com')
+
+def test_catalog(repos):
+    with repos.backend.connection() as conn:
+        majors = repos.catalog.majors(conn)
+        assert majors and [major['id'] for major in majors] == sorted(m['id'] for m in majors)
+        assert repos.catalog.major(conn, majors[0]['id'])['name'] == majors[0]['name']
+        assert repos.catalog.major(conn, -1) is None
+        page = repos.catalog.rows(conn, 'majors', {'id': 'id', 'title': 'name'},
+                                  after=majors[0]['id'], limit=2)
+        assert page == [{'id': major['id'], 'title': major['name']} for major in majors[1:3]]
+        assert repos.catalog.row(conn, 'majors', majors[0]['id'], {'title': 'name'}) == {
+            'id': majors[0]['id'], 'title': majors[0]['name']}
+        with pytest.raises(ValueError):
+            repos.catalog.rows(conn, 'users')
+        engine = MatchEngine.from_db(conn, catalog=repos.catalog)
+        assert engine.ids.tolist() == [major['id'] for major in majors]
+        ids = repos.catalog.personality_type_ids(conn)
+        assert repos.catalog.personality_type_id(conn, 'XXXX') is None
+        type_id = repos.catalog.create_personality_type(conn, 'XXXX', 'Test', 'Test type')
+        assert repos.catalog.personality_type_id(conn, 'XXXX') == type_id
+        assert repos.catalog.personality_type_ids(conn) == dict(ids, XXXX=type_id)
+        assert set(repos.catalog.dimension_ids(conn)) >= {'analytical', 'technical'}
+
+def test_responses_and_recommendations(repos, backend):
+    scores = {'analytical': 8.0, 'creative': 3.0, 'social': 5.0, 'technical': 9.0,
+              'unknown': 1.0}
+    with backend.connection() as conn:
+        user_id = repos.users.create(conn, 'A', 'B', 'a@example.com', 'x')
+        type_id = repos.catalog.create_personality_type(conn, 'ISTX', 'Test', '')
+        assert repos.responses.latest(conn, user_id) is None
+        response_id = repos.responses.create(conn, user_id, scores, type_id, '{}')
+        repos.responses.save_dimension_scores(conn, response_id, scores)
+        majors = repos.catalog.majors(conn)[:3]
+        repos.recommendations.save(conn, response_id, [
+            {'major_id': major['id'], 'match_score': score, 'personality_match': 0.5,
+             'analytical_match': 0.1}
+            for major, score in zip(majors, (0.7, 0.9, 0.8))])
+        repos.recommendations.save(conn, response_id, [])
+    with backend.connection() as conn:
+        latest = repos.responses.latest(conn, user_id)
+        assert latest['id'] == response_id and latest['personality_type'] == 'ISTX'
+        assert latest['practical_score'] == 9.0
+        assert repos.responses.dimension_scores(conn, response_id) == {
+            'analytical': 8.0, 'creative': 3.0, 'social': 5.0, 'technical': 9.0}
+        top = repos.recommendations.top(conn, response_id, 2)
+    assert [major['match_score'] for major in top] == pytest.approx([90, 80])
+    assert top[0]['name'] == majors[1]['name']
+    if hasattr(backend, 'bulk_writes'):
+        assert backend.bulk_writes == [(True, 4), (True, 3)]  # The empty batch never reached it
+
+def test_dialects_implement_every_method():
+    with pytest.raises(TypeError):
+        Dialect()
+
+    class Partial(Dialect):
+        def limit(self, count='?'):
+            return ''
+    with pytest.raises(TypeError):
+        Partial()
+
+def test_sql_server_dialect():
+    assert TOP_RECOMMENDATIONS_SQL.format(limit=SQLSERVER.limit()).rstrip().endswith(
+        'ORDER BY mr.match_score DESC\n    OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY')
+
+    class Recorder:
+        def execute(self, conn, sql, params=()):
+            self.sql = ' '.join(sql.split())
+            return self
+
+        def fetchone(self):
+            return (7,)
+
+    recorder = Recorder()
+    assert SQLSERVER.insert(recorder, None, 'users', ('email', 'password'), ('e', 'p')) == 7
+    assert recorder.sql == 'INSERT INTO users (email, password) OUTPUT INSERTED.id VALUES (?, ?)'
+
+def test_pyodbc_backend_replaces_dropped_connections(tmp_path):
+    path = str(tmp_path / 'dropped.db')
+    backend = PyodbcBackend('DRIVER={stand-in}', dialect=SQLITE, size=1,
+                            connect=lambda: StandInConnection(path, []))
+    with backend.connection() as conn:
+        dropped = conn
+    dropped._conn.close()  # The server went away while it sat idle
+    with backend.connection() as conn:
+        assert conn is not dropped
+        assert conn.cursor().execute('SELECT 1').fetchone() == (1,)
+    stats = backend.pool.stats()
+    assert (stats['open'], stats['replaced']) == (1, 1)
+    backend.close()
+
+def test_app_storage_backend_setting(monkeypatch, tmp_path):
+    """STORAGE_BACKEND = 'pyodbc' serves the app's repositories from DATABASE_URL"""
+    import repositories
+    from app import create_app, get_db, get_repositories
+    from catalog_api import MAJOR_FIELDS, fetch_page
+
+    path = str(tmp_path / 'server.db')
+    conn = sqlite3.connect(path)
+    with open(Path(__file__).parent.parent / 'schema.sql', 'r') as f:
+        conn.executescript(f.read())
+    migrate(conn)
+    conn.close()
+    connected = []
+
+    def connect(connection_string, autocommit):
+        connected.append(connection_string)
+        return StandInConnection(path, [], from_sql_server)
+
+    monkeypatch.setattr(repositories, 'pyodbc', SimpleNamespace(connect=connect))
+    app = create_app({'TESTING': True, 'WARM_UP': False, 'LOG_FILE': None,
+                      'SESSION_BACKEND': 'memory', 'DATABASE': str(tmp_path / 'unused.db'),
+                      'STORAGE_BACKEND': 'pyodbc', 'DATABASE_URL': 'DSN=stand-in'})
+    with app.app_context():
+        repos = get_repositories()
+        assert isinstance(repos.backend, PyodbcBackend) and get_repositories() is repos
+        with repos.backend.connection() as conn:
+            user_id = repos.users.create(conn, 'A', 'B', 'odbc@example.com', 'x')
+        assert repos.users.credentials(get_db(), 'odbc@example.com')['id'] == user_id
+        page = fetch_page(get_db(), 'majors', ('name',), MAJOR_FIELDS, 0, 2, repos.catalog)
+        assert len(json.loads(page.body)) == 2
+    assert connected and set(connected) == {'DSN=stand-in'}
+    assert not (tmp_path / 'unused.db').exists()
+    repos.backend.close()
+
+    app.config['STORAGE_BACKEND'] = 'postgres'
+    with app.app_context(), pytest.raises(ValueError):
+        get_repositories()
+
+def test_pyodbc_backend_needs_the_driver(monkeypatch):
+    import repositories
+
+    monkeypatch.setattr(repositories, 'pyodbc', None)
+    with pytest.raises(RuntimeError):
+        PyodbcBackend('DSN=missing')
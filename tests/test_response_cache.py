@@ -0,0 +1,68 @@
+def count_renders(monkeypatch):
+    """Count template renders done by the app's views"""
+    import app as app_module
+
+    renders = []
+    original = app_module.render_template
+
+    def render_template(name, **context):
+        renders.append(name)
+        return original(name, **context)
+
+    monkeypatch.setattr(app_module, 'render_template', render_template)
+    return renders
+
+def test_repeat_views_served_from_cache(app_client, monkeypatch):
+    """The second request for a page reuses its bytes instead of rendering"""
+    renders = count_renders(monkeypatch)
+    first = app_client.get('/questionnaire?step=2')
+    second = app_client.get('/questionnaire?step=2')
+    assert first.status_code == second.status_code == 200
+    assert second.data == first.data
+    assert renders == ['questionnaire.html']
+
+    app_client.get('/questionnaire?step=3')
+    assert renders == ['questionnaire.html', 'questionnaire.html']
+    assert 'Cookie' in second.vary
+    assert second.cache_control.private and second.cache_control.no_cache
+
+def test_cache_keyed_on_login_state(app_client, monkeypatch):
+    renders = count_renders(monkeypatch)
+    logged_in = app_client.get('/').get_data(as_text=True)
+    with app_client.session_transaction() as session:
+        session.clear()
+    anonymous = app_client.get('/').get_data(as_text=True)
+    assert 'Logout' in logged_in and 'Logout' not in anonymous
+    assert renders == ['index.html', 'index.html']
+
+def test_etag_revalidation(app_client):
+    first = app_client.get('/')
+    response = app_client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.data == b''
+
+def test_pending_flash_bypasses_cache(app_client, monkeypatch):
+    """Pages with flash messages render fresh and are not stored"""
+    renders = count_renders(monkeypatch)
+    with app_client.session_transaction() as session:
+        session.clear()
+    app_client.get('/login')
+    with app_client.session_transaction() as session:
+        session['_flashes'] = [('error', 'Please log in to access this page.')]
+    flashed = app_client.get('/login').get_data(as_text=True)
+    assert 'Please log in to access this page.' in flashed
+    plain = app_client.get('/login').get_data(as_text=True)
+    assert 'Please log in to access this page.' not in plain
+    assert renders == ['login.html', 'login.html']
+
+def test_redirects_and_posts_not_cached(app_client, monkeypatch):
+    """A logged-in visitor is still redirected from /login, and POSTs reach the view"""
+    from app import get_response_cache
+
+    assert app_client.get('/login').status_code == 302
+    assert app_client.get('/questionnaire?step=9').status_code == 302
+    assert len(get_response_cache()) == 0
+    with app_client.session_transaction() as session:
+        session.clear()
+    response = app_client.post('/login', data={'email': 'nobody@example.com', 'password': 'x'})
+    assert b'Invalid email address.' in response.data
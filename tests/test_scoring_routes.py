@@ -0,0 +1,84 @@
+import json
+
+QUESTIONNAIRE_ANSWERS = {'analytical': 9, 'creative': 5, 'social': 4, 'practical': 9}
+
+def test_submit_questionnaire_saves_engine_scores(app, app_client):
+    """Saved recommendations use the shared match engine's scores"""
+    from app import calculate_major_matches, get_db
+
+    response = app_client.post('/submit_questionnaire',
+                               data=json.dumps(QUESTIONNAIRE_ANSWERS),
+                               content_type='application/json')
+    assert response.status_code == 200
+    assert json.loads(response.data)['status'] == 'success'
+
+    with app.app_context():
+        saved = get_db().execute('''
+            SELECT major_id, match_score FROM major_recommendations
+            ORDER BY match_score DESC
+        ''').fetchall()
+        expected = calculate_major_matches(QUESTIONNAIRE_ANSWERS)
+    assert [row['major_id'] for row in saved] == [m['major_id'] for m in expected]
+    assert saved[0]['match_score'] == expected[0]['match_score'] * 100
+
+def test_recommendations_show_top_three(app_client):
+    """The recommendations view renders the three best matches"""
+    with app_client.session_transaction() as session:
+        session['questionnaire_responses'] = {
+            'analytical': 9, 'creative': 6, 'social': 4, 'technical': 9
+        }
+    response = app_client.get('/recommendations')
+    assert response.status_code == 200
+    assert b'Computer Science' in response.data
+    assert b'Mechanical Engineering' in response.data
+
+def test_match_engine_reloads_when_majors_change(app, app_client):
+    """Changing the majors table bumps the catalog version and rebuilds the engine"""
+    from app import get_db, get_match_engine
+
+    with app.app_context():
+        engine = get_match_engine()
+    with app.app_context():
+        assert get_match_engine() is engine
+
+        db = get_db()
+        db.execute('''
+            INSERT INTO majors (name, description, careers, skills, analytical_weight,
+                                creative_weight, social_weight, technical_weight)
+            VALUES ('Data Science', 'Statistics and computing', 'Data Scientist',
+                    'Statistics', 0.9, 0.5, 0.4, 0.9)
+        ''')
+        db.commit()
+    with app.app_context():
+        reloaded = get_match_engine()
+        assert reloaded is not engine
+        assert len(reloaded) == len(engine) + 1
+
+def test_submit_questionnaire_persists_top_k_only(app, app_client):
+    """Only the configured top-K rows are saved, with every match column filled"""
+    from app import calculate_major_matches, get_db
+
+    app.config['RECOMMENDATIONS_PERSIST_TOP_K'] = 2
+    try:
+        response = app_client.post('/submit_questionnaire',
+                                   data=json.dumps(QUESTIONNAIRE_ANSWERS),
+                                   content_type='application/json')
+    finally:
+        app.config['RECOMMENDATIONS_PERSIST_TOP_K'] = 10
+    assert response.status_code == 200
+
+    with app.app_context():
+        saved = get_db().execute('''
+            SELECT * FROM major_recommendations ORDER BY match_score DESC
+        ''').fetchall()
+        expected = calculate_major_matches(QUESTIONNAIRE_ANSWERS, limit=2)
+    assert len(saved) == 2
+    for row, match in zip(saved, expected):
+        assert row['major_id'] == match['major_id']
+        for column in ('analytical_match', 'creative_match', 'social_match',
+                       'technical_match', 'personality_match'):
+            assert row[column] == match[column]
+
+    response = app_client.get('/profile')
+    assert response.status_code == 200
+    assert b'Computer Science' in response.data
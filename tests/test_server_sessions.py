@@ -0,0 +1,168 @@
+from datetime import timedelta
+
+import pytest
+from flask import Flask, session
+
+from server_sessions import (MemorySessionStore, SQLiteSessionStore, ServerSessionInterface,
+                             is_valid_session_id, make_session_store, new_session_id)
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class CountingStore(MemorySessionStore):
+    def __init__(self, clock):
+        super().__init__(clock)
+        self.loads = self.saves = 0
+
+    def load(self, sid):
+        self.loads += 1
+        return super().load(sid)
+
+    def save(self, sid, data, expires):
+        self.saves += 1
+        super().save(sid, data, expires)
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def store(clock):
+    return CountingStore(clock)
+
+@pytest.fixture
+def client(store, clock):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.permanent_session_lifetime = timedelta(seconds=100)
+    app.session_interface = ServerSessionInterface(store, sweep_interval=60, clock=clock)
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return ''
+
+    @app.route('/append/<value>')
+    def append(value):
+        session.setdefault('values', []).append(value)  # Nested, in place
+        return ''
+
+    @app.route('/get')
+    def get_value():
+        return repr(session.get('values', session.get('value')))
+
+    @app.route('/untouched')
+    def untouched():
+        return ''
+
+    @app.route('/login')
+    def login():
+        session.clear()
+        session['user_id'] = 1
+        return ''
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return ''
+
+    return app.test_client()
+
+def session_cookie(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+@pytest.mark.parametrize('make_store', [MemorySessionStore,
+                                        lambda clock: SQLiteSessionStore(':memory:', clock, 1)])
+def test_store_expiry_and_sweep(make_store, clock):
+    store = make_store(clock)
+    store.save('a', b'{}', clock.now + 10)
+    store.save('b', b'{"x": 1}', clock.now + 100)
+    assert store.load('a') == (b'{}', clock.now + 10)
+    clock.now += 50
+    assert store.load('a') is None
+    assert store.sweep() == 1
+    store.save('b', b'{"x": 2}', clock.now + 100)
+    assert store.load('b')[0] == b'{"x": 2}'
+    store.delete('b')
+    assert store.load('b') is None
+    store.close()
+
+def test_cookie_holds_only_an_opaque_id(client, store):
+    client.get('/set/' + 'x' * 2000)
+    sid = session_cookie(client)
+    assert is_valid_session_id(sid) and len(sid) == 43
+    assert client.get('/get').data == repr('x' * 2000).encode()
+
+def test_lazy_load_and_writes_only_on_change(client, store):
+    client.get('/set/a')
+    assert store.saves == 1
+    loads = store.loads
+    client.get('/untouched')
+    assert store.loads == loads
+    client.get('/get')
+    client.get('/set/a')
+    assert store.saves == 1
+    client.get('/set/b')
+    assert store.saves == 2
+
+def test_nested_mutations_persist(client):
+    client.get('/append/a')
+    client.get('/append/b')
+    assert client.get('/get').data == b"['a', 'b']"
+
+def test_expiry_refreshed_before_it_lapses(client, store, clock):
+    client.get('/set/a')
+    clock.now += 40
+    client.get('/get')
+    assert store.saves == 1
+    clock.now += 20  # Less than half the lifetime left
+    client.get('/get')
+    assert store.saves == 2
+    clock.now += 90
+    assert client.get('/get').data == b"'a'"
+    clock.now += 101
+    assert client.get('/get').data == b'None'
+
+def test_clear_issues_a_new_id_and_empty_sessions_are_deleted(client, store):
+    client.get('/set/a')
+    before = session_cookie(client)
+    client.get('/login')
+    after = session_cookie(client)
+    assert after != before and store.load(before) is None
+    client.get('/logout')
+    assert session_cookie(client) is None and len(store) == 0
+
+def test_forged_or_unknown_ids_are_replaced(client, store):
+    client.set_cookie('session', 'not a session id')
+    client.get('/set/a')
+    assert is_valid_session_id(session_cookie(client))
+    forged = new_session_id()
+    client.set_cookie('session', forged)
+    client.get('/set/b')
+    assert session_cookie(client) != forged and store.load(forged) is None
+
+def test_periodic_sweep(client, store, clock):
+    client.get('/set/a')
+    client.delete_cookie('session')
+    clock.now += 200
+    client.get('/set/b')
+    assert len(store) == 1
+
+def test_unknown_backend_rejected():
+    assert make_session_store('cookie') is None
+    with pytest.raises(ValueError):
+        make_session_store('redis')
+
+def test_questionnaire_answers_persist_between_steps(app_client):
+    for step, field in enumerate(['analytical', 'creative', 'social', 'practical'], 1):
+        response = app_client.post('/questionnaire/next', json={'step': step, field: step + 4})
+        assert response.status_code == 200
+    with app_client.session_transaction() as session:
+        assert session['questionnaire_responses'] == {
+            'analytical': 5, 'creative': 6, 'social': 7, 'practical': 8}
+    assert app_client.post('/questionnaire/next', json={'step': 9}).status_code == 400
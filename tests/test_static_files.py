@@ -0,0 +1,48 @@
+import hashlib
+from pathlib import Path
+
+MASCOT = Path(__file__).parent.parent / 'static' / 'images' / 'mascot.jpg'
+
+def test_static_urls_carry_content_fingerprint(app):
+    """url_for('static') appends the file's content hash"""
+    from flask import url_for
+
+    fingerprint = hashlib.sha256(MASCOT.read_bytes()).hexdigest()[:12]
+    with app.test_request_context():
+        assert url_for('static', filename='images/mascot.jpg') == \
+            f'/static/images/mascot.jpg?v={fingerprint}'
+        assert url_for('static', filename='missing.css') == '/static/missing.css'
+
+def test_fingerprinted_static_is_immutable(app, app_client):
+    """The current fingerprint gets a year-long immutable lifetime; others revalidate"""
+    from flask import url_for
+
+    with app.test_request_context():
+        url = url_for('static', filename='images/mascot.jpg')
+    response = app_client.get(url)
+    assert response.status_code == 200
+    assert response.data == MASCOT.read_bytes()
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+
+    stale = app_client.get('/static/images/mascot.jpg?v=2')
+    assert not stale.cache_control.immutable
+    assert stale.cache_control.no_cache
+    assert stale.headers['ETag'] == response.headers['ETag']
+    assert not stale.headers['ETag'].startswith('W/')
+    assert 'Last-Modified' in stale.headers
+
+def test_static_conditional_requests(app_client):
+    """Matching validators get an empty 304"""
+    first = app_client.get('/static/images/mascot.jpg')
+    response = app_client.get('/static/images/mascot.jpg',
+                              headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.data == b''
+    response = app_client.get('/static/images/mascot.jpg',
+                              headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 304
+
+def test_static_rejects_missing_and_escaping_paths(app_client):
+    assert app_client.get('/static/images/nope.png').status_code == 404
+    assert app_client.get('/static/../app.py').status_code == 404
@@ -0,0 +1,98 @@
+from jinja2 import DictLoader, Environment, FileSystemLoader
+
+from template_cache import FragmentCache, FragmentCacheExtension, bytecode_cache
+
+def make_env(templates, version=1):
+    env = Environment(loader=DictLoader(templates), extensions=[FragmentCacheExtension])
+    env.fragment_cache = FragmentCache(100)
+    env.fragment_cache_version = lambda: version
+    return env
+
+def test_fragment_rendered_once_per_key():
+    """The body runs once per key; other keys and variables outside render normally"""
+    calls = []
+    env = make_env({'page.html': "{% cache 'card', step %}{{ count(step) }}{% endcache %}|{{ user }}"})
+    env.globals['count'] = lambda step: calls.append(step) or f'step {step}'
+    template = env.get_template('page.html')
+
+    assert template.render(step=1, user='a') == 'step 1|a'
+    assert template.render(step=1, user='b') == 'step 1|b'
+    assert template.render(step=2, user='a') == 'step 2|a'
+    assert calls == [1, 2]
+    assert env.fragment_cache.stats()['hits'] == 1
+
+def test_fragments_keyed_on_catalog_version():
+    """A new catalog version renders fresh; an untracked (None) version never caches"""
+    state = {'version': 1, 'calls': 0}
+    env = make_env({'page.html': "{% cache 'nav' %}{{ tick() }}{% endcache %}"})
+    env.fragment_cache_version = lambda: state['version']
+    env.globals['tick'] = lambda: state.update(calls=state['calls'] + 1) or state['calls']
+    template = env.get_template('page.html')
+
+    assert [template.render(), template.render()] == ['1', '1']
+    state['version'] = 2
+    assert template.render() == '2'
+    state['version'] = None
+    assert [template.render(), template.render()] == ['3', '4']
+
+def test_fragments_respect_autoescape():
+    """Cached fragments come back as safe markup, escaped exactly once"""
+    env = make_env({'page.html': "{% cache 'x' %}{{ text }}{% endcache %}"})
+    env.autoescape = True
+    template = env.get_template('page.html')
+    assert template.render(text='<b>') == '&lt;b&gt;'
+    assert template.render(text='ignored') == '&lt;b&gt;'
+
+def test_bytecode_cache_persists_compiled_templates(tmp_path):
+    """A second environment loads compiled code written by the first"""
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'templates' / 'page.html').write_text('Hello {{ name }}')
+    cache_dir = tmp_path / 'cache'
+
+    first = Environment(loader=FileSystemLoader(str(tmp_path / 'templates')),
+                        bytecode_cache=bytecode_cache(str(cache_dir)))
+    assert first.get_template('page.html').render(name='a') == 'Hello a'
+    assert len(list(cache_dir.iterdir())) == 1
+
+    second = Environment(loader=FileSystemLoader(str(tmp_path / 'templates')),
+                         bytecode_cache=bytecode_cache(str(cache_dir)))
+    second.compile = None  # Compiling again would fail
+    assert second.get_template('page.html').render(name='b') == 'Hello b'
+    assert bytecode_cache(None) is None
+
+def test_navbar_fragment_varies_with_login(app, app_client):
+    """The cached navbar still reflects whether the visitor is logged in"""
+    app.jinja_env.fragment_cache.clear()
+    page = app_client.get('/questionnaire?step=2').get_data(as_text=True)
+    assert 'Logout' in page
+    assert app_client.get('/questionnaire?step=2').get_data(as_text=True) == page
+    assert app.jinja_env.fragment_cache.stats()['size'] == 2  # navbar and question card
+
+    with app_client.session_transaction() as session:
+        session.clear()
+    page = app_client.get('/login').get_data(as_text=True)
+    assert 'Sign Up' in page and 'Logout' not in page
+
+def test_fragment_keys_reuse_the_observed_catalog_version(app, app_client):
+    """Once a version has been observed, rendering the navbar takes no connection"""
+    from app import get_db_pool
+
+    app.config['RESPONSE_CACHE_SIZE'] = 0  # Render '/' every time
+    assert app_client.get('/').status_code == 200
+    with app.app_context():
+        acquired = get_db_pool().stats()['acquired']
+    assert app_client.get('/').status_code == 200
+    with app.app_context():
+        assert get_db_pool().stats()['acquired'] == acquired
+
+def test_question_card_is_keyed_on_the_asset_build(app, app_client, monkeypatch):
+    """A new asset manifest re-renders question cards holding built image URLs"""
+    from static_files import StaticFiles
+
+    app.config['RESPONSE_CACHE_SIZE'] = 0
+    app.jinja_env.fragment_cache.clear()
+    app_client.get('/questionnaire?step=2')
+    assert app.jinja_env.fragment_cache.stats()['size'] == 2  # navbar and question card
+    monkeypatch.setattr(StaticFiles, 'manifest_version', property(lambda self: 'rebuilt'))
+    app_client.get('/questionnaire?step=2')
+    assert app.jinja_env.fragment_cache.stats()['size'] == 3  # Only the question card re-rendered